@@ -8,3 +8,11 @@ class ApiConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        """Подключает обработчики сигналов, проверки и замеры запросов."""
+        from foodgram import checks, metrics  # noqa: F401
+
+        from . import signals  # noqa: F401
+
+        metrics.install()
@@ -0,0 +1,73 @@
+"""Модуль асинхронных версий наиболее нагруженных маршрутов API.
+
+Django 3.2 не поддерживает асинхронный ORM, а DRF 3.12 — асинхронные
+представления, поэтому под ASGI синхронные представления по умолчанию
+выполняются по очереди в одном общем потоке. Асинхронная обёртка
+выполняет читающие запросы к тем же представлениям DRF параллельно в пуле
+потоков, не занимая цикл событий, и полностью сохраняет их поведение.
+"""
+from functools import partial, wraps
+
+from asgiref.sync import sync_to_async
+from rest_framework.permissions import SAFE_METHODS
+
+from django.db import close_old_connections
+from django.urls import URLPattern
+
+
+ASYNC_ROUTES = (
+    "tag-list",
+    "ingredient-list",
+    "recipe-list",
+    "recipe-detail",
+    "recipe-download-shopping-cart",
+)
+
+
+def run_view(view, request, *args, **kwargs):
+    """Выполняет представление и готовит ответ к отправке из цикла событий.
+
+    Ответ отрисовывается в том же потоке. Потоковое содержимое остаётся
+    генератором: его по частям читает в потоке синхронного кода запроса
+    FoodgramASGIHandler. Соединения потока с БД закрываются по тем же
+    правилам, что и после обычного запроса.
+    """
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, "render", None)):
+            response = response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_view(view):
+    """Асинхронное представление поверх синхронного представления DRF.
+
+    Безопасные запросы выполняются в пуле потоков параллельно, остальные —
+    в общем потоке, как синхронные представления под ASGI.
+    """
+    parallel = sync_to_async(partial(run_view, view), thread_sensitive=False)
+    serial = sync_to_async(partial(run_view, view), thread_sensitive=True)
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        handler = parallel if request.method in SAFE_METHODS else serial
+        return await handler(request, *args, **kwargs)
+
+    return wrapper
+
+
+def async_patterns(patterns):
+    """Асинхронные версии маршрутов ASYNC_ROUTES из маршрутов роутера."""
+    return [
+        URLPattern(
+            pattern.pattern,
+            async_view(pattern.callback),
+            pattern.default_args,
+            pattern.name,
+        )
+        for pattern in patterns
+        if pattern.name in ASYNC_ROUTES
+    ]
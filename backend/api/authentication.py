@@ -0,0 +1,56 @@
+"""Модуль аутентификации API."""
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+
+
+TOKEN_KEY = "auth-token:{key}"
+USER_TOKEN_KEY = "auth-token-user:{user_id}"
+
+
+def invalidate_token(key):
+    """Удаляет токен из кеша аутентификации."""
+    cache.delete(TOKEN_KEY.format(key=key))
+
+
+def invalidate_user_tokens(user_id):
+    """Удаляет из кеша токен пользователя."""
+    user_key = USER_TOKEN_KEY.format(user_id=user_id)
+    key = cache.get(user_key)
+    if key is not None:
+        cache.delete_many([TOKEN_KEY.format(key=key), user_key])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Аутентификация по токену с кешированием пары токен — пользователь.
+
+    Найденный токен вместе с пользователем хранится в кеше
+    AUTH_TOKEN_CACHE_TIMEOUT секунд, поэтому повторные запросы
+    аутентифицируются без обращения к БД. Запись удаляется сигналами при
+    удалении токена, а также при сохранении и удалении пользователя,
+    в том числе при смене пароля и деактивации. Изменения через
+    QuerySet.update() сигналов не вызывают и видны после истечения срока.
+    """
+
+    def authenticate_credentials(self, key):
+        """Пользователь и токен из кеша или из БД."""
+        cache_key = TOKEN_KEY.format(key=key)
+        token = cache.get(cache_key)
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set_many(
+                {
+                    cache_key: token,
+                    USER_TOKEN_KEY.format(user_id=user.pk): key,
+                },
+                timeout=settings.AUTH_TOKEN_CACHE_TIMEOUT,
+            )
+            return user, token
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _("User inactive or deleted.")
+            )
+        return token.user, token
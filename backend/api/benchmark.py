@@ -0,0 +1,101 @@
+"""Вспомогательные функции для замеров производительности API."""
+import json
+import math
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from recipes.images import wait_for_variants
+
+
+TRANSACTION_STATEMENTS = (
+    "BEGIN",
+    "SAVEPOINT",
+    "RELEASE SAVEPOINT",
+    "ROLLBACK TO SAVEPOINT",
+)
+
+
+def count_queries(queries):
+    """Число запросов к данным без команд управления транзакциями.
+
+    Эти команды зависят от СУБД и от того, выполняется ли запрос внутри
+    внешней транзакции, а не от кода маршрута.
+    """
+    return sum(
+        not query["sql"].startswith(TRANSACTION_STATEMENTS)
+        for query in queries
+    )
+
+
+def percentile(samples, pct):
+    """Возвращает перцентиль pct (0–100) по методу ближайшего ранга."""
+    ordered = sorted(samples)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(samples):
+    """Сводная статистика по замерам в миллисекундах."""
+    samples_ms = [sample * 1000 for sample in samples]
+    return {
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "mean_ms": round(statistics.mean(samples_ms), 3),
+        "min_ms": round(min(samples_ms), 3),
+        "max_ms": round(max(samples_ms), 3),
+    }
+
+
+def measure(func, repeat):
+    """Вызывает func repeat раз и возвращает сводку по времени."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def write_report(path, report):
+    """Сохраняет отчёт в формате JSON."""
+    with open(path, "w", encoding="UTF-8") as report_file:
+        json.dump(report, report_file, ensure_ascii=False, indent=2)
+
+
+def read_report(path):
+    """Читает ранее сохранённый отчёт."""
+    with open(path, encoding="UTF-8") as report_file:
+        return json.load(report_file)
+
+
+@contextmanager
+def benchmark_database(keepdb=False):
+    """Создает отдельную тестовую БД и каталог медиафайлов на время замера.
+
+    Изображения, загруженные при замере, и их копии сохраняются во
+    временный каталог, который удаляется вместе с тестовой БД после
+    завершения задач обработки изображений.
+    """
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, keepdb=keepdb
+    )
+    try:
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                try:
+                    yield
+                finally:
+                    wait_for_variants()
+    finally:
+        connection.creation.destroy_test_db(
+            old_name, verbosity=0, keepdb=keepdb
+        )
+        teardown_test_environment()
@@ -0,0 +1,161 @@
+"""Модуль кеширования справочных данных API."""
+import hashlib
+import time
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+
+VERSION_KEY = "reference-data-version:{namespace}"
+DATA_KEY = "reference-data:{namespace}:{version}:{digest}"
+
+
+def get_version(namespace):
+    """Возвращает текущую версию справочных данных.
+
+    Версия хранится REFERENCE_DATA_CACHE_TIMEOUT секунд: процесс, кеш
+    которого не получил изменение версии, заводит новую версию и
+    перечитывает данные из БД не позже чем через это время.
+    """
+    key = VERSION_KEY.format(namespace=namespace)
+    version = cache.get(key)
+    if version is not None:
+        return version
+    cache.add(
+        key, time.time_ns(), timeout=settings.REFERENCE_DATA_CACHE_TIMEOUT
+    )
+    return cache.get(key)
+
+
+def bump_version(namespace):
+    """Меняет версию справочных данных после их изменения."""
+    key = VERSION_KEY.format(namespace=namespace)
+    cache.set(
+        key, time.time_ns(), timeout=settings.REFERENCE_DATA_CACHE_TIMEOUT
+    )
+
+
+def has_validators(request):
+    """Прислал ли клиент условные заголовки запроса."""
+    return (
+        "If-None-Match" in request.headers
+        or "If-Modified-Since" in request.headers
+    )
+
+
+def is_not_modified(request, etag, last_modified=None):
+    """Проверяет условные заголовки запроса.
+
+    If-Modified-Since учитывается, только если клиент не прислал
+    If-None-Match.
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        etags = parse_etags(if_none_match)
+        return etag in etags or "*" in etags
+    if last_modified is None:
+        return False
+    if_modified_since = parse_http_date_safe(
+        request.headers.get("If-Modified-Since", "")
+    )
+    return (
+        if_modified_since is not None
+        and int(last_modified.timestamp()) <= if_modified_since
+    )
+
+
+def get_validator_headers(etag, last_modified=None):
+    """Заголовки валидаторов ответа."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified.timestamp())
+    return headers
+
+
+def get_recipes_etag(request, recipes, followed_author_ids, page_state=()):
+    """Вычисляет ETag для рецептов до их сериализации.
+
+    В ETag входят путь запроса, даты изменения рецептов, персональные
+    признаки пользователя, данные авторов, версии справочников тегов и
+    ингредиентов и для списка — общее число рецептов и ссылки на соседние
+    страницы.
+    """
+    state = [
+        request.get_full_path(),
+        request.accepted_renderer.format,
+        request.user.pk,
+        get_version("tags"),
+        get_version("ingredients"),
+        tuple(page_state),
+    ]
+    for recipe in recipes:
+        author = recipe.author
+        state.append(
+            (
+                recipe.pk,
+                recipe.updated_at.isoformat(),
+                recipe.is_favorited,
+                recipe.is_in_shopping_cart,
+                author.pk in followed_author_ids,
+                author.email,
+                author.username,
+                author.first_name,
+                author.last_name,
+            )
+        )
+    digest = hashlib.sha256(repr(state).encode()).hexdigest()[:32]
+    return f'"recipes-{digest}"'
+
+
+class ReferenceDataCacheMixin:
+    """Кеширование ответов справочных представлений с поддержкой ETag.
+
+    Ответ кешируется по версии данных, пути запроса и формату. Версия
+    меняется сигналами при изменении модели, поэтому запрос с актуальным
+    If-None-Match получает 304 без обращения к БД и сериализаторам.
+    """
+
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        """Список объектов из кеша."""
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Объект из кеша."""
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        """Возвращает 304, закешированный или новый ответ."""
+        version = get_version(self.cache_namespace)
+        digest = hashlib.sha256(
+            f"{request.get_full_path()}|{request.accepted_renderer.format}"
+            .encode()
+        ).hexdigest()[:32]
+        etag = f'"{self.cache_namespace}-{version}-{digest}"'
+        headers = get_validator_headers(etag)
+        if is_not_modified(request, etag):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+        key = DATA_KEY.format(
+            namespace=self.cache_namespace, version=version, digest=digest
+        )
+        data = cache.get(key)
+        if data is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            cache.set(
+                key, data, timeout=settings.REFERENCE_DATA_CACHE_TIMEOUT
+            )
+        return Response(data, headers=headers)
@@ -0,0 +1,149 @@
+"""Модуль полей сериализаторов API."""
+import io
+from collections import Counter, OrderedDict
+
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+from rest_framework import serializers
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.functional import cached_property
+
+
+def resolve_ids(field, queryset, ids):
+    """Загружает объекты по списку id одним запросом.
+
+    Отсутствующие и повторяющиеся id попадают в одну ошибку; объекты
+    возвращаются в порядке id.
+    """
+    objects = queryset.in_bulk(set(ids))
+    errors = []
+    missing = sorted(set(ids) - objects.keys())
+    if missing:
+        errors.append(
+            field.error_messages["does_not_exist"].format(
+                ids=", ".join(map(str, missing))
+            )
+        )
+    duplicates = sorted(pk for pk, count in Counter(ids).items() if count > 1)
+    if duplicates:
+        errors.append(
+            field.error_messages["duplicates"].format(
+                ids=", ".join(map(str, duplicates))
+            )
+        )
+    if errors:
+        raise serializers.ValidationError(errors)
+    return [objects[pk] for pk in ids]
+
+
+class BulkPrimaryKeyRelatedField(serializers.ListField):
+    """Список объектов по id, загружаемых одним запросом IN."""
+
+    default_error_messages = {
+        "does_not_exist": "Не найдены объекты с id: {ids}.",
+        "duplicates": "Повторяются id: {ids}.",
+    }
+
+    def __init__(self, queryset, **kwargs):
+        """Сохраняет набор объектов, среди которых ищутся id."""
+        self.queryset = queryset
+        super().__init__(child=serializers.IntegerField(), **kwargs)
+
+    def to_internal_value(self, data):
+        """Проверяет список id и заменяет их объектами."""
+        return resolve_ids(
+            self, self.queryset.all(), super().to_internal_value(data)
+        )
+
+    def to_representation(self, value):
+        """Список id связанных объектов."""
+        return [obj.pk for obj in value.all()]
+
+
+class LimitedBase64ImageField(Base64ImageField):
+    """Изображение в base64 с ограничением размера файла и числа пикселей.
+
+    Размер файла проверяется по длине строки до декодирования base64,
+    а размеры изображения — по его заголовку до декодирования пикселей.
+    """
+
+    default_error_messages = {
+        "too_large": "Размер изображения не должен превышать {max_bytes} Б.",
+        "too_many_pixels": (
+            "Изображение не должно содержать больше {max_pixels} пикселей."
+        ),
+    }
+
+    def to_internal_value(self, base64_data):
+        """Проверяет размер файла до декодирования."""
+        if isinstance(base64_data, str):
+            encoded = base64_data.rpartition(";base64,")[2]
+            if len(encoded) * 3 // 4 > settings.RECIPE_IMAGE_MAX_BYTES:
+                self.fail(
+                    "too_large", max_bytes=settings.RECIPE_IMAGE_MAX_BYTES
+                )
+        return super().to_internal_value(base64_data)
+
+    def get_file_extension(self, filename, decoded_file):
+        """Проверяет число пикселей по заголовку изображения."""
+        try:
+            width, height = Image.open(io.BytesIO(decoded_file)).size
+        except (OSError, Image.DecompressionBombError):
+            raise serializers.ValidationError(self.INVALID_FILE_MESSAGE)
+        if width * height > settings.RECIPE_IMAGE_MAX_PIXELS:
+            self.fail(
+                "too_many_pixels",
+                max_pixels=settings.RECIPE_IMAGE_MAX_PIXELS,
+            )
+        return super().get_file_extension(filename, decoded_file)
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """Ссылки на уменьшенные копии изображения рецепта.
+
+    Пока копии не созданы, возвращается пустой словарь.
+    """
+
+    def to_representation(self, value):
+        """Абсолютные ссылки на копии по их названиям."""
+        request = self.context.get("request")
+        urls = {}
+        for variant, name in value.items():
+            if variant == "source":
+                continue
+            url = default_storage.url(name)
+            urls[variant] = (
+                request.build_absolute_uri(url) if request else url
+            )
+        return urls
+
+
+class NestedJSONField(serializers.ReadOnlyField):
+    """Список вложенных объектов, собранных БД в JSON.
+
+    Ключи упорядочиваются как поля serializer_class, поэтому ответ совпадает
+    с ответом вложенного сериализатора с many=True.
+    """
+
+    def __init__(self, serializer_class, **kwargs):
+        """Запоминает сериализатор, порядок полей которого повторяется."""
+        self.serializer_class = serializer_class
+        super().__init__(**kwargs)
+
+    @cached_property
+    def field_names(self):
+        """Читаемые поля вложенного сериализатора по порядку."""
+        return [
+            name
+            for name, field in self.serializer_class().fields.items()
+            if not field.write_only
+        ]
+
+    def to_representation(self, value):
+        """Объекты с ключами в порядке полей сериализатора."""
+        return [
+            OrderedDict((name, item[name]) for name in self.field_names)
+            for item in value
+        ]
@@ -2,6 +2,7 @@
 from django_filters import rest_framework as django_filters
 
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
 
 from recipes.models import Ingredient, Recipe, Tag
 
@@ -34,6 +35,7 @@ class FavoriteAndShoppingCartFilter(django_filters.FilterSet):
         field_name="tags__slug",
         to_field_name="slug",
         queryset=Tag.objects.all(),
+        method="filter_tags",
     )
     author = django_filters.ModelChoiceFilter(queryset=User.objects.all())
     is_in_shopping_cart = django_filters.NumberFilter(method="get_queryset")
@@ -45,6 +47,22 @@ class FavoriteAndShoppingCartFilter(django_filters.FilterSet):
         model = Recipe
         fields = ["tags", "author", "is_favorited", "is_in_shopping_cart"]
 
+    def filter_tags(self, queryset, name, value):
+        """Рецепты с любым из тегов.
+
+        Подзапрос EXISTS вместо JOIN не размножает строки рецептов, поэтому
+        не нужен DISTINCT и сортировка может идти по индексу даты.
+        """
+        if not value:
+            return queryset
+        return queryset.filter(
+            Exists(
+                Recipe.tags.through.objects.filter(
+                    recipe=OuterRef("pk"), tag__in=value
+                )
+            )
+        )
+
     def get_queryset(self, queryset, name, value):
         """Определяет, какие объекты следует фильтровать."""
         if name == "is_in_shopping_cart":
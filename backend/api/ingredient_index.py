@@ -0,0 +1,97 @@
+"""Модуль поиска ингредиентов по названию в памяти процесса."""
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+from recipes.models import Ingredient
+
+from .caching import get_version
+
+
+def normalize(value):
+    """Приводит строку к виду для сравнения без учёта регистра и «ё»."""
+    return value.strip().casefold().replace("ё", "е")
+
+
+class IngredientIndex:
+    """Индекс названий ингредиентов.
+
+    Нормализованные названия хранятся в отсортированном списке: совпадения
+    по префиксу находятся бинарным поиском, совпадения по подстроке —
+    просмотром того же списка и выводятся после префиксных. Индекс
+    перестраивается при смене версии справочника ингредиентов.
+    """
+
+    def __init__(self):
+        """Создает пустой индекс, который построится при первом поиске."""
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def build(self):
+        """Загружает ингредиенты из БД и строит индекс."""
+        version = get_version("ingredients")
+        rows = sorted(
+            (normalize(name), name, measurement_unit, pk)
+            for pk, name, measurement_unit in Ingredient.objects.values_list(
+                "id", "name", "measurement_unit"
+            )
+        )
+        self._entries = (
+            version,
+            [row[0] for row in rows],
+            [
+                {"id": pk, "name": name, "measurement_unit": measurement_unit}
+                for _, name, measurement_unit, pk in rows
+            ],
+            time.monotonic(),
+        )
+        return self._entries
+
+    def invalidate(self):
+        """Помечает индекс устаревшим."""
+        self._entries = None
+
+    def is_stale(self, entries):
+        """Нужно ли перестроить индекс."""
+        return (
+            entries is None
+            or entries[0] != get_version("ingredients")
+            or time.monotonic() - entries[3] > settings.INGREDIENT_INDEX_TTL
+        )
+
+    def get_entries(self):
+        """Возвращает ключи и элементы, при необходимости перестраивая.
+
+        Устаревание проверяется ещё раз под блокировкой: потоки, ждавшие
+        её, пока индекс перестраивал другой поток, берут готовый индекс.
+        """
+        entries = self._entries
+        if self.is_stale(entries):
+            with self._lock:
+                entries = self._entries
+                if self.is_stale(entries):
+                    entries = self.build()
+        return entries[1], entries[2]
+
+    def search(self, query, limit=None):
+        """Ищет ингредиенты: сначала по префиксу, затем по подстроке."""
+        keys, items = self.get_entries()
+        query = normalize(query)
+        found = []
+        position = bisect_left(keys, query)
+        while position < len(keys) and keys[position].startswith(query):
+            if limit is not None and len(found) >= limit:
+                return found
+            found.append(items[position])
+            position += 1
+        for key, item in zip(keys, items):
+            if limit is not None and len(found) >= limit:
+                break
+            if query in key and not key.startswith(query):
+                found.append(item)
+        return found
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1 @@
+"""Пакет инициализации command."""
@@ -0,0 +1,167 @@
+"""Команда для поиска полных просмотров таблиц в запросах API."""
+import re
+
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.benchmark import benchmark_database
+from recipes.models import Recipe
+
+from .benchmark_api import ROUTES
+from .benchmark_api import Command as BenchmarkCommand
+
+
+AUDITED_ROUTES = ("users-", "recipes-")
+EXPLAINED_STATEMENTS = ("SELECT", "UPDATE", "DELETE")
+SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)$")
+SQLITE_TABLE = re.compile(r'(?:FROM|JOIN) "(\w+)"(?: (?:AS )?"?(\w+)"?)?')
+POSTGRESQL_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+def explain_sqlite(sql):
+    """План запроса SQLite и таблицы, просматриваемые целиком.
+
+    SQLite показывает чтение в порядке первичного ключа как SCAN, поэтому
+    просмотр таблицы при сортировке по её id без отдельной сортировки
+    полным не считается.
+    """
+    aliases = {}
+    for table, alias in SQLITE_TABLE.findall(sql):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        plan = [row[3] for row in cursor.fetchall()]
+    sorted_in_memory = any(line.startswith("USE TEMP B-TREE") for line in plan)
+    scans = set()
+    for line in plan:
+        match = SQLITE_SCAN.match(line)
+        if not match:
+            continue
+        table = aliases.get(match.group(1), match.group(1))
+        if sorted_in_memory or f'ORDER BY "{table}"."id"' not in sql:
+            scans.add(table)
+    return plan, scans
+
+
+def explain_postgresql(sql):
+    """План запроса PostgreSQL и таблицы, просматриваемые целиком.
+
+    Последовательное чтение запрещается на время EXPLAIN: на небольших
+    тестовых данных планировщик предпочитает его и при наличии индекса,
+    поэтому Seq Scan в плане означает, что подходящего индекса нет.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute(f"EXPLAIN {sql}")
+        plan = [row[0] for row in cursor.fetchall()]
+    scans = {
+        match.group(1)
+        for line in plan
+        for match in POSTGRESQL_SCAN.finditer(line)
+    }
+    return plan, scans
+
+
+EXPLAINERS = {
+    "sqlite": explain_sqlite,
+    "postgresql": explain_postgresql,
+}
+
+
+class Command(BaseCommand):
+    """Обработка команды."""
+
+    help = (
+        "Выполняет маршруты RecipeView и UserView на тестовых данных, "
+        "запускает EXPLAIN для их запросов и сообщает о полных просмотрах "
+        "таблиц."
+    )
+
+    def add_arguments(self, parser):
+        """Параметры аудита."""
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--recipes", type=int, default=2000)
+        parser.add_argument(
+            "--route",
+            action="append",
+            default=[],
+            help="Проверить только маршруты с этим префиксом имени.",
+        )
+        parser.add_argument(
+            "--allow-table",
+            action="append",
+            default=[],
+            help="Таблица, полный просмотр которой допустим.",
+        )
+        parser.add_argument(
+            "--strict",
+            action="store_true",
+            help="Завершиться ошибкой, если найдены полные просмотры.",
+        )
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        """Запуск аудита в отдельной тестовой БД."""
+        explain = EXPLAINERS.get(connection.vendor)
+        if explain is None:
+            raise CommandError(
+                f"EXPLAIN для {connection.vendor} не поддерживается."
+            )
+        prefixes = tuple(options["route"]) or AUDITED_ROUTES
+        with benchmark_database(options["keepdb"]):
+            if not Recipe.objects.exists():
+                call_command(
+                    "seed_data",
+                    users=options["users"],
+                    recipes=options["recipes"],
+                    stdout=self.stdout,
+                )
+            tables = set(connection.introspection.table_names())
+            tables -= set(options["allow_table"])
+            findings = []
+            for route, statements in self.collect_statements(prefixes):
+                for sql in statements:
+                    plan, scans = explain(sql)
+                    scans &= tables
+                    if options["verbosity"] > 1:
+                        self.stdout.write(f"{route}: {sql}")
+                        self.stdout.write("\n".join(f"  {p}" for p in plan))
+                    findings.extend((route, table, sql) for table in scans)
+        for route, table, sql in findings:
+            self.stdout.write(
+                self.style.WARNING(f"{route}: полный просмотр {table}")
+            )
+            self.stdout.write(f"  {sql}")
+        if not findings:
+            self.stdout.write(self.style.SUCCESS("Полных просмотров нет."))
+        elif options["strict"]:
+            raise CommandError(f"Полных просмотров: {len(findings)}")
+
+    @staticmethod
+    def collect_statements(prefixes):
+        """Выполняет маршруты и возвращает запросы выбранных маршрутов.
+
+        Выполняются все маршруты замера, так как изменяющие запросы идут
+        парами и готовят данные друг для друга. Одинаковые запросы
+        возвращаются один раз.
+        """
+        benchmark = BenchmarkCommand()
+        context = benchmark.build_context()
+        seen = set()
+        for route in ROUTES:
+            with CaptureQueriesContext(connection) as queries:
+                benchmark.call_route(route, context)
+            if not route.name.startswith(prefixes):
+                continue
+            statements = []
+            for query in queries.captured_queries:
+                sql = query["sql"]
+                if sql.lstrip().upper().startswith(EXPLAINED_STATEMENTS) and (
+                    sql not in seen
+                ):
+                    seen.add(sql)
+                    statements.append(sql)
+            yield route.name, statements
@@ -0,0 +1,514 @@
+"""Команда для замера запросов к БД и задержек всех маршрутов API."""
+import base64
+import os
+import time
+from collections import namedtuple
+from io import BytesIO
+
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from api.benchmark import (
+    benchmark_database, count_queries, read_report, summarize, write_report,
+)
+from recipes.counters import COUNTERS, reconcile
+from recipes.models import (
+    FavoriteRecipe, FeedEntry, Ingredient, Recipe, ShoppingListItem, Tag,
+)
+from users.models import Subscription, User
+
+from .seed_data import SEED_PASSWORD
+
+
+Route = namedtuple(
+    "Route",
+    [
+        "name",
+        "method",
+        "path",
+        "status",
+        "auth",
+        "data",
+        "store",
+        "revalidate",
+    ],
+    defaults=[200, "user", None, None, False],
+)
+
+
+def recipe_payload(context):
+    """Данные для создания и изменения рецепта."""
+    return {
+        "tags": context["tags"],
+        "ingredients": [
+            {"id": ingredient_id, "amount": 10}
+            for ingredient_id in context["ingredients"]
+        ],
+        "name": "Рецепт для замера",
+        "image": context["image"],
+        "text": "Описание рецепта.",
+        "cooking_time": 15,
+    }
+
+
+def amount_payload(context):
+    """Данные для изменения количества одного ингредиента рецепта."""
+    context["amount_changes"] = context.get("amount_changes", 0) + 1
+    ingredients = [
+        {"id": ingredient_id, "amount": 10}
+        for ingredient_id in context["ingredients"]
+    ]
+    ingredients[0]["amount"] += context["amount_changes"]
+    return {"ingredients": ingredients}
+
+
+def batch_payload(context):
+    """Рецепты недели для пакетных операций."""
+    return {"recipes": context["batch_recipes"]}
+
+
+def user_payload(context):
+    """Данные для регистрации пользователя."""
+    context["user_number"] = context.get("user_number", 0) + 1
+    return {
+        "email": f"benchmark_{context['user_number']}@example.com",
+        "username": f"benchmark_{context['user_number']}",
+        "first_name": "Имя",
+        "last_name": "Фамилия",
+        "password": SEED_PASSWORD,
+    }
+
+
+def password_payload(context):
+    """Данные для смены пароля на тот же самый."""
+    return {"current_password": SEED_PASSWORD, "new_password": SEED_PASSWORD}
+
+
+def login_payload(context):
+    """Данные для получения токена."""
+    return {"email": context["login_email"], "password": SEED_PASSWORD}
+
+
+# Маршруты выполняются по порядку, каждый изменяющий запрос идёт в паре
+# с обратным, чтобы данные не менялись от итерации к итерации.
+ROUTES = [
+    Route("api-root", "get", "/api/"),
+    Route("users-list", "get", "/api/users/"),
+    Route("users-list-limit-100", "get", "/api/users/?limit=100"),
+    Route(
+        "users-create",
+        "post",
+        "/api/users/",
+        status=201,
+        auth="anon",
+        data=user_payload,
+        store=("created_user", "id"),
+    ),
+    Route(
+        "users-destroy",
+        "delete",
+        "/api/users/{created_user}/",
+        status=204,
+        auth="admin",
+    ),
+    Route("users-detail", "get", "/api/users/{author}/"),
+    Route("users-me", "get", "/api/users/me/"),
+    Route(
+        "users-set-password",
+        "post",
+        "/api/users/set_password/",
+        status=204,
+        data=password_payload,
+    ),
+    Route(
+        "users-subscriptions",
+        "get",
+        "/api/users/subscriptions/?recipes_limit=3",
+    ),
+    Route(
+        "users-subscribe",
+        "post",
+        "/api/users/{unfollowed_author}/subscribe/",
+        status=201,
+    ),
+    Route(
+        "users-unsubscribe",
+        "delete",
+        "/api/users/{unfollowed_author}/subscribe/",
+        status=204,
+    ),
+    Route("tags-list", "get", "/api/tags/"),
+    Route("tags-detail", "get", "/api/tags/{tag}/"),
+    Route("ingredient-list", "get", "/api/ingredients/?name=аб"),
+    Route("ingredient-detail", "get", "/api/ingredients/{ingredient}/"),
+    Route("recipes-list", "get", "/api/recipes/"),
+    Route("recipes-list-limit-100", "get", "/api/recipes/?limit=100"),
+    Route("recipes-list-anonymous", "get", "/api/recipes/", auth="anon"),
+    Route("recipes-list-favorited", "get", "/api/recipes/?is_favorited=1"),
+    Route(
+        "recipes-list-in-cart",
+        "get",
+        "/api/recipes/?is_in_shopping_cart=1",
+    ),
+    Route("recipes-list-tags", "get", "/api/recipes/?tags={tag_slug}"),
+    Route(
+        "recipes-list-not-modified",
+        "get",
+        "/api/recipes/",
+        status=304,
+        revalidate=True,
+    ),
+    Route("recipes-detail", "get", "/api/recipes/{recipe}/"),
+    Route(
+        "recipes-detail-not-modified",
+        "get",
+        "/api/recipes/{recipe}/",
+        status=304,
+        revalidate=True,
+    ),
+    Route("recipes-feed", "get", "/api/recipes/feed/"),
+    Route(
+        "recipes-create",
+        "post",
+        "/api/recipes/",
+        status=201,
+        data=recipe_payload,
+        store=("created_recipe", "id"),
+    ),
+    Route(
+        "recipes-partial-update",
+        "patch",
+        "/api/recipes/{created_recipe}/",
+        data=recipe_payload,
+    ),
+    Route(
+        "recipes-partial-update-amount",
+        "patch",
+        "/api/recipes/{created_recipe}/",
+        data=amount_payload,
+    ),
+    Route(
+        "recipes-destroy",
+        "delete",
+        "/api/recipes/{created_recipe}/",
+        status=204,
+    ),
+    Route(
+        "recipes-favorite",
+        "post",
+        "/api/recipes/{recipe}/favorite/",
+        status=201,
+    ),
+    Route(
+        "recipes-favorite-delete",
+        "delete",
+        "/api/recipes/{recipe}/favorite/",
+        status=204,
+    ),
+    Route(
+        "recipes-shopping-cart",
+        "post",
+        "/api/recipes/{recipe}/shopping_cart/",
+        status=201,
+    ),
+    Route(
+        "recipes-shopping-cart-delete",
+        "delete",
+        "/api/recipes/{recipe}/shopping_cart/",
+        status=204,
+    ),
+    Route(
+        "recipes-favorite-batch-add",
+        "post",
+        "/api/recipes/favorite/add/",
+        data=batch_payload,
+    ),
+    Route(
+        "recipes-favorite-batch-remove",
+        "post",
+        "/api/recipes/favorite/remove/",
+        data=batch_payload,
+    ),
+    Route(
+        "recipes-shopping-cart-batch-add",
+        "post",
+        "/api/recipes/shopping_cart/add/",
+        auth="batch",
+        data=batch_payload,
+    ),
+    Route(
+        "recipes-shopping-cart-clear",
+        "post",
+        "/api/recipes/shopping_cart/clear/",
+        auth="batch",
+    ),
+    Route(
+        "recipes-download-shopping-cart",
+        "get",
+        "/api/recipes/download_shopping_cart/",
+    ),
+    Route(
+        "auth-token-login",
+        "post",
+        "/api/auth/token/login/",
+        auth="anon",
+        data=login_payload,
+        store=("login_token", "auth_token"),
+    ),
+    Route(
+        "auth-token-logout",
+        "post",
+        "/api/auth/token/logout/",
+        status=204,
+        auth="login",
+    ),
+]
+
+
+class Command(BaseCommand):
+    """Обработка команды."""
+
+    help = (
+        "Наполняет тестовую БД, замеряет все маршруты API и сравнивает "
+        "число запросов и задержки с базовым отчётом. Бюджеты запросов "
+        "проверяются тестами в tests/test_query_budgets.py."
+    )
+
+    def add_arguments(self, parser):
+        """Параметры замера."""
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--recipes", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--output", default="benchmark_report.json")
+        parser.add_argument("--baseline")
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help="Сохранить текущий отчёт как базовый.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.5,
+            help="Допустимый относительный рост p95 по сравнению с базовым.",
+        )
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        """Запуск замера в отдельной тестовой БД."""
+        with benchmark_database(options["keepdb"]):
+            if not Recipe.objects.exists():
+                call_command(
+                    "seed_data",
+                    users=options["users"],
+                    recipes=options["recipes"],
+                    stdout=self.stdout,
+                )
+            report = self.run_routes(options["repeat"])
+        report["dataset"] = {
+            "users": options["users"],
+            "recipes": options["recipes"],
+            "repeat": options["repeat"],
+        }
+        write_report(options["output"], report)
+        self.print_report(report)
+        failures = self.check_statuses(report)
+        if options["baseline"]:
+            if options["update_baseline"]:
+                write_report(options["baseline"], report)
+            elif os.path.exists(options["baseline"]):
+                failures += self.check_baseline(
+                    report,
+                    read_report(options["baseline"]),
+                    options["tolerance"],
+                )
+        if failures:
+            raise CommandError("\n".join(failures))
+        self.stdout.write(self.style.SUCCESS(f"Отчёт: {options['output']}"))
+
+    def build_context(self):
+        """Создает пользователей для замера и выбирает объекты маршрутов."""
+        user = User.objects.create_user(
+            email="benchmark@example.com",
+            username="benchmark",
+            first_name="Имя",
+            last_name="Фамилия",
+            password=SEED_PASSWORD,
+        )
+        login_user = User.objects.create_user(
+            email="benchmark_login@example.com",
+            username="benchmark_login",
+            first_name="Имя",
+            last_name="Фамилия",
+            password=SEED_PASSWORD,
+        )
+        batch_user = User.objects.create_user(
+            email="benchmark_batch@example.com",
+            username="benchmark_batch",
+            first_name="Имя",
+            last_name="Фамилия",
+            password=SEED_PASSWORD,
+        )
+        admin = User.objects.create_superuser(
+            email="benchmark_admin@example.com",
+            username="benchmark_admin",
+            first_name="Имя",
+            last_name="Фамилия",
+            password=SEED_PASSWORD,
+        )
+        recipes = list(Recipe.objects.values_list("id", "author_id")[:40])
+        authors = list(dict.fromkeys(author_id for _, author_id in recipes))
+        Subscription.objects.bulk_create(
+            Subscription(follower=user, author_id=author_id)
+            for author_id in authors[1:9]
+        )
+        FavoriteRecipe.objects.bulk_create(
+            FavoriteRecipe(user=user, recipe_id=recipe_id)
+            for recipe_id, _ in recipes[1:16]
+        )
+        user.shopping_cart.bulk_create(
+            user.shopping_cart.model(user=user, recipe_id=recipe_id)
+            for recipe_id, _ in recipes[10:20]
+        )
+        ShoppingListItem.objects.rebuild([user.pk])
+        for counter in COUNTERS.values():
+            reconcile(counter)
+        FeedEntry.objects.rebuild([user.pk])
+        tag = Tag.objects.first()
+        image = BytesIO()
+        Image.new("RGB", (64, 64), "white").save(image, "PNG")
+        return {
+            "user_token": Token.objects.create(user=user).key,
+            "batch_token": Token.objects.create(user=batch_user).key,
+            "admin_token": Token.objects.create(user=admin).key,
+            "batch_recipes": [recipe_id for recipe_id, _ in recipes[20:27]],
+            "login_email": login_user.email,
+            "recipe": recipes[0][0],
+            "author": authors[0],
+            "unfollowed_author": authors[0],
+            "tag": tag.id,
+            "tag_slug": tag.slug,
+            "tags": list(Tag.objects.values_list("id", flat=True)[:2]),
+            "ingredient": Ingredient.objects.first().id,
+            "ingredients": list(
+                Ingredient.objects.values_list("id", flat=True)[:5]
+            ),
+            "image": "data:image/png;base64,"
+            + base64.b64encode(image.getvalue()).decode(),
+            "etags": {},
+        }
+
+    def call_route(self, route, context):
+        """Выполняет запрос маршрута и возвращает время, запросы и ответ."""
+        headers = {}
+        path = route.path.format(**context)
+        if route.auth != "anon":
+            token = context[f"{route.auth}_token"]
+            headers["HTTP_AUTHORIZATION"] = f"Token {token}"
+        if route.revalidate:
+            headers["HTTP_IF_NONE_MATCH"] = context["etags"][route.auth, path]
+        client = Client(raise_request_exception=False, **headers)
+        kwargs = {}
+        if route.data is not None:
+            kwargs = {
+                "data": route.data(context),
+                "content_type": "application/json",
+            }
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, route.method)(path, **kwargs)
+            content = (
+                b"".join(response.streaming_content)
+                if response.streaming
+                else response.content
+            )
+            elapsed = time.perf_counter() - started
+        if response.has_header("ETag"):
+            context["etags"][route.auth, path] = response["ETag"]
+        if route.store and response.status_code == route.status:
+            key, field = route.store
+            context[key] = response.json()[field]
+        return (
+            elapsed,
+            count_queries(queries),
+            response.status_code,
+            len(content),
+        )
+
+    def run_routes(self, repeat):
+        """Выполняет все маршруты repeat раз после прогревочного прохода.
+
+        Прогревочный проход заполняет кеши процесса и в число запросов
+        и задержки не входит.
+        """
+        context = self.build_context()
+        samples = {route.name: [] for route in ROUTES}
+        results = {}
+        for iteration in range(repeat + 1):
+            for route in ROUTES:
+                elapsed, queries, status, size = self.call_route(
+                    route, context
+                )
+                result = results.setdefault(
+                    route.name,
+                    {
+                        "method": route.method.upper(),
+                        "path": route.path,
+                        "queries": 0,
+                        "statuses": [],
+                    },
+                )
+                result["response_bytes"] = size
+                if status not in result["statuses"]:
+                    result["statuses"].append(status)
+                if iteration:
+                    result["queries"] = max(result["queries"], queries)
+                    samples[route.name].append(elapsed)
+        for route in ROUTES:
+            results[route.name]["expected_status"] = route.status
+            results[route.name].update(summarize(samples[route.name]))
+        return {"routes": results}
+
+    def print_report(self, report):
+        """Выводит сводную таблицу."""
+        self.stdout.write(
+            f"{'маршрут':<32} {'запросы':>8} {'p50, мс':>9} {'p95, мс':>9}"
+        )
+        for name, result in report["routes"].items():
+            self.stdout.write(
+                f"{name:<32} {result['queries']:>8} "
+                f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f}"
+            )
+
+    def check_statuses(self, report):
+        """Проверяет статусы ответов маршрутов."""
+        return [
+            f"{name}: статусы {result['statuses']}, "
+            f"ожидался {result['expected_status']}"
+            for name, result in report["routes"].items()
+            if result["statuses"] != [result["expected_status"]]
+        ]
+
+    def check_baseline(self, report, baseline, tolerance):
+        """Сравнивает отчёт с базовым."""
+        failures = []
+        for name, result in report["routes"].items():
+            base = baseline["routes"].get(name)
+            if base is None:
+                continue
+            if result["queries"] > base["queries"]:
+                failures.append(
+                    f"{name}: запросов стало {result['queries']}, "
+                    f"было {base['queries']}"
+                )
+            if result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                failures.append(
+                    f"{name}: p95 {result['p95_ms']:.2f} мс, "
+                    f"было {base['p95_ms']:.2f} мс"
+                )
+        return failures
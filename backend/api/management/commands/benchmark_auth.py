@@ -0,0 +1,73 @@
+"""Команда для сравнения аутентификации по токену с кешем и без него."""
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from django.core.cache import cache
+from django.core.management import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.authentication import CachedTokenAuthentication
+from api.benchmark import benchmark_database, measure, write_report
+from users.models import User
+
+
+AUTHENTICATORS = {
+    "token": TokenAuthentication,
+    "cached-token": CachedTokenAuthentication,
+}
+
+
+class Command(BaseCommand):
+    """Обработка команды."""
+
+    help = (
+        "Замеряет время и число запросов к БД на аутентификацию одного "
+        "запроса стандартным и кеширующим классом."
+    )
+
+    def add_arguments(self, parser):
+        """Параметры замера."""
+        parser.add_argument("--repeat", type=int, default=1000)
+        parser.add_argument("--output")
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        """Запуск замера в отдельной тестовой БД."""
+        with benchmark_database(options["keepdb"]):
+            user, _ = User.objects.get_or_create(
+                email="benchmark-auth@example.com",
+                defaults={"username": "benchmark-auth"},
+            )
+            token, _ = Token.objects.get_or_create(user=user)
+            cache.clear()
+            report = {
+                name: self.measure(authenticator(), token, options["repeat"])
+                for name, authenticator in AUTHENTICATORS.items()
+            }
+        self.stdout.write(
+            f"{'класс':<16} {'запросы':>8} {'p50, мс':>9} {'p95, мс':>9}"
+        )
+        for name, result in report.items():
+            self.stdout.write(
+                f"{name:<16} {result['queries']:>8.2f} "
+                f"{result['p50_ms']:>9.3f} {result['p95_ms']:>9.3f}"
+            )
+        if options["output"]:
+            write_report(options["output"], report)
+
+    @staticmethod
+    def measure(authenticator, token, repeat):
+        """Среднее число запросов и время аутентификации одного запроса."""
+        request = Request(
+            APIRequestFactory().get(
+                "/api/users/me/", HTTP_AUTHORIZATION=f"Token {token.key}"
+            )
+        )
+        with CaptureQueriesContext(connection) as queries:
+            timings = measure(
+                lambda: authenticator.authenticate(request), repeat
+            )
+        return {"queries": len(queries) / repeat, **timings}
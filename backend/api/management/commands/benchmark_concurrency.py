@@ -0,0 +1,222 @@
+"""Команда для сравнения пропускной способности WSGI и ASGI."""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from rest_framework.authtoken.models import Token
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from api.benchmark import summarize, write_report
+from recipes.models import Recipe, ShoppingCart
+
+
+PATHS = (
+    "/api/tags/",
+    "/api/ingredients/?name=%D0%B0%D0%B1",
+    "/api/recipes/",
+    "/api/recipes/{recipe}/",
+    "/api/recipes/download_shopping_cart/",
+)
+
+SERVERS = {
+    "wsgi": ["foodgram.wsgi:application"],
+    "asgi": [
+        "foodgram.asgi:application",
+        "--worker-class",
+        "uvicorn.workers.UvicornWorker",
+    ],
+}
+
+
+def get_free_port():
+    """Свободный порт на локальном интерфейсе."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def fetch(port, path, token):
+    """Выполняет GET-запрос в отдельном соединении и возвращает статус."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: 127.0.0.1:{port}\r\n"
+            f"Authorization: Token {token}\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode()
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return int(response.split(b" ", 2)[1])
+
+
+async def hold_connection(port, delay, stop):
+    """Медленный клиент: передаёт заголовки запроса с паузой.
+
+    Пока заголовки не получены полностью, синхронный воркер ждёт их и не
+    обслуживает другие соединения.
+    """
+    while not stop.is_set():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {PATHS[0]} HTTP/1.1\r\n".encode())
+        await writer.drain()
+        await asyncio.sleep(delay)
+        writer.write(
+            f"Host: 127.0.0.1:{port}\r\nConnection: close\r\n\r\n".encode()
+        )
+        await writer.drain()
+        await reader.read()
+        writer.close()
+        await writer.wait_closed()
+
+
+class Command(BaseCommand):
+    """Обработка команды."""
+
+    help = (
+        "Запускает проект под gunicorn с синхронными воркерами (WSGI) и с "
+        "воркерами uvicorn (ASGI), выполняет запросы к нагруженным "
+        "маршрутам чтения через заданное число одновременных соединений и "
+        "сравнивает пропускную способность. Использует текущую БД, которую "
+        "нужно заранее заполнить командой seed_data."
+    )
+
+    def add_arguments(self, parser):
+        """Параметры замера."""
+        parser.add_argument("--connections", type=int, default=64)
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=2,
+            help="Число процессов каждого сервера.",
+        )
+        parser.add_argument(
+            "--slow-clients",
+            type=int,
+            default=0,
+            help="Число медленных клиентов, занимающих соединения.",
+        )
+        parser.add_argument(
+            "--slow-delay",
+            type=float,
+            default=0.5,
+            help="Пауза медленного клиента внутри заголовков, с.",
+        )
+        parser.add_argument(
+            "--server",
+            action="append",
+            choices=SERVERS,
+            help="Замерить только этот сервер.",
+        )
+        parser.add_argument("--output")
+
+    def handle(self, *args, **options):
+        """Запуск серверов и замер."""
+        user_id = (
+            ShoppingCart.objects.values_list("user_id", flat=True).first()
+        )
+        recipe = Recipe.objects.values_list("id", flat=True).first()
+        if user_id is None or recipe is None:
+            raise CommandError("Заполните БД командой seed_data.")
+        token = Token.objects.get_or_create(user_id=user_id)[0].key
+        paths = [path.format(recipe=recipe) for path in PATHS]
+        report = {path: {} for path in paths}
+        for server in options["server"] or SERVERS:
+            port = get_free_port()
+            process = self.start_server(server, port, options["workers"])
+            try:
+                self.wait_ready(port, token)
+                for path in paths:
+                    report[path][server] = asyncio.run(
+                        self.measure(port, path, token, options)
+                    )
+            finally:
+                process.terminate()
+                process.wait()
+        self.stdout.write(
+            f"{'маршрут':<40} {'сервер':<6} {'запр/с':>8} "
+            f"{'p50, мс':>9} {'p95, мс':>9}"
+        )
+        for path, servers in report.items():
+            for server, result in servers.items():
+                self.stdout.write(
+                    f"{path:<40} {server:<6} {result['rps']:>8.1f} "
+                    f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f}"
+                )
+        if options["output"]:
+            write_report(options["output"], report)
+
+    @staticmethod
+    def start_server(server, port, workers):
+        """Запускает gunicorn с приложением WSGI или ASGI."""
+        return subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "gunicorn",
+                *SERVERS[server],
+                "--bind",
+                f"127.0.0.1:{port}",
+                "--workers",
+                str(workers),
+                "--log-level",
+                "warning",
+            ],
+            cwd=settings.BASE_DIR,
+            env=os.environ.copy(),
+        )
+
+    @staticmethod
+    def wait_ready(port, token, timeout=30):
+        """Ждёт, пока сервер начнёт отвечать."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                status = asyncio.run(fetch(port, PATHS[0], token))
+            except OSError:
+                status = None
+            if status == 200:
+                return
+            if time.monotonic() > deadline:
+                raise CommandError(f"Сервер на порту {port} не запустился.")
+            time.sleep(0.2)
+
+    @staticmethod
+    async def measure(port, path, token, options):
+        """Замеряет запросы к пути через одновременные соединения."""
+        samples = []
+        statuses = set()
+        requests = iter(range(options["requests"]))
+
+        async def connection():
+            for _ in requests:
+                started = time.perf_counter()
+                statuses.add(await fetch(port, path, token))
+                samples.append(time.perf_counter() - started)
+
+        stop = asyncio.Event()
+        slow = [
+            asyncio.ensure_future(
+                hold_connection(port, options["slow_delay"], stop)
+            )
+            for _ in range(options["slow_clients"])
+        ]
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(connection() for _ in range(options["connections"]))
+        )
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*slow)
+        if statuses != {200}:
+            raise CommandError(f"{path}: статусы {sorted(statuses)}")
+        return {"rps": len(samples) / elapsed, **summarize(samples)}
@@ -0,0 +1,73 @@
+"""Команда для сравнения поиска ингредиентов через индекс и через ORM."""
+from django.core.management import BaseCommand, call_command
+
+from api.benchmark import benchmark_database, measure, write_report
+from api.filters import IngredientFilter
+from api.ingredient_index import ingredient_index
+from api.serializers import IngredientSerializer
+from recipes.models import Ingredient
+
+
+DEFAULT_QUERIES = ["а", "мо", "сах", "соль", "ябл", "масло", "ёж"]
+
+
+class Command(BaseCommand):
+    """Обработка команды."""
+
+    help = (
+        "Сравнивает поиск ингредиентов по индексу в памяти с фильтром "
+        "name__icontains через ORM."
+    )
+
+    def add_arguments(self, parser):
+        """Параметры замера."""
+        parser.add_argument("queries", nargs="*", default=DEFAULT_QUERIES)
+        parser.add_argument("--repeat", type=int, default=200)
+        parser.add_argument("--limit", type=int)
+        parser.add_argument("--output")
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        """Запуск замера в отдельной тестовой БД."""
+        with benchmark_database(options["keepdb"]):
+            if not Ingredient.objects.exists():
+                call_command("import_ingredients", stdout=self.stdout)
+            ingredient_index.build()
+            report = {
+                query: self.compare(query, options["repeat"], options["limit"])
+                for query in options["queries"]
+            }
+        self.stdout.write(
+            f"{'запрос':<10} {'найдено':>8} {'ORM p50':>9} {'ORM p95':>9} "
+            f"{'индекс p50':>11} {'индекс p95':>11}"
+        )
+        for query, result in report.items():
+            self.stdout.write(
+                f"{query:<10} {result['found']:>8} "
+                f"{result['orm']['p50_ms']:>9.3f} "
+                f"{result['orm']['p95_ms']:>9.3f} "
+                f"{result['index']['p50_ms']:>11.3f} "
+                f"{result['index']['p95_ms']:>11.3f}"
+            )
+        if options["output"]:
+            write_report(options["output"], report)
+
+    @staticmethod
+    def compare(query, repeat, limit):
+        """Замеряет оба способа поиска для одного запроса."""
+        queryset = Ingredient.objects.all()
+
+        def search_orm():
+            found = IngredientFilter({"name": query}, queryset=queryset).qs
+            if limit:
+                found = found[:limit]
+            return IngredientSerializer(found, many=True).data
+
+        def search_index():
+            return ingredient_index.search(query, limit)
+
+        return {
+            "found": len(search_index()),
+            "orm": measure(search_orm, repeat),
+            "index": measure(search_index, repeat),
+        }
@@ -0,0 +1,157 @@
+"""Команда для сравнения стандартных и быстрых JSON-рендерера и парсера."""
+import base64
+import io
+import os
+from decimal import Decimal
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from django.core.management import BaseCommand, CommandError, call_command
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+
+from api.benchmark import benchmark_database, measure, write_report
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import RecipeJSONSerializer
+from recipes.models import Ingredient, Recipe, Tag
+
+
+IMPLEMENTATIONS = {
+    "stdlib": (JSONRenderer, JSONParser),
+    "fast": (FastJSONRenderer, FastJSONParser),
+}
+
+# Значения, которые orjson не сериализует сам или сериализует иначе.
+SPECIAL_VALUES = {
+    "decimal": Decimal("12.50"),
+    "datetime": timezone.now(),
+    "date": timezone.now().date(),
+    "lazy": gettext_lazy("Рецепт"),
+    "separators": "строка\u2028с\u2029разделителями",
+    1: "нестроковый ключ",
+}
+
+
+class Command(BaseCommand):
+    """Обработка команды."""
+
+    help = (
+        "Замеряет сериализацию и разбор JSON страницы рецептов и тела "
+        "запроса с изображением стандартными классами DRF и классами на "
+        "orjson и проверяет, что результаты совпадают."
+    )
+
+    def add_arguments(self, parser):
+        """Параметры замера."""
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument(
+            "--upload-mb",
+            type=float,
+            default=5,
+            help="Размер тела запроса с изображением, МБ.",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--output")
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        """Запуск замера."""
+        if orjson is None:
+            self.stdout.write(
+                self.style.WARNING(
+                    "orjson не установлен: быстрые классы используют json."
+                )
+            )
+        with benchmark_database(options["keepdb"]):
+            if not Recipe.objects.exists():
+                call_command(
+                    "seed_data", users=20, recipes=200, stdout=self.stdout
+                )
+            payloads = {
+                "recipe-page": self.get_page(options["page_size"]),
+                "upload": self.get_upload(options["upload_mb"]),
+            }
+        self.check_special_values()
+        report = {}
+        for payload, data in payloads.items():
+            content = JSONRenderer().render(data)
+            for name, (renderer, parser) in IMPLEMENTATIONS.items():
+                self.check_round_trip(name, payload, data, content)
+                report[f"{payload}-render-{name}"] = measure(
+                    lambda: renderer().render(data), options["repeat"]
+                )
+                report[f"{payload}-parse-{name}"] = measure(
+                    lambda: parser().parse(io.BytesIO(content)),
+                    options["repeat"],
+                )
+            report[f"{payload}-bytes"] = len(content)
+        self.stdout.write(f"{'замер':<32} {'p50, мс':>9} {'p95, мс':>9}")
+        for name, result in report.items():
+            if isinstance(result, dict):
+                self.stdout.write(
+                    f"{name:<32} {result['p50_ms']:>9.3f} "
+                    f"{result['p95_ms']:>9.3f}"
+                )
+        if options["output"]:
+            write_report(options["output"], report)
+
+    @staticmethod
+    def get_page(page_size):
+        """Данные страницы рецептов в том виде, в каком их рендерит API."""
+        request = Request(APIRequestFactory().get("/api/recipes/"))
+        recipes = (
+            Recipe.objects.with_user_flags(request.user)
+            .select_related("author")
+            .with_related_json()
+            .order_by("-pub_date", "-id")[:page_size]
+        )
+        return {
+            "count": Recipe.objects.count(),
+            "next": None,
+            "previous": None,
+            "results": RecipeJSONSerializer(
+                recipes, many=True, context={"request": request}
+            ).data,
+        }
+
+    @staticmethod
+    def get_upload(size_mb):
+        """Тело запроса создания рецепта с изображением в base64."""
+        size = int(size_mb * 1024 * 1024 * 3 / 4)
+        image = base64.b64encode(os.urandom(size))
+        return {
+            "tags": list(Tag.objects.values_list("id", flat=True)[:2]),
+            "ingredients": [
+                {"id": ingredient_id, "amount": 10}
+                for ingredient_id in Ingredient.objects.values_list(
+                    "id", flat=True
+                )[:10]
+            ],
+            "name": "Рецепт для замера",
+            "image": "data:image/png;base64," + image.decode(),
+            "text": "Описание рецепта.",
+            "cooking_time": 15,
+        }
+
+    @staticmethod
+    def check_special_values():
+        """Сверяет рендеринг значений, требующих преобразования."""
+        expected = JSONRenderer().render(SPECIAL_VALUES)
+        actual = FastJSONRenderer().render(SPECIAL_VALUES)
+        if actual != expected:
+            raise CommandError(f"Рендеринг различается: {actual!r}")
+
+    @staticmethod
+    def check_round_trip(name, payload, data, content):
+        """Сверяет рендеринг и разбор с результатом стандартных классов."""
+        renderer, parser = IMPLEMENTATIONS[name]
+        if renderer().render(data) != content:
+            raise CommandError(f"{name}: рендеринг {payload} различается.")
+        if parser().parse(io.BytesIO(content)) != JSONParser().parse(
+            io.BytesIO(content)
+        ):
+            raise CommandError(f"{name}: разбор {payload} различается.")
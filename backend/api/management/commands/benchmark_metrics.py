@@ -0,0 +1,142 @@
+"""Команда для замера накладных расходов замеров запросов."""
+import time
+
+from rest_framework.authtoken.models import Token
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import connection
+from django.test import Client, override_settings
+
+from api.benchmark import benchmark_database, summarize, write_report
+from foodgram.metrics import record_query
+from recipes.models import Recipe, ShoppingCart
+from users.models import User
+
+
+PATHS = (
+    "/api/tags/",
+    "/api/recipes/",
+    "/api/recipes/?limit=100",
+    "/api/recipes/{recipe}/",
+    "/api/users/subscriptions/",
+)
+MIDDLEWARE = "foodgram.middleware.PerformanceMiddleware"
+
+
+class Command(BaseCommand):
+    """Обработка команды."""
+
+    help = (
+        "Выполняет маршруты API в тестовой БД с замерами запросов и без "
+        "них, чередуя запросы, и сравнивает задержки. Проверяет, что ответ "
+        "содержит заголовок Server-Timing, а /api/metrics/ отдаёт "
+        "гистограммы этих маршрутов."
+    )
+
+    def add_arguments(self, parser):
+        """Параметры замера."""
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--recipes", type=int, default=200)
+        parser.add_argument("--repeat", type=int, default=200)
+        parser.add_argument("--output")
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        """Запуск замера в отдельной тестовой БД."""
+        with benchmark_database(options["keepdb"]):
+            if not Recipe.objects.exists():
+                call_command(
+                    "seed_data",
+                    users=options["users"],
+                    recipes=options["recipes"],
+                    stdout=self.stdout,
+                )
+            report = self.run_paths(options["repeat"])
+        self.stdout.write(
+            f"{'маршрут':<28} {'с замерами':>11} {'без них':>9} "
+            f"{'разница, мкс':>13}"
+        )
+        for path, result in report.items():
+            self.stdout.write(
+                f"{path:<28} {result['on']['p50_ms']:>11.3f} "
+                f"{result['off']['p50_ms']:>9.3f} "
+                f"{result['overhead_us']:>13.1f}"
+            )
+        if options["output"]:
+            write_report(options["output"], report)
+
+    def run_paths(self, repeat):
+        """Замеряет маршруты с замерами и без них, чередуя запросы."""
+        user = ShoppingCart.objects.values_list("user", flat=True).first()
+        token = Token.objects.get_or_create(user_id=user)[0].key
+        recipe = Recipe.objects.values_list("id", flat=True).first()
+        staff = User.objects.create_user(
+            email="benchmark_staff@example.com",
+            username="benchmark_staff",
+            is_staff=True,
+        )
+        staff_token = Token.objects.create(user=staff).key
+        clients = {
+            "on": Client(HTTP_AUTHORIZATION=f"Token {token}"),
+            "off": Client(HTTP_AUTHORIZATION=f"Token {token}"),
+        }
+        without_metrics = [
+            name for name in settings.MIDDLEWARE if name != MIDDLEWARE
+        ]
+        report = {}
+        for template in PATHS:
+            path = template.format(recipe=recipe)
+            samples = {"on": [], "off": []}
+            for iteration in range(repeat + 1):
+                for mode, client in clients.items():
+                    elapsed, response = self.call(
+                        client, path, mode == "off", without_metrics
+                    )
+                    if response.status_code != 200:
+                        raise CommandError(
+                            f"{path}: статус {response.status_code}"
+                        )
+                    if response.has_header("Server-Timing") != (
+                        mode == "on"
+                    ):
+                        raise CommandError(f"{path}: заголовок Server-Timing")
+                    if iteration:
+                        samples[mode].append(elapsed)
+            on, off = summarize(samples["on"]), summarize(samples["off"])
+            report[path] = {
+                "on": on,
+                "off": off,
+                "overhead_us": round((on["p50_ms"] - off["p50_ms"]) * 1000, 1),
+            }
+        metrics = (
+            Client(HTTP_AUTHORIZATION=f"Token {staff_token}")
+            .get("/api/metrics/")
+            .content.decode()
+        )
+        if 'route="api:recipe-list"' not in metrics:
+            raise CommandError("/api/metrics/ не содержит маршрутов.")
+        return report
+
+    @staticmethod
+    def call(client, path, disabled, middleware):
+        """Выполняет запрос и возвращает его время и ответ.
+
+        С disabled запрос выполняется без промежуточного обработчика
+        замеров и без обёртки запросов к БД.
+        """
+        if not disabled:
+            started = time.perf_counter()
+            response = client.get(path)
+            return time.perf_counter() - started, response
+        wrappers = connection.execute_wrappers
+        connection.execute_wrappers = [
+            wrapper for wrapper in wrappers if wrapper is not record_query
+        ]
+        try:
+            with override_settings(MIDDLEWARE=middleware):
+                started = time.perf_counter()
+                response = client.get(path)
+                return time.perf_counter() - started, response
+        finally:
+            connection.execute_wrappers = wrappers
@@ -0,0 +1,143 @@
+"""Команда для сравнения постраничной и курсорной пагинации рецептов."""
+import math
+import time
+from urllib.parse import urlencode
+
+from rest_framework.authtoken.models import Token
+from rest_framework.pagination import Cursor
+
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from api.benchmark import benchmark_database, summarize, write_report
+from api.pagination import RecipeCursorPagination
+from recipes.models import FavoriteRecipe, Recipe, Tag
+
+
+class Command(BaseCommand):
+    """Обработка команды."""
+
+    help = (
+        "Замеряет первую и дальнюю страницу списка рецептов при постраничной "
+        "и курсорной пагинации, в том числе вместе с фильтрами."
+    )
+
+    def add_arguments(self, parser):
+        """Параметры замера."""
+        parser.add_argument("--depth", type=int, default=10000)
+        parser.add_argument("--limit", type=int, default=6)
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--output")
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        """Запуск замера в отдельной тестовой БД."""
+        recipes = options["depth"] * options["limit"]
+        with benchmark_database(options["keepdb"]):
+            if Recipe.objects.count() < recipes:
+                call_command(
+                    "seed_data",
+                    users=options["users"],
+                    recipes=recipes,
+                    stdout=self.stdout,
+                )
+            report = self.run_scenarios(
+                options["depth"], options["limit"], options["repeat"]
+            )
+        self.stdout.write(
+            f"{'сценарий':<32} {'страница':>9} {'запросы':>8} "
+            f"{'p50, мс':>9} {'p95, мс':>9}"
+        )
+        for name, result in report.items():
+            self.stdout.write(
+                f"{name:<32} {result['page']:>9} {result['queries']:>8} "
+                f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f}"
+            )
+        if options["output"]:
+            write_report(options["output"], report)
+
+    def run_scenarios(self, depth, limit, repeat):
+        """Замеряет все сценарии фильтрации для обоих способов пагинации."""
+        user_id = FavoriteRecipe.objects.values_list("user_id", flat=True)[0]
+        token = Token.objects.get_or_create(user_id=user_id)[0].key
+        client = Client(HTTP_AUTHORIZATION=f"Token {token}")
+        scenarios = {
+            "all": {},
+            "tags": {"tags": Tag.objects.first().slug},
+            "author": {"author": Recipe.objects.first().author_id},
+            "favorited": {"is_favorited": 1},
+            "in-cart": {"is_in_shopping_cart": 1},
+        }
+        report = {}
+        for name, params in scenarios.items():
+            params = {**params, "limit": limit}
+            count = client.get("/api/recipes/", params).json()["count"]
+            deep = max(min(depth, math.ceil(count / limit)), 1)
+            for page in sorted({1, deep}):
+                page_path = self.get_page_path(params, page)
+                cursor_path = self.get_cursor_path(
+                    params, self.get_cursor(client, params, page)
+                )
+                page_ids = self.get_ids(client, page_path)
+                if self.get_ids(client, cursor_path) != page_ids:
+                    raise CommandError(
+                        f"{name}: страница {page} отличается при курсорной "
+                        "пагинации"
+                    )
+                paths = {"page": page_path, "cursor": cursor_path}
+                for mode, path in paths.items():
+                    report[f"{name}-{mode}-{page}"] = {
+                        "page": page,
+                        "path": path,
+                        **self.measure(client, path, repeat),
+                    }
+        return report
+
+    @staticmethod
+    def get_ids(client, path):
+        """Идентификаторы рецептов на странице."""
+        return [recipe["id"] for recipe in client.get(path).json()["results"]]
+
+    def get_cursor(self, client, params, page):
+        """Курсор, указывающий на начало страницы page."""
+        if page == 1:
+            return None
+        previous = self.get_ids(client, self.get_page_path(params, page - 1))
+        return Cursor(
+            offset=0,
+            reverse=False,
+            position=str(Recipe.objects.get(pk=previous[-1]).pub_date),
+        )
+
+    @staticmethod
+    def get_page_path(params, page):
+        """Путь к странице постраничной пагинации."""
+        return f"/api/recipes/?{urlencode({**params, 'page': page})}"
+
+    @staticmethod
+    def get_cursor_path(params, cursor):
+        """Путь к странице курсорной пагинации."""
+        paginator = RecipeCursorPagination()
+        paginator.base_url = (
+            f"/api/recipes/?{urlencode({**params, 'pagination': 'cursor'})}"
+        )
+        if cursor is None:
+            return paginator.base_url
+        return paginator.encode_cursor(cursor)
+
+    @staticmethod
+    def measure(client, path, repeat):
+        """Замеряет время и число запросов к БД для пути."""
+        client.get(path)
+        samples = []
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                response = client.get(path)
+                samples.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise CommandError(f"{path}: статус {response.status_code}")
+        return {"queries": len(queries) // repeat, **summarize(samples)}
@@ -0,0 +1,136 @@
+"""Команда для сравнения загрузки рецептов через prefetch и JSON из БД."""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.benchmark import benchmark_database, measure, write_report
+from api.serializers import RecipeFullSerializer, RecipeJSONSerializer
+from api.views import RecipeView
+from recipes.models import Recipe
+from users.models import User
+
+
+def load_prefetched(user):
+    """Рецепты с тегами и ингредиентами через prefetch_related."""
+    return (
+        Recipe.objects.with_user_flags(user)
+        .select_related("author")
+        .prefetch_related(*RecipeView.prefetch_lookups)
+    )
+
+
+def load_json(user):
+    """Рецепты с тегами и ингредиентами из JSON-подзапросов."""
+    return (
+        Recipe.objects.with_user_flags(user)
+        .select_related("author")
+        .with_related_json()
+    )
+
+
+LOADERS = {
+    "prefetch": (load_prefetched, RecipeFullSerializer),
+    "json": (load_json, RecipeJSONSerializer),
+}
+
+
+class Command(BaseCommand):
+    """Обработка команды."""
+
+    help = (
+        "Сравнивает загрузку страницы рецептов с тегами, ингредиентами и "
+        "автором через prefetch_related и одним запросом с JSON-агрегацией "
+        "в БД и проверяет, что ответы обоих способов совпадают побайтно."
+    )
+
+    def add_arguments(self, parser):
+        """Параметры замера."""
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("--output")
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        """Запуск замера в отдельной тестовой БД."""
+        with benchmark_database(options["keepdb"]):
+            if not Recipe.objects.exists():
+                call_command(
+                    "seed_data", users=20, recipes=200, stdout=self.stdout
+                )
+            user = (
+                User.objects.filter(following__isnull=False)
+                .order_by("id")
+                .first()
+            )
+            mismatches = sum(
+                self.compare(viewer) for viewer in (AnonymousUser(), user)
+            )
+            if mismatches:
+                raise CommandError(f"Различаются рецептов: {mismatches}")
+            report = {
+                name: self.measure(
+                    loader, serializer, user, options["page_size"],
+                    options["repeat"],
+                )
+                for name, (loader, serializer) in LOADERS.items()
+            }
+        self.stdout.write(
+            f"{'способ':<10} {'запросы':>8} {'p50, мс':>9} {'p95, мс':>9}"
+        )
+        for name, result in report.items():
+            self.stdout.write(
+                f"{name:<10} {result['queries']:>8} "
+                f"{result['p50_ms']:>9.3f} {result['p95_ms']:>9.3f}"
+            )
+        if options["output"]:
+            write_report(options["output"], report)
+
+    @staticmethod
+    def get_request(user):
+        """Запрос к списку рецептов от имени пользователя."""
+        request = Request(APIRequestFactory().get("/api/recipes/"))
+        request.user = user
+        return request
+
+    def compare(self, user):
+        """Сравнивает ответы обоих способов по всем рецептам."""
+        request = self.get_request(user)
+        rendered = {}
+        for name, (loader, serializer) in LOADERS.items():
+            rendered[name] = {
+                recipe.pk: JSONRenderer().render(
+                    serializer(recipe, context={"request": request}).data
+                )
+                for recipe in loader(request.user).order_by("id")
+            }
+        mismatches = [
+            pk
+            for pk, content in rendered["prefetch"].items()
+            if rendered["json"].get(pk) != content
+        ]
+        for pk in mismatches[:10]:
+            self.stdout.write(self.style.ERROR(f"Рецепт {pk} различается."))
+        self.stdout.write(
+            f"{user}: сравнено рецептов {len(rendered['prefetch'])}, "
+            f"различаются {len(mismatches)}"
+        )
+        return len(mismatches)
+
+    def measure(self, loader, serializer, user, page_size, repeat):
+        """Замеряет загрузку и сериализацию одной страницы."""
+
+        def load_page():
+            request = self.get_request(user)
+            recipes = loader(user).order_by("-pub_date", "-id")
+            return serializer(
+                recipes[:page_size], many=True, context={"request": request}
+            ).data
+
+        with CaptureQueriesContext(connection) as queries:
+            load_page()
+        return {"queries": len(queries), **measure(load_page, repeat)}
@@ -0,0 +1,210 @@
+"""Команда для наполнения базы данных большим тестовым набором данных."""
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand, call_command
+from django.db import transaction
+from django.utils import timezone
+
+from recipes.counters import COUNTERS, reconcile
+from recipes.images import variants_disabled
+from recipes.models import (
+    FavoriteRecipe, FeedEntry, Ingredient, Recipe, RecipeIngredient,
+    ShoppingCart, ShoppingListItem, Tag,
+)
+from users.models import Subscription, User
+
+
+SEED_PASSWORD = "Seed-data-password-1"
+SEED_IMAGE = "recipes/seed.png"
+
+
+class Command(BaseCommand):
+    """Обработка команды."""
+
+    help = "Наполняет базу пользователями, рецептами, избранным и подписками."
+
+    def add_arguments(self, parser):
+        """Параметры размера набора данных."""
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--recipes", type=int, default=2000)
+        parser.add_argument("--tags", type=int, default=6)
+        parser.add_argument("--ingredients-per-recipe", type=int, default=6)
+        parser.add_argument("--tags-per-recipe", type=int, default=2)
+        parser.add_argument("--favorites", type=int, default=15)
+        parser.add_argument("--carts", type=int, default=5)
+        parser.add_argument("--subscriptions", type=int, default=8)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Создание набора данных."""
+        started = time.perf_counter()
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        if not Ingredient.objects.exists():
+            call_command("import_ingredients", stdout=self.stdout)
+        # Файла SEED_IMAGE может не быть, а копии изображений тестовым
+        # рецептам не нужны.
+        with variants_disabled(), transaction.atomic():
+            tag_ids = self.create_tags(options["tags"])
+            user_ids = self.create_users(options["users"])
+            recipe_ids = self.create_recipes(
+                options["recipes"],
+                user_ids,
+                tag_ids,
+                options["tags_per_recipe"],
+                options["ingredients_per_recipe"],
+            )
+            self.create_relations(
+                FavoriteRecipe, user_ids, recipe_ids, options["favorites"]
+            )
+            self.create_relations(
+                ShoppingCart, user_ids, recipe_ids, options["carts"]
+            )
+            ShoppingListItem.objects.rebuild(user_ids)
+            self.create_subscriptions(user_ids, options["subscriptions"])
+            for counter in COUNTERS.values():
+                reconcile(counter)
+            FeedEntry.objects.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Создано пользователей: {len(user_ids)}, "
+                f"рецептов: {len(recipe_ids)} "
+                f"за {time.perf_counter() - started:.1f} с"
+            )
+        )
+
+    def create_tags(self, count):
+        """Создает недостающие теги."""
+        existing = Tag.objects.count()
+        Tag.objects.bulk_create(
+            Tag(
+                name=f"Тег {index}",
+                slug=f"seed-tag-{index}",
+                color=f"#{self.random.randrange(0x1000000):06X}",
+            )
+            for index in range(existing, count)
+        )
+        return list(Tag.objects.values_list("id", flat=True))
+
+    def create_users(self, count):
+        """Создает пользователей с общим паролем."""
+        last_id = User.objects.order_by("-id").values_list("id", flat=True)
+        last_id = last_id.first() or 0
+        password = make_password(SEED_PASSWORD)
+        User.objects.bulk_create(
+            (
+                User(
+                    username=f"seed_user_{last_id + index}",
+                    email=f"seed_user_{last_id + index}@example.com",
+                    first_name="Имя",
+                    last_name="Фамилия",
+                    password=password,
+                )
+                for index in range(count)
+            ),
+            batch_size=self.batch_size,
+        )
+        return list(
+            User.objects.filter(id__gt=last_id).values_list("id", flat=True)
+        )
+
+    def create_recipes(
+        self, count, user_ids, tag_ids, tags_per_recipe, ingredients_per_recipe
+    ):
+        """Создает рецепты с тегами и ингредиентами."""
+        if not user_ids:
+            return []
+        last_id = Recipe.objects.order_by("-id").values_list("id", flat=True)
+        last_id = last_id.first() or 0
+        Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    author_id=self.random.choice(user_ids),
+                    name=f"Рецепт {last_id + index}",
+                    image=SEED_IMAGE,
+                    text="Описание рецепта.",
+                    cooking_time=self.random.randint(1, 180),
+                )
+                for index in range(count)
+            ),
+            batch_size=self.batch_size,
+        )
+        recipe_ids = list(
+            Recipe.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        # pub_date заполняется автоматически при создании, поэтому даты
+        # публикации с шагом в минуту задаются отдельным обновлением.
+        now = timezone.now()
+        Recipe.objects.bulk_update(
+            (
+                Recipe(
+                    pk=recipe_id,
+                    pub_date=now - timedelta(minutes=len(recipe_ids) - index),
+                )
+                for index, recipe_id in enumerate(recipe_ids)
+            ),
+            ["pub_date"],
+            batch_size=self.batch_size,
+        )
+        ingredient_ids = list(Ingredient.objects.values_list("id", flat=True))
+        recipe_tags = Recipe.tags.through
+        recipe_tags.objects.bulk_create(
+            (
+                recipe_tags(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in recipe_ids
+                for tag_id in self.sample(tag_ids, tags_per_recipe)
+            ),
+            batch_size=self.batch_size,
+        )
+        RecipeIngredient.objects.bulk_create(
+            (
+                RecipeIngredient(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=self.random.randint(1, 500),
+                )
+                for recipe_id in recipe_ids
+                for ingredient_id in self.sample(
+                    ingredient_ids, ingredients_per_recipe
+                )
+            ),
+            batch_size=self.batch_size,
+        )
+        return recipe_ids
+
+    def create_relations(self, model, user_ids, recipe_ids, per_user):
+        """Добавляет рецепты в избранное или список покупок."""
+        model.objects.bulk_create(
+            (
+                model(user_id=user_id, recipe_id=recipe_id)
+                for user_id in user_ids
+                for recipe_id in self.sample(recipe_ids, per_user)
+            ),
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+
+    def create_subscriptions(self, user_ids, per_user):
+        """Подписывает пользователей на случайных авторов."""
+        Subscription.objects.bulk_create(
+            (
+                Subscription(follower_id=user_id, author_id=author_id)
+                for user_id in user_ids
+                for author_id in [
+                    author_id
+                    for author_id in self.sample(user_ids, per_user + 1)
+                    if author_id != user_id
+                ][:per_user]
+            ),
+            batch_size=self.batch_size,
+        )
+
+    def sample(self, population, count):
+        """Случайная выборка без повторений."""
+        return self.random.sample(population, min(count, len(population)))
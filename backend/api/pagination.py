@@ -0,0 +1,79 @@
+"""Модуль пагинации API."""
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class LimitPageNumberPagination(PageNumberPagination):
+    """Постраничная пагинация с размером страницы из параметра limit."""
+
+    page_size_query_param = "limit"
+    max_page_size = 100
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Курсорная пагинация рецептов по дате публикации и id."""
+
+    ordering = ("-pub_date", "-id")
+    page_size_query_param = "limit"
+    max_page_size = 100
+
+
+class RecipePagination(LimitPageNumberPagination):
+    """Пагинация рецептов.
+
+    По умолчанию постраничная. С параметром pagination=cursor или cursor
+    используется курсорная пагинация: она не считает COUNT(*) и не
+    пропускает строки через OFFSET, поэтому не замедляется на дальних
+    страницах.
+    """
+
+    mode_query_param = "pagination"
+    cursor_pagination_class = RecipeCursorPagination
+    cursor_pagination = None
+
+    def use_cursor(self, request):
+        """Запрошена ли курсорная пагинация."""
+        return (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Выбирает страницу одним из способов пагинации."""
+        if not self.use_cursor(request):
+            self.cursor_pagination = None
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_pagination = self.cursor_pagination_class()
+        return self.cursor_pagination.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        """Ответ со ссылками выбранного способа пагинации."""
+        if self.cursor_pagination is not None:
+            return self.cursor_pagination.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_page_state(self):
+        """Общее число объектов и ссылки на соседние страницы.
+
+        Курсорная пагинация не считает объекты, поэтому для неё возвращаются
+        только ссылки.
+        """
+        if self.cursor_pagination is not None:
+            return (
+                None,
+                self.cursor_pagination.get_next_link(),
+                self.cursor_pagination.get_previous_link(),
+            )
+        return (
+            self.page.paginator.count,
+            self.get_next_link(),
+            self.get_previous_link(),
+        )
+
+    def to_html(self):
+        """Элементы навигации для browsable API."""
+        if self.cursor_pagination is not None:
+            return self.cursor_pagination.to_html()
+        return super().to_html()
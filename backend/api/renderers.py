@@ -0,0 +1,50 @@
+"""Модуль рендереров API."""
+from rest_framework.renderers import JSONRenderer
+
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Типы, которые orjson сериализует иначе, чем JSONEncoder DRF, передаются
+# в encoder_class, поэтому ответ совпадает с ответом JSONRenderer.
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+    | orjson.OPT_NON_STR_KEYS
+    if orjson
+    else 0
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON-рендерер на orjson.
+
+    Без orjson, а также для отступов и настроек UNICODE_JSON, COMPACT_JSON
+    и STRICT_JSON, которые orjson не поддерживает, используется
+    стандартный JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Сериализует data в JSON."""
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        content = orjson.dumps(
+            data, default=self.encoder_class().default, option=ORJSON_OPTIONS
+        )
+        # Как и JSONRenderer, экранируем U+2028 и U+2029, чтобы ответ
+        # оставался допустимым JavaScript.
+        return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
@@ -1,14 +1,69 @@
 """Модуль с сериализаторами для API."""
-from drf_extra_fields.fields import Base64ImageField
+from collections import defaultdict
+
 from rest_framework import serializers
 
 from django.contrib.auth.password_validation import validate_password
+from django.db import transaction
 
-from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from foodgram.metrics import call_timed
+from recipes.models import (
+    FeedEntry, Ingredient, Recipe, RecipeIngredient, ShoppingListItem, Tag,
+)
 from users.models import Subscription, User
 
+from .fields import (
+    BulkPrimaryKeyRelatedField, ImageVariantsField, LimitedBase64ImageField,
+    NestedJSONField, resolve_ids,
+)
+
+
+BATCH_RECIPES_MAX = 100
+
+
+def get_followed_author_ids(request):
+    """Возвращает id авторов, на которых подписан текущий пользователь.
+
+    Множество загружается одним запросом и запоминается на время запроса,
+    поэтому все сериализаторы одного ответа используют общий результат.
+    """
+    request = getattr(request, "_request", request)
+    if not hasattr(request, "followed_author_ids"):
+        request.followed_author_ids = set(
+            Subscription.objects.filter(follower=request.user).values_list(
+                "author_id", flat=True
+            )
+        )
+    return request.followed_author_ids
+
 
-class UserSerializer(serializers.ModelSerializer):
+class TimedSerializerMixin:
+    """Миксин, учитывающий представление объекта в замерах запроса.
+
+    Время to_representation входит во время сериализации foodgram.metrics
+    вместе с вызванными ею запросами к БД. При many=True замеряется каждый
+    объект списка.
+    """
+
+    def to_representation(self, instance):
+        """Представление объекта с замером времени."""
+        return call_timed(super().to_representation, instance)
+
+
+class SubscribedMixin:
+    """Миксин для определения подписки текущего пользователя на автора."""
+
+    def is_subscribed_to(self, author_id):
+        """Подписан ли текущий пользователь на автора."""
+        request = self.context.get("request")
+        if not request or not request.user.is_authenticated:
+            return False
+        return author_id in get_followed_author_ids(request)
+
+
+class UserSerializer(
+    TimedSerializerMixin, SubscribedMixin, serializers.ModelSerializer
+):
     """Сериализатор пользователей."""
 
     email = serializers.EmailField(required=True)
@@ -34,11 +89,7 @@ class UserSerializer(serializers.ModelSerializer):
 
     def get_is_subscribed(self, obj):
         """Метод для поля is_subscribed."""
-        user = self.context.get("request").user
-        if not user.is_authenticated:
-            return False
-        follow = user.following.filter(author=obj)
-        return follow.exists()
+        return self.is_subscribed_to(obj.id)
 
     def validate_password(self, password):
         """Проверяет валидность пароля."""
@@ -74,7 +125,7 @@ class ChangePasswordSerializer(serializers.Serializer):
         return value
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для тегов."""
 
     class Meta:
@@ -84,7 +135,7 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "color", "slug")
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для ингредиентов."""
 
     class Meta:
@@ -94,10 +145,29 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "measurement_unit")
 
 
+class RecipeIngredientListSerializer(serializers.ListSerializer):
+    """Список ингредиентов рецепта, загружаемых одним запросом."""
+
+    default_error_messages = {
+        "does_not_exist": "Не найдены ингредиенты с id: {ids}.",
+        "duplicates": "Ингредиенты повторяются: {ids}.",
+    }
+
+    def to_internal_value(self, data):
+        """Заменяет id ингредиентов объектами."""
+        items = super().to_internal_value(data)
+        ingredients = resolve_ids(
+            self, Ingredient.objects.all(), [item["id"] for item in items]
+        )
+        for item, ingredient in zip(items, ingredients):
+            item["id"] = ingredient
+        return items
+
+
 class RecipeIngredientSerializer(serializers.ModelSerializer):
     """Сериализатор для ингредиентов в рецепте."""
 
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.IntegerField()
     amount = serializers.IntegerField(write_only=True)
 
     class Meta:
@@ -105,6 +175,7 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
 
         model = RecipeIngredient
         fields = ("id", "amount")
+        list_serializer_class = RecipeIngredientListSerializer
 
     def validate_amount(self, amount):
         """Проверка количества."""
@@ -135,10 +206,12 @@ class IngrediendAmountSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "measurement_unit", "amount")
 
 
-class SubscriptionSerializer(serializers.ModelSerializer):
+class SubscriptionSerializer(
+    TimedSerializerMixin, SubscribedMixin, serializers.ModelSerializer
+):
     """Сериализатор для подписок."""
 
-    recipes_count = serializers.IntegerField()
+    recipes_count = serializers.IntegerField(source="author.recipes_count")
     email = serializers.EmailField(source="author.email")
     id = serializers.IntegerField(source="author.id")
     username = serializers.CharField(source="author.username")
@@ -164,16 +237,16 @@ class SubscriptionSerializer(serializers.ModelSerializer):
 
     def get_is_subscribed(self, obj):
         """Метод для поля is_subscribed."""
-        user = self.context.get("request").user
-        if not user.is_authenticated:
-            return False
-        follow = user.following.filter(author=obj.author)
-        return follow.exists()
+        return self.is_subscribed_to(obj.author_id)
 
     def get_recipes(self, obj) -> list[Recipe]:
         """Метод для получения списка рецептов пользователя."""
-        recipes_limit = self.context.get("recipes_limit")
-        recipes = Recipe.objects.filter(author=obj.author)[:recipes_limit]
+        recipes_by_author = self.context.get("recipes_by_author")
+        if recipes_by_author is not None:
+            recipes = recipes_by_author.get(obj.author_id, [])
+        else:
+            recipes_limit = self.context.get("recipes_limit")
+            recipes = Recipe.objects.filter(author=obj.author)[:recipes_limit]
         serializers = RecipeSerializer(recipes, many=True)
         return serializers.data
 
@@ -197,22 +270,44 @@ class UserWithSubscriptionsSerializer(serializers.ModelSerializer):
         )
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для рецепта."""
 
+    image_variants = ImageVariantsField()
+
     class Meta:
         """Метакласс рецепта."""
 
         model = Recipe
-        fields = ("id", "name", "image", "cooking_time")
+        fields = ("id", "name", "image", "image_variants", "cooking_time")
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    """Сериализатор списка рецептов для пакетных операций."""
+
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BATCH_RECIPES_MAX,
+    )
+
+    def validate_recipes(self, value):
+        """Убирает повторы, сохраняя порядок рецептов."""
+        return list(dict.fromkeys(value))
 
 
-class RecipeCreateSerializer(serializers.ModelSerializer):
+class RecipeCreateSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer
+):
     """Сериализатор для создания рецепта."""
 
-    image = Base64ImageField()
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True
+    image = LimitedBase64ImageField()
+    tags = BulkPrimaryKeyRelatedField(
+        queryset=Tag.objects.all(),
+        error_messages={
+            "does_not_exist": "Не найдены теги с id: {ids}.",
+            "duplicates": "Теги повторяются: {ids}.",
+        },
     )
     ingredients = RecipeIngredientSerializer(
         many=True,
@@ -254,29 +349,105 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         """Создает новый рецепт на основе переданных данных."""
         ingredient = validated_data.pop("ingredients")
         tags = validated_data.pop("tags")
-        recipe = Recipe.objects.create(**validated_data)
-        recipe.tags.set(tags)
-        self.create_ingredients(ingredient, recipe)
+        with transaction.atomic():
+            recipe = Recipe.objects.create(**validated_data)
+            Recipe.tags.through.objects.bulk_create(
+                Recipe.tags.through(recipe=recipe, tag=tag) for tag in tags
+            )
+            self.create_ingredients(ingredient, recipe)
+            FeedEntry.objects.fan_out(recipe)
         return recipe
 
-    def update(self, instance: Recipe, validated_data):
-        """Обновляет существующий рецепт на основе переданных данных."""
-        if "ingredients" in self.validated_data:
-            ingredients = validated_data.pop("ingredients")
-            RecipeIngredient.objects.filter(recipe=instance).delete()
-            instance.ingredients.clear()
-            self.create_ingredients(ingredients, instance)
-
-        if "tags" in self.validated_data:
-            tags = validated_data.pop("tags", instance.tags.all())
-            instance.tags.set(tags)
+    @staticmethod
+    def update_ingredients(recipe: Recipe, ingredients):
+        """Приводит ингредиенты рецепта к новому составу.
+
+        Строки сопоставляются по ингредиенту: изменённые количества
+        обновляются, лишние строки удаляются, недостающие добавляются.
+        Возвращает суммы количеств каждого ингредиента до и после.
+        """
+        current = defaultdict(list)
+        for row in (
+            RecipeIngredient.objects.select_for_update()
+            .filter(recipe=recipe)
+            .order_by("id")
+        ):
+            current[row.ingredient_id].append(row)
+        old_amounts = {
+            ingredient_id: sum(row.amount for row in rows)
+            for ingredient_id, rows in current.items()
+        }
+        new_amounts = defaultdict(int)
+        to_create = []
+        to_update = []
+        for ingredient in ingredients:
+            ingredient_id = ingredient["id"].id
+            new_amounts[ingredient_id] += ingredient["amount"]
+            rows = current[ingredient_id]
+            if not rows:
+                to_create.append(
+                    RecipeIngredient(
+                        recipe=recipe,
+                        ingredient=ingredient["id"],
+                        amount=ingredient["amount"],
+                    )
+                )
+                continue
+            row = rows.pop(0)
+            if row.amount != ingredient["amount"]:
+                row.amount = ingredient["amount"]
+                to_update.append(row)
+        to_delete = [row.id for rows in current.values() for row in rows]
+        if to_delete:
+            RecipeIngredient.objects.filter(id__in=to_delete).delete()
+        if to_update:
+            RecipeIngredient.objects.bulk_update(to_update, ["amount"])
+        if to_create:
+            RecipeIngredient.objects.bulk_create(to_create)
+        return old_amounts, dict(new_amounts)
 
-        super().update(instance, validated_data)
+    @staticmethod
+    def update_tags(recipe: Recipe, tags):
+        """Добавляет и удаляет только изменившиеся теги рецепта."""
+        through = Recipe.tags.through
+        current = set(
+            through.objects.filter(recipe=recipe).values_list(
+                "tag_id", flat=True
+            )
+        )
+        new = {tag.id for tag in tags}
+        if current - new:
+            through.objects.filter(
+                recipe=recipe, tag_id__in=current - new
+            ).delete()
+        if new - current:
+            through.objects.bulk_create(
+                through(recipe=recipe, tag_id=tag_id)
+                for tag_id in new - current
+            )
 
+    def update(self, instance: Recipe, validated_data):
+        """Обновляет рецепт, изменяя только отличающиеся связи.
+
+        Все изменения выполняются в одной транзакции, поэтому рецепт ни в
+        какой момент не виден без ингредиентов или тегов. Дата изменения
+        рецепта обновляется его сохранением.
+        """
+        with transaction.atomic():
+            if "ingredients" in validated_data:
+                old_amounts, new_amounts = self.update_ingredients(
+                    instance, validated_data.pop("ingredients")
+                )
+                ShoppingListItem.objects.change_recipe(
+                    instance.id, old_amounts, new_amounts
+                )
+            if "tags" in validated_data:
+                self.update_tags(instance, validated_data.pop("tags"))
+            super().update(instance, validated_data)
         return instance
 
 
-class RecipeFullSerializer(serializers.ModelSerializer):
+class RecipeFullSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для полной информации о рецепте."""
 
     tags = TagSerializer(
@@ -289,7 +460,8 @@ class RecipeFullSerializer(serializers.ModelSerializer):
     author = UserSerializer(
         read_only=True,
     )
-    image = Base64ImageField()
+    image = LimitedBase64ImageField()
+    image_variants = ImageVariantsField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
@@ -304,6 +476,7 @@ class RecipeFullSerializer(serializers.ModelSerializer):
             "ingredients",
             "name",
             "image",
+            "image_variants",
             "text",
             "cooking_time",
             "is_favorited",
@@ -322,6 +495,8 @@ class RecipeFullSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         if not request or request.user.is_anonymous:
             return False
+        if hasattr(obj, "is_favorited"):
+            return obj.is_favorited
         return obj.in_favorites.filter(user=request.user).exists()
 
     def get_is_in_shopping_cart(self, obj):
@@ -329,4 +504,19 @@ class RecipeFullSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         if not request or request.user.is_anonymous:
             return False
+        if hasattr(obj, "is_in_shopping_cart"):
+            return obj.is_in_shopping_cart
         return obj.in_carts.filter(user=request.user).exists()
+
+
+class RecipeJSONSerializer(RecipeFullSerializer):
+    """Полная информация о рецепте с тегами и ингредиентами из JSON.
+
+    Рецепты выбираются с with_related_json() или дополняются
+    attach_related_json(); ответ совпадает с ответом RecipeFullSerializer.
+    """
+
+    tags = NestedJSONField(TagSerializer, source="tags_json")
+    ingredients = NestedJSONField(
+        IngrediendAmountSerializer, source="ingredients_json"
+    )
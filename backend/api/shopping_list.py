@@ -0,0 +1,169 @@
+"""Модуль формирования файла списка покупок."""
+import csv
+import os
+from io import BytesIO
+
+from rest_framework.renderers import BaseRenderer
+
+from django.conf import settings
+from django.db.models import F
+
+from recipes.models import ShoppingListItem
+
+
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.pdfgen import canvas
+except ImportError:
+    canvas = None
+
+
+TITLE = "Список покупок:"
+PDF_FONT_NAME = "ShoppingListFont"
+
+
+def get_shopping_list(user):
+    """Суммарное количество каждого ингредиента из списка покупок."""
+    return (
+        ShoppingListItem.objects.filter(user=user)
+        .values(
+            "ingredient__name",
+            "ingredient__measurement_unit",
+            total_quantity=F("amount"),
+        )
+        .order_by("ingredient__name", "ingredient__measurement_unit")
+    )
+
+
+class Echo:
+    """Псевдофайл, возвращающий записанную строку."""
+
+    def write(self, value):
+        """Возвращает строку вместо записи."""
+        return value
+
+
+class ShoppingListRenderer(BaseRenderer):
+    """Базовый рендерер файла списка покупок.
+
+    Сам файл отдаётся потоковым ответом через stream(), а рендерер
+    отвечает за выбор формата по ?format= или заголовку Accept и за вывод
+    сообщений об ошибках.
+    """
+
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Выводит сообщение об ошибке обычным текстом."""
+        if isinstance(data, dict):
+            data = "\n".join(f"{key}: {value}" for key, value in data.items())
+        return str(data or "").encode("utf-8")
+
+    def stream(self, ingredients):
+        """Генерирует содержимое файла по мере чтения ингредиентов."""
+        raise NotImplementedError
+
+
+class TextShoppingListRenderer(ShoppingListRenderer):
+    """Список покупок в текстовом формате."""
+
+    media_type = "text/plain"
+    format = "txt"
+
+    def stream(self, ingredients):
+        """Генерирует строки текстового файла."""
+        yield f"{TITLE}\n\n"
+        for ingredient in ingredients:
+            yield (
+                f"- {ingredient['ingredient__name']}: "
+                f"{ingredient['total_quantity']} "
+                f"{ingredient['ingredient__measurement_unit']}\n"
+            )
+
+
+class CSVShoppingListRenderer(ShoppingListRenderer):
+    """Список покупок в формате CSV."""
+
+    media_type = "text/csv"
+    format = "csv"
+
+    def stream(self, ingredients):
+        """Генерирует строки CSV-файла."""
+        writer = csv.writer(Echo())
+        yield "\ufeff" + writer.writerow(
+            ["Ингредиент", "Количество", "Единица измерения"]
+        )
+        for ingredient in ingredients:
+            yield writer.writerow(
+                [
+                    ingredient["ingredient__name"],
+                    ingredient["total_quantity"],
+                    ingredient["ingredient__measurement_unit"],
+                ]
+            )
+
+
+class PDFShoppingListRenderer(ShoppingListRenderer):
+    """Список покупок в формате PDF.
+
+    PDF собирается целиком перед отправкой, но его размер ограничен
+    числом различных ингредиентов, а не числом рецептов в корзине.
+    """
+
+    media_type = "application/pdf"
+    format = "pdf"
+    charset = None
+    chunk_size = 64 * 1024
+    font_size = 12
+    margin = 50
+
+    def stream(self, ingredients):
+        """Генерирует PDF-файл частями."""
+        buffer = BytesIO()
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        font = self.get_font()
+        top = A4[1] - self.margin
+        y = top
+        pdf.setFont(font, self.font_size + 4)
+        pdf.drawString(self.margin, y, TITLE)
+        y -= self.font_size * 3
+        pdf.setFont(font, self.font_size)
+        for ingredient in ingredients:
+            if y < self.margin:
+                pdf.showPage()
+                pdf.setFont(font, self.font_size)
+                y = top
+            pdf.drawString(
+                self.margin,
+                y,
+                f"• {ingredient['ingredient__name']}: "
+                f"{ingredient['total_quantity']} "
+                f"{ingredient['ingredient__measurement_unit']}",
+            )
+            y -= self.font_size * 1.5
+        pdf.save()
+        content = buffer.getvalue()
+        for start in range(0, len(content), self.chunk_size):
+            yield content[start:start + self.chunk_size]
+
+    @staticmethod
+    def get_font():
+        """Регистрирует шрифт с кириллицей, если он доступен."""
+        if PDF_FONT_NAME in pdfmetrics.getRegisteredFontNames():
+            return PDF_FONT_NAME
+        if not os.path.exists(settings.SHOPPING_LIST_PDF_FONT):
+            return "Helvetica"
+        pdfmetrics.registerFont(
+            TTFont(PDF_FONT_NAME, settings.SHOPPING_LIST_PDF_FONT)
+        )
+        return PDF_FONT_NAME
+
+
+SHOPPING_LIST_RENDERERS = [
+    TextShoppingListRenderer,
+    CSVShoppingListRenderer,
+]
+if canvas is not None:
+    SHOPPING_LIST_RENDERERS.append(PDFShoppingListRenderer)
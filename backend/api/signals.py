@@ -0,0 +1,45 @@
+"""Модуль обработчиков сигналов приложения API."""
+from rest_framework.authtoken.models import Token
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import Ingredient, Tag
+from recipes.signals import ingredients_imported
+from users.models import User
+
+from .authentication import invalidate_token, invalidate_user_tokens
+from .caching import bump_version
+from .ingredient_index import ingredient_index
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def bump_tags_version(sender, **kwargs):
+    """Меняет версию кеша тегов при их изменении."""
+    bump_version("tags")
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(ingredients_imported, sender=Ingredient)
+def bump_ingredients_version(sender, **kwargs):
+    """Меняет версию кеша и сбрасывает индекс ингредиентов."""
+    bump_version("ingredients")
+    ingredient_index.invalidate()
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Удаляет токен из кеша аутентификации при выходе пользователя."""
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_token(sender, instance, **kwargs):
+    """Сбрасывает кеш токена при изменении пользователя.
+
+    Сюда относятся смена пароля и деактивация.
+    """
+    invalidate_user_tokens(instance.pk)
@@ -4,7 +4,7 @@ from rest_framework.routers import DefaultRouter
 
 from django.urls import include, path, re_path
 
-from .views import IngredientView, RecipeView, TagView, UserView
+from .views import IngredientView, MetricsView, RecipeView, TagView, UserView
 
 
 router = DefaultRouter()
@@ -17,5 +17,6 @@ app_name = "api"
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
     re_path("^auth/", include("djoser.urls.authtoken")),
 ]
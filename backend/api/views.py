@@ -1,40 +1,62 @@
 """Модуль с представлениями API."""
 
-from io import StringIO
+from collections import defaultdict
 
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import status, viewsets
+from rest_framework import status, views, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
-from django.db.models import Count, Sum
-from django.http import HttpResponse
+from django.db.models import Prefetch, prefetch_related_objects
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
+from foodgram.metrics import registry
 from recipes.models import (
-    FavoriteRecipe, Ingredient, Recipe, RecipeIngredient, ShoppingCart, Tag,
+    FavoriteRecipe, FeedEntry, Ingredient, Recipe, RecipeIngredient,
+    ShoppingCart, Tag,
+)
+from recipes.toggles import (
+    add_recipe, add_recipes, clear_recipes, remove_recipe, remove_recipes,
 )
 from users.models import Subscription, User
 
+from .caching import (
+    ReferenceDataCacheMixin, get_recipes_etag, get_validator_headers,
+    has_validators, is_not_modified,
+)
 from .filters import FavoriteAndShoppingCartFilter, IngredientFilter
+from .ingredient_index import ingredient_index
+from .pagination import LimitPageNumberPagination, RecipePagination
 from .permissions import IsAuthorOrAdminOrReadOnly
 from .serializers import (
     ChangePasswordSerializer, IngredientSerializer, RecipeCreateSerializer,
-    RecipeFullSerializer, RecipeSerializer, SubscriptionSerializer,
-    TagSerializer, UserSerializer,
+    RecipeFullSerializer, RecipeIdsSerializer, RecipeJSONSerializer,
+    RecipeSerializer, SubscriptionSerializer, TagSerializer, UserSerializer,
+    get_followed_author_ids,
 )
+from .shopping_list import SHOPPING_LIST_RENDERERS, get_shopping_list
+
+
+RECIPES_LIMIT_DEFAULT = 6
+RECIPES_LIMIT_MAX = 50
+INGREDIENTS_LIMIT_DEFAULT = 10
+INGREDIENTS_LIMIT_MAX = 50
+BATCH_OPERATIONS = {
+    "add": (add_recipes, "added", "exists"),
+    "remove": (remove_recipes, "removed", "absent"),
+}
 
 
 class UserView(viewsets.ModelViewSet):
     """Представление для пользователей."""
 
-    queryset = User.objects.all()
+    queryset = User.objects.order_by("id")
     serializer_class = UserSerializer
     permission_classes = [AllowAny]
-    pagination_class = PageNumberPagination
+    pagination_class = LimitPageNumberPagination
 
     def get_serializer(self, *args, **kwargs):
         """Метод для получения сериалайзера."""
@@ -80,18 +102,45 @@ class UserView(viewsets.ModelViewSet):
     )
     def subscriptions(self, request):
         """Метод для получения списка подписок пользователя."""
-        self.queryset = Subscription.objects.filter(
-            follower=request.user
-        ).annotate(recipes_count=Count("author__recipes"))
+        recipes_limit = self.get_recipes_limit()
+        self.queryset = (
+            Subscription.objects.filter(follower=request.user)
+            .select_related("author")
+            .order_by("id")
+        )
         queryset = self.paginate_queryset(self.queryset)
-        recipes_limit = int(request.query_params.get("recipes_limit", 6))
+        recipes_by_author = defaultdict(list)
+        for recipe in Recipe.objects.latest_for_authors(
+            [subscription.author_id for subscription in queryset],
+            recipes_limit,
+        ):
+            recipes_by_author[recipe.author_id].append(recipe)
         serializer = SubscriptionSerializer(
             queryset,
             many=True,
-            context={"request": request, "recipes_limit": recipes_limit},
+            context={
+                "request": request,
+                "recipes_limit": recipes_limit,
+                "recipes_by_author": recipes_by_author,
+            },
         )
         return self.get_paginated_response(serializer.data)
 
+    def get_recipes_limit(self):
+        """Возвращает проверенное значение параметра recipes_limit."""
+        recipes_limit = self.request.query_params.get(
+            "recipes_limit", RECIPES_LIMIT_DEFAULT
+        )
+        try:
+            recipes_limit = int(recipes_limit)
+        except (TypeError, ValueError):
+            recipes_limit = -1
+        if recipes_limit < 0:
+            raise ValidationError(
+                {"recipes_limit": "Укажите неотрицательное целое число."}
+            )
+        return min(recipes_limit, RECIPES_LIMIT_MAX)
+
     @action(
         detail=True,
         methods=["post"],
@@ -133,42 +182,165 @@ class UserView(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class TagView(viewsets.ModelViewSet):
+class TagView(ReferenceDataCacheMixin, viewsets.ReadOnlyModelViewSet):
     """Представление для тегов."""
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    authentication_classes = []
     permission_classes = [AllowAny]
+    cache_namespace = "tags"
 
 
-class IngredientView(viewsets.ModelViewSet):
+class IngredientView(ReferenceDataCacheMixin, viewsets.ReadOnlyModelViewSet):
     """Представление для ингредиентов."""
 
+    authentication_classes = []
     permission_classes = [AllowAny]
+    cache_namespace = "ingredients"
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
 
+    def list(self, request, *args, **kwargs):
+        """Поиск ингредиентов по названию через индекс в памяти.
+
+        Совпадения по началу названия идут раньше совпадений по подстроке,
+        число результатов ограничивается параметром limit. Результаты
+        кешируются и получают ETag по версии справочника, как и список.
+        """
+        name = request.query_params.get("name", "").strip()
+        if not name:
+            return super().list(request, *args, **kwargs)
+        return self.get_cached_response(self.search, request, name)
+
+    def search(self, request, name):
+        """Совпадения по названию из индекса в памяти."""
+        return Response(ingredient_index.search(name, self.get_limit()))
+
+    def get_limit(self):
+        """Возвращает проверенное значение параметра limit."""
+        limit = self.request.query_params.get(
+            "limit", INGREDIENTS_LIMIT_DEFAULT
+        )
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            limit = 0
+        if limit < 1:
+            raise ValidationError(
+                {"limit": "Укажите положительное целое число."}
+            )
+        return min(limit, INGREDIENTS_LIMIT_MAX)
+
 
 class RecipeView(viewsets.ModelViewSet):
     """Представление для рецептов."""
 
-    pagination_class = PageNumberPagination
+    pagination_class = RecipePagination
+    lookup_value_regex = r"\d+"
+    prefetch_lookups = (
+        Prefetch("tags", queryset=Tag.objects.order_by("id")),
+        Prefetch(
+            "amount",
+            queryset=RecipeIngredient.objects.select_related(
+                "ingredient"
+            ).order_by("id"),
+        ),
+    )
     queryset = Recipe.objects.prefetch_related(
-        "tags", "ingredients"
+        *prefetch_lookups
     ).select_related("author")
     serializer_class = RecipeFullSerializer
     permission_classes = [IsAuthorOrAdminOrReadOnly]
     filter_backends = (DjangoFilterBackend,)
     filterset_class = FavoriteAndShoppingCartFilter
 
+    def get_queryset(self):
+        """Аннотирует рецепты признаками для текущего пользователя."""
+        return super().get_queryset().with_user_flags(self.request.user)
+
     def get_serializer(self, *args, **kwargs):
         """Получение сериализатора с контекстом запроса."""
         return super().get_serializer(
             *args, **kwargs, context={"request": self.request}
         )
 
+    def list(self, request, *args, **kwargs):
+        """Список рецептов с проверкой ETag до сериализации.
+
+        Если клиент прислал валидаторы, страница сначала выбирается без
+        тегов и ингредиентов, а они загружаются одним запросом, только если
+        ответ изменился. Иначе страница выбирается вместе с ними.
+        """
+        conditional = has_validators(request)
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(
+            None
+        )
+        if not conditional:
+            queryset = queryset.with_related_json()
+        page = self.paginate_queryset(queryset)
+        etag = get_recipes_etag(
+            request,
+            page,
+            self.get_followed_author_ids(),
+            self.paginator.get_page_state(),
+        )
+        headers = get_validator_headers(etag)
+        if is_not_modified(request, etag):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+        if conditional:
+            Recipe.objects.attach_related_json(page)
+        serializer = RecipeJSONSerializer(
+            page, many=True, context={"request": request}
+        )
+        response = self.get_paginated_response(serializer.data)
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        """Рецепт с проверкой ETag и Last-Modified до сериализации.
+
+        Last-Modified учитывается только для анонимных пользователей:
+        признаки избранного и списка покупок меняются без изменения рецепта.
+        Теги и ингредиенты загружаются так же, как в списке рецептов.
+        """
+        conditional = has_validators(request)
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(
+            None
+        )
+        if not conditional:
+            queryset = queryset.with_related_json()
+        recipe = get_object_or_404(queryset, pk=kwargs["pk"])
+        self.check_object_permissions(request, recipe)
+        etag = get_recipes_etag(
+            request, [recipe], self.get_followed_author_ids()
+        )
+        last_modified = None
+        if not request.user.is_authenticated:
+            last_modified = recipe.updated_at
+        headers = get_validator_headers(etag, last_modified)
+        if is_not_modified(request, etag, last_modified):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+        if conditional:
+            Recipe.objects.attach_related_json([recipe])
+        serializer = RecipeJSONSerializer(
+            recipe, context={"request": request}
+        )
+        return Response(serializer.data, headers=headers)
+
+    def get_followed_author_ids(self):
+        """Авторы, на которых подписан текущий пользователь."""
+        if not self.request.user.is_authenticated:
+            return set()
+        return get_followed_author_ids(self.request)
+
     def get_permissions(self):
         """Проверка аутентификации пользователя."""
         if self.action == "create":
@@ -183,6 +355,7 @@ class RecipeView(viewsets.ModelViewSet):
 
         serializer.is_valid(raise_exception=True)
         recipe = serializer.save(author=request.user)
+        prefetch_related_objects([recipe], *self.prefetch_lookups)
         response_serializer = RecipeFullSerializer(
             recipe, context={"request": request}
         )
@@ -190,40 +363,119 @@ class RecipeView(viewsets.ModelViewSet):
             response_serializer.data, status=status.HTTP_201_CREATED
         )
 
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[IsAuthenticated],
+        pagination_class=LimitPageNumberPagination,
+    )
+    def feed(self, request):
+        """Лента последних рецептов авторов, на которых подписан пользователь.
+
+        Страница выбирается из id рецептов ленты, затем рецепты страницы
+        загружаются вместе с тегами и ингредиентами одним запросом.
+        """
+        page = self.paginate_queryset(
+            FeedEntry.objects.recipe_ids(request.user)
+        )
+        recipes = (
+            self.get_queryset()
+            .prefetch_related(None)
+            .with_related_json()
+            .in_bulk(page)
+        )
+        serializer = RecipeJSONSerializer(
+            [recipes[pk] for pk in page if pk in recipes],
+            many=True,
+            context={"request": request},
+        )
+        return self.get_paginated_response(serializer.data)
+
     @action(
         detail=True, methods=["post"], permission_classes=[IsAuthenticated]
     )
     def favorite(self, request, pk=None):
         """Метод для добавления рецепта в избранное."""
-        recipe = self.get_object()
-        user = request.user
-
-        if FavoriteRecipe.objects.filter(user=user, recipe=recipe).exists():
-            return Response(
-                {"errors": "Рецепт уже добавлен в избранное."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        FavoriteRecipe.objects.create(user=user, recipe=recipe)
-        serializer = RecipeSerializer(recipe)
-
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return self.add_recipe_to(
+            FavoriteRecipe, pk, "Рецепт уже добавлен в избранное."
+        )
 
     @favorite.mapping.delete
     def favorite_delete(self, request, pk):
         """Метод для удаления рецепта в избранное."""
-        user = request.user
-        recipe = self.get_object()
+        if not remove_recipe(FavoriteRecipe, request.user.id, pk):
+            return self.not_removed_response(
+                pk, "Рецепт не найден в избранном."
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
-        amount, _ = FavoriteRecipe.objects.filter(
-            user=user, recipe=recipe
-        ).delete()
-        if not amount:
+    def add_recipe_to(self, model, pk, error):
+        """Добавляет рецепт в избранное или список покупок.
+
+        Рецепт выбирается только с полями краткого ответа, а запись
+        добавляется одним запросом.
+        """
+        recipe = get_object_or_404(
+            Recipe.objects.only(*RecipeSerializer.Meta.fields), pk=pk
+        )
+        if not add_recipe(model, self.request.user.id, recipe.id):
             return Response(
-                {"errors": "Рецепт не найден в избранном."},
-                status=status.HTTP_400_BAD_REQUEST,
+                {"errors": error}, status=status.HTTP_400_BAD_REQUEST
             )
+        return Response(
+            RecipeSerializer(recipe).data, status=status.HTTP_201_CREATED
+        )
 
-        return Response(status=status.HTTP_204_NO_CONTENT)
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[IsAuthenticated],
+        url_path=r"favorite/(?P<operation>add|remove|clear)",
+        url_name="favorite-batch",
+    )
+    def favorite_batch(self, request, operation):
+        """Пакетное добавление и удаление рецептов избранного, очистка."""
+        return self.batch_response(FavoriteRecipe, operation)
+
+    def batch_response(self, model, operation):
+        """Выполняет пакетную операцию и возвращает итог по каждому рецепту.
+
+        Рецепт получает статус изменения, статус без изменений, если он уже
+        был добавлен или отсутствовал, либо not_found, если его нет в БД.
+        """
+        user_id = self.request.user.id
+        if operation == "clear":
+            removed = clear_recipes(model, user_id)
+            return Response(
+                {
+                    "results": [
+                        {"id": recipe_id, "status": "removed"}
+                        for recipe_id in sorted(removed)
+                    ]
+                }
+            )
+        serializer = RecipeIdsSerializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data["recipes"]
+        run, changed, unchanged = BATCH_OPERATIONS[operation]
+        result = run(model, user_id, recipe_ids)
+        results = []
+        for recipe_id in recipe_ids:
+            if recipe_id in result.changed:
+                recipe_status = changed
+            elif recipe_id in result.found:
+                recipe_status = unchanged
+            else:
+                recipe_status = "not_found"
+            results.append({"id": recipe_id, "status": recipe_status})
+        return Response({"results": results})
+
+    @staticmethod
+    def not_removed_response(pk, error):
+        """Ответ на удаление рецепта, которого не было у пользователя."""
+        if not Recipe.objects.filter(pk=pk).exists():
+            raise Http404
+        return Response({"errors": error}, status=status.HTTP_400_BAD_REQUEST)
 
     def partial_update(self, request, *args, **kwargs):
         """Метод для изменения рецепта."""
@@ -238,6 +490,10 @@ class RecipeView(viewsets.ModelViewSet):
 
         if serializer.is_valid():
             serializer.save()
+            # Связи изменены в обход менеджеров, поэтому, как и
+            # UpdateModelMixin, сбрасываем кеш предвыборки.
+            instance._prefetched_objects_cache = {}
+            prefetch_related_objects([instance], *self.prefetch_lookups)
             response_serializer = RecipeFullSerializer(
                 instance, context={"request": request}
             )
@@ -254,67 +510,69 @@ class RecipeView(viewsets.ModelViewSet):
     )
     def shopping_cart(self, request, pk=None):
         """Метод для добавления рецепта в список покупок."""
-        recipe = self.get_object()
-        user = request.user
-
-        if ShoppingCart.objects.filter(user=user, recipe=recipe).exists():
-            return Response(
-                {"errors": "Рецепт уже добавлен в список покупок."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        ShoppingCart.objects.create(user=user, recipe=recipe)
-        serializer = RecipeSerializer(recipe)
-
-        return Response(
-            serializer.data,
-            status=status.HTTP_201_CREATED,
+        return self.add_recipe_to(
+            ShoppingCart, pk, "Рецепт уже добавлен в список покупок."
         )
 
     @shopping_cart.mapping.delete
     def shopping_cart_delete(self, request, pk):
         """Метод для удаления рецепта из списка покупок."""
-        recipe = self.get_object()
-        user = request.user
-        amount, _ = ShoppingCart.objects.filter(
-            user=user, recipe=recipe
-        ).delete()
-        if not amount:
-            return Response(
-                {"errors": "Рецепт не найден в списке покупок."},
-                status=status.HTTP_400_BAD_REQUEST,
+        if not remove_recipe(ShoppingCart, request.user.id, pk):
+            return self.not_removed_response(
+                pk, "Рецепт не найден в списке покупок."
             )
         return Response(
             {"message": "Рецепт успешно удален из списка покупок."},
             status=status.HTTP_204_NO_CONTENT,
         )
 
-    def generate_shopping_list(self):
-        """Метод для создания текстового файла списка покупок."""
-        user = self.request.user
-        ingredients = (
-            RecipeIngredient.objects.filter(recipe__in_carts__user=user)
-            .values("ingredient__name", "ingredient__measurement_unit")
-            .annotate(total_quantity=Sum("amount"))
-        )
-        txt_buffer = StringIO()
-        txt_buffer.write("Список покупок:\n\n")
-        for ingredient in ingredients:
-            txt_buffer.write(
-                f"- {ingredient['ingredient__name']}: "
-                f"{ingredient['total_quantity']} "
-                f"{ingredient['ingredient__measurement_unit']}\n"
-            )
-        txt_buffer.seek(0)
-        return txt_buffer
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[IsAuthenticated],
+        url_path=r"shopping_cart/(?P<operation>add|remove|clear)",
+        url_name="shopping-cart-batch",
+    )
+    def shopping_cart_batch(self, request, operation):
+        """Пакетное добавление и удаление рецептов списка покупок, очистка."""
+        return self.batch_response(ShoppingCart, operation)
 
     @action(
-        detail=False, methods=["get"], permission_classes=[IsAuthenticated]
+        detail=False,
+        methods=["get"],
+        permission_classes=[IsAuthenticated],
+        renderer_classes=SHOPPING_LIST_RENDERERS,
     )
     def download_shopping_cart(self, request, *args, **kwargs):
-        """Метод для скачивания списка покупок."""
-        txt_buffer = self.generate_shopping_list()
-        response = HttpResponse(txt_buffer, content_type="text/plain")
-        response[
-            "Content-Disposition"
-        ] = "attachment; filename='shopping_list.txt'"
+        """Метод для скачивания списка покупок.
+
+        Формат выбирается параметром ?format=txt|csv|pdf, файл
+        формируется по мере чтения ингредиентов из БД.
+        """
+        renderer = request.accepted_renderer
+        ingredients = get_shopping_list(request.user).iterator()
+        response = StreamingHttpResponse(
+            renderer.stream(ingredients),
+            content_type=(
+                f"{renderer.media_type}; charset={renderer.charset}"
+                if renderer.charset
+                else renderer.media_type
+            ),
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="shopping_list.{renderer.format}"'
+        )
         return response
+
+
+class MetricsView(views.APIView):
+    """Замеры запросов в текстовом формате Prometheus для персонала."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """Гистограммы замеров текущего процесса."""
+        return HttpResponse(
+            registry.render(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
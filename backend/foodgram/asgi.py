@@ -0,0 +1,115 @@
+"""ASGI config for foodgram project."""
+
+import os
+import threading
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+
+import django
+from django.core.handlers.asgi import ASGIHandler
+from django.db import DatabaseError, connections
+
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "foodgram.settings")
+
+ASGI_URLCONF = "foodgram.asgi_urls"
+
+
+class FoodgramASGIHandler(ASGIHandler):
+    """Обработчик ASGI с асинхронными версиями нагруженных маршрутов.
+
+    Синхронный код каждого запроса (промежуточные обработчики, сигналы,
+    синхронные представления) выполняется в своём потоке, а не в одном
+    общем для всех запросов потоке, как в Django 3.2 по умолчанию.
+    """
+
+    async def __call__(self, scope, receive, send):
+        """Обрабатывает запрос в отдельном контексте синхронного кода."""
+        async with ThreadSensitiveContext():
+            await super().__call__(scope, receive, send)
+
+    def create_request(self, scope, body_file):
+        """Запрос, маршруты которого берутся из ASGI_URLCONF."""
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = ASGI_URLCONF
+        return request, error_response
+
+    async def send_response(self, response, send):
+        """Отправляет ответ, читая потоковое содержимое по частям.
+
+        Django 3.2 перебирает потоковое содержимое прямо в цикле событий,
+        где обращаться к БД нельзя, а генератор списка покупок читает
+        ингредиенты из БД. Каждая часть читается в потоке синхронного кода
+        запроса, в том же, где затем закрывается ответ.
+        """
+        if not response.streaming:
+            await super().send_response(response, send)
+            return
+        headers = [
+            (
+                header.encode("ascii") if isinstance(header, str) else header,
+                value.encode("latin1") if isinstance(value, str) else value,
+            )
+            for header, value in response.items()
+        ]
+        headers.extend(
+            (b"Set-Cookie", cookie.output(header="").encode("ascii").strip())
+            for cookie in response.cookies.values()
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": headers,
+            }
+        )
+        parts = iter(response)
+        read = sync_to_async(read_chunk, thread_sensitive=True)
+        while True:
+            content = await read(parts, self.chunk_size)
+            if not content:
+                break
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": content,
+                    "more_body": True,
+                }
+            )
+        await send({"type": "http.response.body"})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+
+def read_chunk(parts, size):
+    """Читает части потокового ответа, пока не наберётся size байт."""
+    chunk = bytearray()
+    for part in parts:
+        chunk += part
+        if len(chunk) >= size:
+            break
+    return bytes(chunk)
+
+
+def build_ingredient_index():
+    """Строит индекс ингредиентов до первого запроса.
+
+    ASGI-сервер загружает приложение внутри цикла событий, где обращаться
+    к БД нельзя, поэтому индекс строится в отдельном потоке.
+    """
+    from api.ingredient_index import ingredient_index
+
+    try:
+        ingredient_index.build()
+    except DatabaseError:
+        pass
+    finally:
+        connections.close_all()
+
+
+django.setup(set_prefix=False)
+application = FoodgramASGIHandler()
+
+warm_up = threading.Thread(target=build_ingredient_index)
+warm_up.start()
+warm_up.join()
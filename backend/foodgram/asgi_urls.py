@@ -0,0 +1,18 @@
+"""foodgram URL Configuration для ASGI.
+
+Повторяет foodgram.urls, но отдаёт наиболее нагруженные маршруты API
+асинхронными представлениями.
+"""
+
+from django.urls import include, path
+
+from api.async_views import async_patterns
+from api.urls import app_name, router
+
+from . import urls
+
+
+urlpatterns = [
+    path("api/", include((async_patterns(router.urls), app_name))),
+    *urls.urlpatterns,
+]
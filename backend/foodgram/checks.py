@@ -0,0 +1,47 @@
+"""Модуль проверок настроек проекта."""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+PROCESS_CACHES = {"django.core.cache.backends.locmem.LocMemCache"}
+SHARED_CACHE_HINT = (
+    "Задайте общий кеш переменными CACHE_BACKEND и CACHE_LOCATION, "
+    "например django.core.cache.backends.memcached.PyMemcacheCache или "
+    "django.core.cache.backends.db.DatabaseCache."
+)
+
+
+def uses_process_cache():
+    """Хранит ли кеш по умолчанию данные в памяти процесса."""
+    return settings.CACHES["default"]["BACKEND"] in PROCESS_CACHES
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Требует общий кеш, если его записи должны видеть другие воркеры.
+
+    С одним воркером кеш процесса виден всем запросам, в том числе
+    закрепление клиента за основной БД при репликах.
+    """
+    if not uses_process_cache() or settings.WEB_CONCURRENCY < 2:
+        return []
+    errors = [
+        Error(
+            "Кеш в памяти процесса не виден другим воркерам: выход и "
+            "смена пароля не сбрасывают токен в их кешах, а изменения "
+            "тегов и ингредиентов — закешированные ответы.",
+            hint=SHARED_CACHE_HINT,
+            id="foodgram.E001",
+        )
+    ]
+    if settings.DATABASE_REPLICAS:
+        errors.append(
+            Error(
+                "Закрепление клиента за основной БД после записи хранится в "
+                "кеше; кеш в памяти процесса не виден другим воркерам, и "
+                "они читают из реплики без изменений клиента.",
+                hint=SHARED_CACHE_HINT,
+                id="foodgram.E002",
+            )
+        )
+    return errors
@@ -0,0 +1,251 @@
+"""Модуль замеров производительности запросов.
+
+Для каждого запроса собираются число и время запросов к БД, время
+сериализации, общее время обработки и размер ответа. Замеры накапливаются
+в гистограммах по имени маршрута и методу и отдаются в текстовом формате
+Prometheus. Гистограммы хранятся в памяти процесса: каждый воркер
+gunicorn отдаёт свои.
+"""
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.db.backends.signals import connection_created
+
+
+DURATION_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+SIZE_BUCKETS = (
+    256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216,
+)
+
+METRICS = (
+    (
+        "foodgram_request_duration_seconds",
+        "Общее время обработки запроса.",
+        DURATION_BUCKETS,
+    ),
+    (
+        "foodgram_db_queries",
+        "Число запросов к БД за запрос.",
+        QUERY_BUCKETS,
+    ),
+    (
+        "foodgram_db_duration_seconds",
+        "Время запросов к БД за запрос.",
+        DURATION_BUCKETS,
+    ),
+    (
+        "foodgram_serializer_duration_seconds",
+        "Время сериализации ответа, включая вызванные ею запросы к БД.",
+        DURATION_BUCKETS,
+    ),
+    (
+        "foodgram_response_size_bytes",
+        "Размер тела ответа.",
+        SIZE_BUCKETS,
+    ),
+)
+
+METHODS = {"GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE"}
+UNMATCHED_ROUTE = "unmatched"
+
+current_stats = ContextVar("current_stats", default=None)
+
+
+class RequestStats:
+    """Замеры одного запроса."""
+
+    __slots__ = (
+        "started",
+        "db_queries",
+        "db_time",
+        "serializer_time",
+        "serializer_depth",
+    )
+
+    def __init__(self):
+        """Начинает замер запроса."""
+        self.started = perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def server_timing(self, elapsed):
+        """Значение заголовка Server-Timing, длительности в миллисекундах."""
+        return (
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.db_queries} '
+            f'queries", ser;dur={self.serializer_time * 1000:.2f}, '
+            f"app;dur={elapsed * 1000:.2f}"
+        )
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин."""
+
+    __slots__ = ("buckets", "counts", "total")
+
+    def __init__(self, buckets):
+        """Пустая гистограмма; последняя корзина — +Inf."""
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+
+    def observe(self, value):
+        """Учитывает значение."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+
+class MetricsRegistry:
+    """Гистограммы замеров по маршрутам и методам."""
+
+    def __init__(self):
+        """Пустой реестр."""
+        self.lock = threading.Lock()
+        self.histograms = {}
+
+    def observe(self, route, method, values):
+        """Учитывает значения метрик METRICS; None пропускается."""
+        with self.lock:
+            for (name, _, buckets), value in zip(METRICS, values):
+                if value is None:
+                    continue
+                key = (name, route, method)
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = Histogram(buckets)
+                histogram.observe(value)
+
+    def render(self):
+        """Гистограммы в текстовом формате Prometheus."""
+        lines = []
+        with self.lock:
+            items = sorted(self.histograms.items())
+            for name, description, _ in METRICS:
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} histogram")
+                for (metric, route, method), histogram in items:
+                    if metric != name:
+                        continue
+                    labels = f'route="{route}",method="{method}"'
+                    cumulative = 0
+                    bounds = [*map(str, histogram.buckets), "+Inf"]
+                    for bound, count in zip(bounds, histogram.counts):
+                        cumulative += count
+                        lines.append(
+                            f'{name}_bucket{{{labels},le="{bound}"}} '
+                            f"{cumulative}"
+                        )
+                    lines.append(f"{name}_sum{{{labels}}} {histogram.total}")
+                    lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def get_route(request):
+    """Имя маршрута запроса для меток метрик."""
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match else UNMATCHED_ROUTE
+
+
+def record_request(request, stats, size):
+    """Учитывает завершённый запрос и возвращает его длительность."""
+    elapsed = perf_counter() - stats.started
+    method = request.method if request.method in METHODS else "OTHER"
+    values = (
+        elapsed,
+        stats.db_queries,
+        stats.db_time,
+        stats.serializer_time,
+        size,
+    )
+    registry.observe(get_route(request), method, values)
+    return elapsed
+
+
+class MeasuredStream:
+    """Потоковое содержимое ответа, учитывающее запрос по окончании.
+
+    Запросы к БД, выполненные при чтении содержимого, входят в замеры
+    запроса, а длительность и размер учитываются после передачи последней
+    части или при закрытии ответа, если передача прервалась.
+    """
+
+    def __init__(self, request, content, stats):
+        """Оборачивает содержимое content потокового ответа."""
+        self.request = request
+        self.parts = iter(content)
+        self.stats = stats
+        self.size = 0
+        self.recorded = False
+
+    def __iter__(self):
+        """Итератор частей содержимого."""
+        return self
+
+    def __next__(self):
+        """Читает следующую часть с замером запросов к БД."""
+        token = current_stats.set(self.stats)
+        try:
+            part = next(self.parts)
+        except StopIteration:
+            self.close()
+            raise
+        finally:
+            current_stats.reset(token)
+        self.size += len(part)
+        return part
+
+    def close(self):
+        """Учитывает запрос; вызывается Django при закрытии ответа."""
+        if not self.recorded:
+            self.recorded = True
+            record_request(self.request, self.stats, self.size)
+
+
+def record_query(execute, sql, params, many, context):
+    """Обёртка выполнения SQL, учитывающая запрос в замерах запроса."""
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_queries += 1
+        stats.db_time += perf_counter() - started
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """Подключает замер запросов к новому соединению с БД."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def call_timed(func, *args):
+    """Вызывает func, учитывая время вызова как время сериализации.
+
+    Вложенные вызовы, например сериализаторы полей, повторно не считаются.
+    """
+    stats = current_stats.get()
+    if stats is None or stats.serializer_depth:
+        return func(*args)
+    stats.serializer_depth += 1
+    started = perf_counter()
+    try:
+        return func(*args)
+    finally:
+        stats.serializer_time += perf_counter() - started
+        stats.serializer_depth -= 1
+
+
+def install():
+    """Подключает замер запросов к БД."""
+    connection_created.connect(install_query_timer)
@@ -0,0 +1,168 @@
+"""Модуль промежуточных обработчиков проекта."""
+import asyncio
+import hashlib
+import secrets
+from time import perf_counter
+
+from rest_framework.authentication import get_authorization_header
+from rest_framework.permissions import SAFE_METHODS
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.deprecation import MiddlewareMixin
+
+from .metrics import (
+    MeasuredStream, RequestStats, current_stats, record_request,
+)
+from .routers import replica_reads
+
+
+REPLICA_PATH_PREFIX = "/api/"
+PRIMARY_KEY = "read-your-writes:{digest}"
+PRIMARY_COOKIE = "read_your_writes"
+# Поле ответа djoser с токеном, созданным при входе.
+TOKEN_FIELD = "auth_token"
+
+
+def make_primary_key(credentials):
+    """Ключ кеша закрепления для токена или значения cookie."""
+    digest = hashlib.sha256(credentials).hexdigest()[:32]
+    return PRIMARY_KEY.format(digest=digest)
+
+
+def get_primary_key(request):
+    """Ключ кеша, по которому клиент закрепляется за основной БД.
+
+    Клиент определяется по токену из заголовка Authorization, а анонимный
+    клиент — по cookie, которую получил после своей записи.
+    """
+    credentials = get_authorization_header(request)
+    if credentials:
+        return make_primary_key(credentials)
+    cookie = request.COOKIES.get(PRIMARY_COOKIE)
+    if cookie:
+        return make_primary_key(f"cookie {cookie}".encode())
+    return None
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """Направляет безопасные запросы к API в реплики.
+
+    После запроса, изменившего данные, клиент READ_YOUR_WRITES_SECONDS
+    секунд читает из основной БД и видит свои изменения, даже если
+    реплика ещё отстаёт. Работает как под WSGI, так и под ASGI.
+    """
+
+    def __call__(self, request):
+        """Выполняет запрос в выбранной БД и запоминает записи клиента."""
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        primary_key, use_replica = self.get_routing(request)
+        with replica_reads(use_replica) as state:
+            response = self.get_response(request)
+        if state.wrote:
+            self.remember_write(request, response, primary_key)
+        return response
+
+    async def __acall__(self, request):
+        """Асинхронный вариант __call__ для ASGI."""
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+        primary_key, use_replica = self.get_routing(request)
+        with replica_reads(use_replica) as state:
+            response = await self.get_response(request)
+        if state.wrote:
+            self.remember_write(request, response, primary_key)
+        return response
+
+    @staticmethod
+    def get_routing(request):
+        """Ключ закрепления клиента и признак чтения из реплики."""
+        primary_key = get_primary_key(request)
+        use_replica = (
+            request.method in SAFE_METHODS
+            and request.path.startswith(REPLICA_PATH_PREFIX)
+            and not (primary_key and cache.get(primary_key))
+        )
+        return primary_key, use_replica
+
+    @staticmethod
+    def remember_write(request, response, primary_key):
+        """Закрепляет клиента за основной БД после изменения данных.
+
+        Токен, созданный запросом входа, закрепляется сразу: следующий
+        запрос с ним иначе может уйти в реплику, где токена ещё нет.
+        Анонимный клиент получает cookie и закрепляется по ней.
+        """
+        keys = []
+        data = getattr(response, "data", None)
+        if isinstance(data, dict) and data.get(TOKEN_FIELD):
+            token = f"Token {data[TOKEN_FIELD]}".encode()
+            keys.append(make_primary_key(token))
+        if not get_authorization_header(request):
+            cookie = request.COOKIES.get(PRIMARY_COOKIE)
+            if not cookie:
+                cookie = secrets.token_urlsafe(16)
+            response.set_cookie(
+                PRIMARY_COOKIE,
+                cookie,
+                max_age=settings.READ_YOUR_WRITES_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+            primary_key = make_primary_key(f"cookie {cookie}".encode())
+        keys.append(primary_key)
+        cache.set_many(
+            dict.fromkeys(keys, True),
+            timeout=settings.READ_YOUR_WRITES_SECONDS,
+        )
+
+
+class PerformanceMiddleware(MiddlewareMixin):
+    """Замеряет запросы и добавляет к ответу заголовок Server-Timing.
+
+    Замеры учитываются в гистограммах foodgram.metrics по имени маршрута.
+    Заголовок отключается настройкой SERVER_TIMING.
+    """
+
+    def __call__(self, request):
+        """Выполняет запрос с замером."""
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        """Асинхронный вариант __call__ для ASGI."""
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.finish(request, response, stats)
+
+    @staticmethod
+    def finish(request, response, stats):
+        """Учитывает замеры запроса и добавляет заголовок.
+
+        Потоковый ответ учитывается после передачи тела, а Server-Timing
+        отражает только время до начала передачи.
+        """
+        if response.streaming:
+            elapsed = perf_counter() - stats.started
+            response.streaming_content = MeasuredStream(
+                request, response.streaming_content, stats
+            )
+        else:
+            elapsed = record_request(request, stats, len(response.content))
+        if settings.SERVER_TIMING:
+            response["Server-Timing"] = stats.server_timing(elapsed)
+        return response
@@ -0,0 +1,68 @@
+"""Модуль маршрутизации запросов между основной БД и репликами."""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+class RoutingState:
+    """Состояние маршрутизации в рамках одного HTTP-запроса."""
+
+    def __init__(self, replica):
+        """Реплика для чтения или None, если читать из основной БД."""
+        self.replica = replica
+        self.wrote = False
+
+
+routing_state = ContextVar("routing_state", default=None)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Направляет чтение внутри блока в одну из реплик.
+
+    Реплика выбирается один раз на блок, чтобы все запросы видели одно
+    состояние данных. Вне блока чтение идёт из основной БД.
+    """
+    replica = None
+    if enabled and settings.DATABASE_REPLICAS:
+        replica = random.choice(settings.DATABASE_REPLICAS)
+    state = RoutingState(replica)
+    token = routing_state.set(state)
+    try:
+        yield state
+    finally:
+        routing_state.reset(token)
+
+
+class ReplicaRouter:
+    """Маршрутизатор чтения в реплики с возвратом к основной БД.
+
+    После первой записи в блоке replica_reads чтение до его конца идёт из
+    основной БД, а состояние отмечает, что данные изменялись.
+    """
+
+    def db_for_read(self, model, **hints):
+        """Реплика блока replica_reads или основная БД."""
+        state = routing_state.get()
+        if state is None or state.replica is None:
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        """Запись всегда идёт в основную БД."""
+        state = routing_state.get()
+        if state is not None:
+            state.replica = None
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Реплики содержат те же данные, что и основная БД."""
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Миграции применяются только к основной БД."""
+        return db not in settings.DATABASE_REPLICAS
@@ -33,6 +33,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "foodgram.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -41,6 +42,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "foodgram.middleware.ReplicaRoutingMiddleware",
 ]
 
 ROOT_URLCONF = "foodgram.urls"
@@ -67,7 +69,16 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework.authentication.TokenAuthentication",
+        "api.authentication.CachedTokenAuthentication",
+    ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "api.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ),
 }
 
@@ -76,7 +87,7 @@ WSGI_APPLICATION = "foodgram.wsgi.application"
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": os.getenv("DB_ENGINE", "django.db.backends.postgresql"),
         "NAME": os.getenv("POSTGRES_DB", "django"),
         "USER": os.getenv("POSTGRES_USER", "django"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
@@ -85,6 +96,52 @@ DATABASES = {
     }
 }
 
+# Реплики для чтения: через запятую «хост[:порт]» для PostgreSQL или пути
+# к файлам для SQLite. Остальные параметры берутся из основной БД.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+    filter(None, os.getenv("DB_REPLICAS", "").split(",")), start=1
+):
+    if DATABASES["default"]["ENGINE"].endswith("sqlite3"):
+        location = {"NAME": replica}
+    else:
+        host, _, port = replica.partition(":")
+        location = {
+            "HOST": host,
+            "PORT": port or DATABASES["default"]["PORT"],
+        }
+    alias = f"replica_{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        **location,
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["foodgram.routers.ReplicaRouter"]
+
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", 5))
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+REFERENCE_DATA_CACHE_TIMEOUT = int(
+    os.getenv("REFERENCE_DATA_CACHE_TIMEOUT", 5 * 60)
+)
+
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv("AUTH_TOKEN_CACHE_TIMEOUT", 60))
+
+# Число воркеров gunicorn, которое он берёт из этой же переменной.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 1))
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "True") == "True"
+
 
 DJOSER = {
     "LOGIN_FIELD": "email",
@@ -121,3 +178,25 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static/")
 
 MEDIA_ROOT = os.path.join(BASE_DIR, "media/")
 MEDIA_URL = "media/"
+
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    "SHOPPING_LIST_PDF_FONT",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+)
+
+INGREDIENT_INDEX_TTL = int(os.getenv("INGREDIENT_INDEX_TTL", 300))
+
+RECIPE_IMAGE_MAX_BYTES = int(
+    os.getenv("RECIPE_IMAGE_MAX_BYTES", 5 * 1024 * 1024)
+)
+RECIPE_IMAGE_MAX_PIXELS = int(
+    os.getenv("RECIPE_IMAGE_MAX_PIXELS", 4096 * 4096)
+)
+RECIPE_IMAGE_VARIANTS = {
+    "thumbnail": (160, 160),
+    "card": (640, 480),
+}
+RECIPE_IMAGE_WORKERS = int(os.getenv("RECIPE_IMAGE_WORKERS", 2))
+
+FEED_LENGTH = int(os.getenv("FEED_LENGTH", 500))
+FEED_FANOUT_MAX_FOLLOWERS = int(os.getenv("FEED_FANOUT_MAX_FOLLOWERS", 1000))
@@ -6,8 +6,10 @@ from django.contrib import admin
 from django.db.models.query import QuerySet
 from django.http.request import HttpRequest
 
+from .counters import COUNTERS, change_counter
 from .models import (
-    FavoriteRecipe, Ingredient, Recipe, RecipeIngredient, ShoppingCart, Tag,
+    FavoriteRecipe, FeedEntry, Ingredient, Recipe, RecipeIngredient,
+    ShoppingCart, ShoppingListItem, Tag,
 )
 
 
@@ -27,9 +29,10 @@ class RecipeIngredientAdmin(admin.ModelAdmin):
 class RecipeAdmin(admin.ModelAdmin):
     """Кастомный админский класс для модели Рецепт."""
 
-    list_display = ("name", "author")
+    list_display = ("name", "author", "get_favorite_count")
     list_filter = ("author", "tags")
     search_fields = ("name", "author__email", "author__username")
+    readonly_fields = ("favorites_count", "carts_count")
 
     inlines = [RecipeIngredientInline]
 
@@ -41,11 +44,30 @@ class RecipeAdmin(admin.ModelAdmin):
             .prefetch_related("tags", "ingredients", "author")
         )
 
+    def save_model(self, request, obj, form, change):
+        """Переносит рецепт в счётчике рецептов при смене автора."""
+        super().save_model(request, obj, form, change)
+        if change and "author" in form.changed_data:
+            counter = COUNTERS[Recipe]
+            change_counter(counter, form.initial["author"], -1)
+            change_counter(counter, obj.author_id, 1)
+
+    def save_related(self, request, form, formsets, change):
+        """Учитывает изменение ингредиентов в списках покупок."""
+        old_amounts = form.instance.get_ingredient_amounts() if change else {}
+        super().save_related(request, form, formsets, change)
+        ShoppingListItem.objects.change_recipe(
+            form.instance.id,
+            old_amounts,
+            form.instance.get_ingredient_amounts(),
+        )
+
     def get_favorite_count(self, obj):
         """Количество добавлений в избранное для данного рецепта."""
-        return obj.favorite_set.count()
+        return obj.favorites_count
 
     get_favorite_count.short_description = "Добавления в избранное"
+    get_favorite_count.admin_order_field = "favorites_count"
 
 
 @admin.register(Tag)
@@ -87,3 +109,29 @@ class ShoppingCartAdmin(admin.ModelAdmin):
     def get_queryset(self, request: HttpRequest) -> QuerySet[Any]:
         """Получает кастомный QuerySet для списка покупок."""
         return super().get_queryset(request).select_related("user", "recipe")
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    """Кастомный админский класс для сумм в списках покупок."""
+
+    list_display = ("user", "ingredient", "amount")
+    search_fields = ("user__username", "ingredient__name")
+
+    def get_queryset(self, request: HttpRequest) -> QuerySet[Any]:
+        """Получает кастомный QuerySet для сумм в списках покупок."""
+        return (
+            super().get_queryset(request).select_related("user", "ingredient")
+        )
+
+
+@admin.register(FeedEntry)
+class FeedEntryAdmin(admin.ModelAdmin):
+    """Кастомный админский класс для лент рецептов."""
+
+    list_display = ("user", "recipe", "pub_date")
+    search_fields = ("user__username", "recipe__name")
+
+    def get_queryset(self, request: HttpRequest) -> QuerySet[Any]:
+        """Получает кастомный QuerySet для лент рецептов."""
+        return super().get_queryset(request).select_related("user", "recipe")
@@ -0,0 +1,34 @@
+"""Модуль выражений для сборки связанных объектов в JSON на стороне БД."""
+from django.db import models
+
+
+class JSONArraySubquery(models.Subquery):
+    """Подзапрос, собирающий значения столбца item в JSON-массив.
+
+    Элементы идут в порядке сортировки подзапроса; если строк нет,
+    возвращается пустой массив.
+    """
+
+    template = (
+        "(SELECT COALESCE(JSONB_AGG(items.item), '[]'::jsonb) "
+        "FROM (%(subquery)s) items)"
+    )
+    output_field = models.JSONField()
+
+    def resolve_expression(self, *args, **kwargs):
+        """Сохраняет сортировку, которую Django снимает с подзапросов."""
+        resolved = super().resolve_expression(*args, **kwargs)
+        resolved.query.add_ordering(*self.query.order_by)
+        return resolved
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        """Вариант для SQLite через json_group_array."""
+        return self.as_sql(
+            compiler,
+            connection,
+            template=(
+                "(SELECT JSON_GROUP_ARRAY(JSON(items.item)) "
+                "FROM (%(subquery)s) items)"
+            ),
+            **extra_context,
+        )
@@ -6,3 +6,7 @@ class RecipesConfig(AppConfig):
     """Класс настроек приложения recipes."""
 
     name = "recipes"
+
+    def ready(self):
+        """Подключает обработчики сигналов."""
+        from . import signals  # noqa: F401
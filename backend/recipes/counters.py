@@ -0,0 +1,76 @@
+"""Модуль денормализованных счётчиков пользователей и рецептов."""
+from typing import NamedTuple
+
+from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from users.models import Subscription, User
+
+from .models import FavoriteRecipe, Recipe, ShoppingCart
+
+
+class Counter(NamedTuple):
+    """Счётчик объектов model, связанных с owner через поле relation."""
+
+    model: type
+    owner: type
+    relation: str
+    field: str
+
+
+COUNTERS = {
+    Recipe: Counter(Recipe, User, "author", "recipes_count"),
+    FavoriteRecipe: Counter(
+        FavoriteRecipe, Recipe, "recipe", "favorites_count"
+    ),
+    ShoppingCart: Counter(ShoppingCart, Recipe, "recipe", "carts_count"),
+    Subscription: Counter(Subscription, User, "author", "followers_count"),
+}
+
+
+def change_counter(counter, owner_id, delta):
+    """Атомарно изменяет счётчик объекта на delta, не опуская ниже нуля."""
+    change_counters(counter, [owner_id], delta)
+
+
+def change_counters(counter, owner_ids, delta):
+    """Изменяет счётчики нескольких объектов на delta одним запросом."""
+    counter.owner.objects.filter(pk__in=owner_ids).update(
+        **{counter.field: Greatest(F(counter.field) + delta, Value(0))}
+    )
+
+
+def count_related(counter):
+    """Выражение с фактическим числом связанных объектов."""
+    return Coalesce(
+        Subquery(
+            counter.model.objects.filter(
+                **{counter.relation: OuterRef("pk")}
+            )
+            .order_by()
+            .values(counter.relation)
+            .annotate(total=Count("pk"))
+            .values("total"),
+            output_field=models.PositiveIntegerField(),
+        ),
+        0,
+    )
+
+
+def find_drift(counter):
+    """Объекты, счётчик которых расходится с числом связанных объектов."""
+    return (
+        counter.owner.objects.annotate(actual=count_related(counter))
+        .exclude(**{counter.field: F("actual")})
+        .values_list("pk", counter.field, "actual")
+        .order_by("pk")
+    )
+
+
+def reconcile(counter, owner_ids=None):
+    """Пересчитывает счётчик у всех или указанных объектов."""
+    owners = counter.owner.objects.all()
+    if owner_ids is not None:
+        owners = owners.filter(pk__in=owner_ids)
+    return owners.update(**{counter.field: count_related(counter)})
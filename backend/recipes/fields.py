@@ -0,0 +1,39 @@
+"""Модуль полей моделей приложения recipes."""
+from django.db import models
+
+
+class CounterField(models.PositiveIntegerField):
+    """Денормализованный счётчик связанных объектов.
+
+    Значение меняется только атомарными обновлениями через F() и не
+    редактируется в формах.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Счётчик начинается с нуля и скрыт из форм."""
+        kwargs.setdefault("default", 0)
+        kwargs.setdefault("editable", False)
+        super().__init__(*args, **kwargs)
+
+
+class CounterFieldsMixin:
+    """Не перезаписывает счётчики при сохранении существующего объекта.
+
+    Объект мог быть загружен до того, как другой запрос изменил счётчик,
+    поэтому при обычном сохранении счётчики не попадают в UPDATE.
+    """
+
+    def save(self, *args, **kwargs):
+        """Сохраняет все поля, кроме счётчиков."""
+        if (
+            not self._state.adding
+            and kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+        ):
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and not isinstance(field, CounterField)
+            ]
+        super().save(*args, **kwargs)
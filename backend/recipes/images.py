@@ -0,0 +1,150 @@
+"""Модуль подготовки уменьшенных копий изображений рецептов."""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from io import BytesIO
+
+from PIL import Image
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import Recipe
+
+
+logger = logging.getLogger(__name__)
+
+WEBP_QUALITY = 80
+
+variants_enabled = ContextVar("variants_enabled", default=True)
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    """Пул потоков для обработки изображений."""
+    return ThreadPoolExecutor(
+        max_workers=settings.RECIPE_IMAGE_WORKERS,
+        thread_name_prefix="recipe-images",
+    )
+
+
+def wait_for_variants():
+    """Дожидается завершения поставленных в очередь задач пула."""
+    if get_executor.cache_info().currsize:
+        get_executor().shutdown(wait=True)
+        get_executor.cache_clear()
+
+
+def get_variant_name(image_name, variant):
+    """Имя файла копии рядом с исходным изображением."""
+    return f"{os.path.splitext(image_name)[0]}.{variant}.webp"
+
+
+def render_variant(image, size):
+    """Уменьшает изображение до размера size и кодирует в WebP."""
+    variant = image.copy()
+    variant.thumbnail(size, Image.LANCZOS)
+    if variant.mode not in ("RGB", "RGBA"):
+        variant = variant.convert(
+            "RGBA" if "transparency" in variant.info else "RGB"
+        )
+    buffer = BytesIO()
+    variant.save(buffer, "WEBP", quality=WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def generate_variants(recipe_id, image_name):
+    """Создает копии изображения рецепта и сохраняет их имена.
+
+    Если за время обработки изображение рецепта сменилось, результат
+    отбрасывается: копии для нового изображения создаст его задача.
+    Отсутствующее или нечитаемое изображение пропускается.
+    """
+    try:
+        with default_storage.open(image_name) as source:
+            image = Image.open(source)
+            image.load()
+    except (OSError, Image.DecompressionBombError) as error:
+        logger.warning(
+            "Изображение рецепта %s не прочитано: %s", recipe_id, error
+        )
+        return
+    try:
+        variants = {"source": image_name}
+        for variant, size in settings.RECIPE_IMAGE_VARIANTS.items():
+            name = get_variant_name(image_name, variant)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            variants[variant] = default_storage.save(
+                name, ContentFile(render_variant(image, size))
+            )
+        recipe = Recipe.objects.filter(pk=recipe_id, image=image_name)
+        previous = recipe.values_list("image_variants", flat=True).first()
+        if not recipe.update(
+            image_variants=variants, updated_at=timezone.now()
+        ):
+            delete_variants(variants)
+        elif previous:
+            delete_variants(
+                {
+                    variant: name
+                    for variant, name in previous.items()
+                    if name not in variants.values()
+                }
+            )
+    except Exception:
+        logger.exception(
+            "Не удалось обработать изображение рецепта %s", recipe_id
+        )
+
+
+def generate_variants_in_worker(recipe_id, image_name):
+    """Создает копии в потоке пула и закрывает его соединения с БД."""
+    try:
+        generate_variants(recipe_id, image_name)
+    finally:
+        connections.close_all()
+
+
+def delete_variants(variants):
+    """Удаляет файлы копий изображения."""
+    for variant, name in variants.items():
+        if variant != "source" and default_storage.exists(name):
+            default_storage.delete(name)
+
+
+@contextmanager
+def variants_disabled():
+    """Не создаёт копии изображений рецептов, сохраняемых в блоке."""
+    token = variants_enabled.set(False)
+    try:
+        yield
+    finally:
+        variants_enabled.reset(token)
+
+
+def schedule_variants(recipe):
+    """Ставит создание копий в очередь после фиксации транзакции.
+
+    При RECIPE_IMAGE_WORKERS = 0 копии создаются сразу после фиксации
+    в текущем потоке. Внутри variants_disabled() ничего не делает.
+    """
+    if not variants_enabled.get():
+        return
+    recipe_id, image_name = recipe.pk, recipe.image.name
+
+    def submit():
+        if settings.RECIPE_IMAGE_WORKERS:
+            get_executor().submit(
+                generate_variants_in_worker, recipe_id, image_name
+            )
+        else:
+            generate_variants(recipe_id, image_name)
+
+    transaction.on_commit(submit)
@@ -0,0 +1,41 @@
+"""Команда для создания уменьшенных копий изображений рецептов."""
+from django.core.management import BaseCommand
+
+from recipes.images import generate_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """Обработка команды."""
+
+    help = (
+        "Создает уменьшенные копии изображений рецептов, у которых их нет "
+        "или они устарели."
+    )
+
+    def add_arguments(self, parser):
+        """Параметры команды."""
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Пересоздать копии для всех рецептов.",
+        )
+
+    def handle(self, *args, **options):
+        """Создание копий."""
+        recipes = (
+            Recipe.objects.exclude(image="")
+            .only("id", "image", "image_variants")
+            .order_by("id")
+        )
+        processed = 0
+        for recipe in recipes.iterator():
+            if (
+                options["all"]
+                or recipe.image_variants.get("source") != recipe.image.name
+            ):
+                generate_variants(recipe.id, recipe.image.name)
+                processed += 1
+        self.stdout.write(
+            self.style.SUCCESS(f"Обработано изображений: {processed}")
+        )
@@ -1,28 +1,149 @@
-"""Команда для импорта ингредиентов из CSV файла в базу данных."""
+"""Команда для импорта ингредиентов из CSV или JSON файла в базу данных."""
 import csv
+import json
 import os
+import time
+from io import StringIO
 
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
 
 from recipes.models import Ingredient
+from recipes.signals import ingredients_imported
+
+
+DEFAULT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "ingredients.csv"
+)
+COPY_TABLE = "ingredient_import"
+
+
+def read_csv(path):
+    """Читает пары (название, единица измерения) из CSV построчно."""
+    with open(path, encoding="UTF-8", newline="") as ingredients:
+        for row in csv.reader(ingredients, delimiter=","):
+            if row:
+                yield row[0], row[1]
+
+
+def read_json(path):
+    """Читает пары (название, единица измерения) из списка JSON."""
+    with open(path, encoding="UTF-8") as ingredients:
+        for ingredient in json.load(ingredients):
+            yield ingredient["name"], ingredient["measurement_unit"]
+
+
+READERS = {".csv": read_csv, ".json": read_json}
 
 
 class Command(BaseCommand):
     """Обработка команды."""
 
-    def handle(self, *args, **kwargs):
-        """Загрузка ингредиентов из CSV файла в базу данных."""
-        current_directory = os.path.dirname(os.path.abspath(__file__))
-        csv_file_path = os.path.join(
-            current_directory,
-            "ingredients.csv",
+    help = (
+        "Загружает ингредиенты из CSV или JSON файла пакетами в одной "
+        "транзакции, пропуская уже существующие."
+    )
+
+    def add_arguments(self, parser):
+        """Параметры загрузки."""
+        parser.add_argument("--path", default=DEFAULT_PATH)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Не использовать COPY даже для PostgreSQL.",
+        )
+
+    def handle(self, *args, **options):
+        """Загрузка ингредиентов в базу данных."""
+        path = options["path"]
+        reader = READERS.get(os.path.splitext(path)[1].lower())
+        if reader is None:
+            raise CommandError("Поддерживаются файлы .csv и .json.")
+        if not os.path.exists(path):
+            raise CommandError(f"Файл {path} не найден.")
+        use_copy = connection.vendor == "postgresql" and not options["no_copy"]
+        insert = self.copy_batch if use_copy else self.insert_batch
+        started = time.perf_counter()
+        read = new = created = 0
+        with transaction.atomic():
+            existing = set(
+                Ingredient.objects.values_list("name", "measurement_unit")
+            )
+            before = len(existing)
+            if use_copy:
+                self.create_copy_table()
+            batch = []
+            for name, measurement_unit in reader(path):
+                read += 1
+                key = (name.strip(), measurement_unit.strip())
+                if key in existing:
+                    continue
+                existing.add(key)
+                batch.append(key)
+                if len(batch) >= options["batch_size"]:
+                    insert(batch)
+                    new += len(batch)
+                    batch = []
+            if batch:
+                insert(batch)
+                new += len(batch)
+            if new:
+                if use_copy:
+                    self.insert_copied()
+                created = Ingredient.objects.count() - before
+        elapsed = time.perf_counter() - started
+        if created:
+            ingredients_imported.send(sender=Ingredient, created=created)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Ингредиенты загружены успешно: добавлено {created}, "
+                f"пропущено {read - created} за {elapsed:.3f} с "
+                f"({read / elapsed:.0f} строк/с)"
+            )
         )
 
-        with open(csv_file_path, encoding="UTF-8") as ingredients:
-            reader = csv.reader(ingredients, delimiter=",")
-            for row in reader:
-                Ingredient.objects.get_or_create(
-                    name=row[0],
-                    measurement_unit=row[1],
-                )
-        self.stdout.write(self.style.SUCCESS("Ингредиенты загружены успешно"))
+    @staticmethod
+    def insert_batch(batch):
+        """Добавляет пакет ингредиентов через bulk_create."""
+        Ingredient.objects.bulk_create(
+            (
+                Ingredient(name=name, measurement_unit=measurement_unit)
+                for name, measurement_unit in batch
+            ),
+            ignore_conflicts=True,
+        )
+
+    @staticmethod
+    def create_copy_table():
+        """Создает временную таблицу для загрузки через COPY."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {COPY_TABLE} "
+                "(name varchar(200), measurement_unit varchar(200)) "
+                "ON COMMIT DROP"
+            )
+
+    @staticmethod
+    def copy_batch(batch):
+        """Копирует пакет ингредиентов во временную таблицу."""
+        buffer = StringIO()
+        csv.writer(buffer).writerows(batch)
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {COPY_TABLE} (name, measurement_unit) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+
+    @staticmethod
+    def insert_copied():
+        """Переносит ингредиенты из временной таблицы, пропуская дубли."""
+        table = connection.ops.quote_name(Ingredient._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (name, measurement_unit) "
+                f"SELECT name, measurement_unit FROM {COPY_TABLE} "
+                "ON CONFLICT DO NOTHING"
+            )
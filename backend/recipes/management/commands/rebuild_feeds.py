@@ -0,0 +1,31 @@
+"""Команда для заполнения лент рецептов подписчиков."""
+from django.core.management import BaseCommand
+
+from recipes.models import FeedEntry
+
+
+class Command(BaseCommand):
+    """Обработка команды."""
+
+    help = "Заполняет ленты рецептов подписчиков заново по подпискам."
+
+    def add_arguments(self, parser):
+        """Параметры команды."""
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="Ограничить заполнение указанными пользователями.",
+        )
+
+    def handle(self, *args, **options):
+        """Заполнение лент."""
+        user_ids = options["user_ids"]
+        FeedEntry.objects.rebuild(user_ids)
+        entries = FeedEntry.objects.all()
+        if user_ids is not None:
+            entries = entries.filter(user_id__in=user_ids)
+        self.stdout.write(
+            self.style.SUCCESS(f"Записей в лентах: {entries.count()}")
+        )
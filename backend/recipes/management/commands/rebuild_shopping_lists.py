@@ -0,0 +1,48 @@
+"""Команда для пересчёта и проверки сумм в списках покупок."""
+from django.core.management import BaseCommand, CommandError
+
+from recipes.models import ShoppingListItem
+
+
+class Command(BaseCommand):
+    """Обработка команды."""
+
+    help = "Пересчитывает суммы ингредиентов в списках покупок и сверяет их."
+
+    def add_arguments(self, parser):
+        """Параметры команды."""
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только сверить суммы, не пересчитывая их.",
+        )
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="Ограничить пересчёт указанными пользователями.",
+        )
+
+    def handle(self, *args, **options):
+        """Пересчёт и сверка сумм."""
+        user_ids = options["user_ids"]
+        if not options["check"]:
+            ShoppingListItem.objects.rebuild(user_ids)
+        stored = ShoppingListItem.objects.stored_totals(user_ids)
+        live = ShoppingListItem.objects.live_totals(user_ids)
+        mismatches = [
+            (key, stored.get(key), live.get(key))
+            for key in stored.keys() | live.keys()
+            if stored.get(key) != live.get(key)
+        ]
+        for (user_id, ingredient_id), stored_total, live_total in mismatches:
+            self.stdout.write(
+                f"Пользователь {user_id}, ингредиент {ingredient_id}: "
+                f"сохранено {stored_total}, по рецептам {live_total}"
+            )
+        if mismatches:
+            raise CommandError(f"Расхождений: {len(mismatches)}")
+        self.stdout.write(
+            self.style.SUCCESS(f"Суммы совпадают, записей: {len(stored)}")
+        )
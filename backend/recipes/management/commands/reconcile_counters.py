@@ -0,0 +1,45 @@
+"""Команда для пересчёта и проверки денормализованных счётчиков."""
+from django.core.management import BaseCommand, CommandError
+
+from recipes.counters import COUNTERS, find_drift, reconcile
+
+
+class Command(BaseCommand):
+    """Обработка команды."""
+
+    help = (
+        "Сверяет число рецептов пользователей и число добавлений рецептов "
+        "в избранное и список покупок с фактическими данными и исправляет "
+        "расхождения."
+    )
+
+    def add_arguments(self, parser):
+        """Параметры команды."""
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только сверить счётчики, не исправляя их.",
+        )
+
+    def handle(self, *args, **options):
+        """Сверка и исправление счётчиков."""
+        mismatches = 0
+        for counter in COUNTERS.values():
+            drift = list(find_drift(counter))
+            for pk, stored, actual in drift:
+                self.stdout.write(
+                    f"{counter.owner._meta.verbose_name} {pk}, "
+                    f"{counter.field}: сохранено {stored}, фактически {actual}"
+                )
+            if drift and not options["check"]:
+                reconcile(counter, [pk for pk, _, _ in drift])
+            mismatches += len(drift)
+        if mismatches and options["check"]:
+            raise CommandError(f"Расхождений: {mismatches}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Исправлено расхождений: {mismatches}"
+                if mismatches
+                else "Счётчики совпадают."
+            )
+        )
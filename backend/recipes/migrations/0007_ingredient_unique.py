@@ -0,0 +1,56 @@
+# Generated by Django 3.2.3 on 2026-10-17 06:41
+
+from django.db import migrations, models
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    ShoppingListItem = apps.get_model('recipes', 'ShoppingListItem')
+    duplicates = (
+        Ingredient.objects.values('name', 'measurement_unit')
+        .annotate(keep_id=models.Min('id'), count=models.Count('id'))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        keep_id = duplicate['keep_id']
+        other_ids = list(
+            Ingredient.objects.filter(
+                name=duplicate['name'],
+                measurement_unit=duplicate['measurement_unit'],
+            )
+            .exclude(id=keep_id)
+            .values_list('id', flat=True)
+        )
+        RecipeIngredient.objects.filter(ingredient_id__in=other_ids).update(
+            ingredient_id=keep_id
+        )
+        for item in ShoppingListItem.objects.filter(
+            ingredient_id__in=other_ids
+        ):
+            kept, _ = ShoppingListItem.objects.get_or_create(
+                user_id=item.user_id,
+                ingredient_id=keep_id,
+                defaults={'amount': 0},
+            )
+            kept.amount += item.amount
+            kept.save(update_fields=['amount'])
+            item.delete()
+        Ingredient.objects.filter(id__in=other_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_recipe_author_pub_date_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 3.2.3 on 2026-10-17 07:01
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+import recipes.fields
+
+
+def count_related(model, relation):
+    return Coalesce(
+        models.Subquery(
+            model.objects.filter(**{relation: models.OuterRef('pk')})
+            .order_by()
+            .values(relation)
+            .annotate(total=models.Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    FavoriteRecipe = apps.get_model('recipes', 'FavoriteRecipe')
+    ShoppingCart = apps.get_model('recipes', 'ShoppingCart')
+    User.objects.update(recipes_count=count_related(Recipe, 'author'))
+    Recipe.objects.update(
+        favorites_count=count_related(FavoriteRecipe, 'recipe'),
+        carts_count=count_related(ShoppingCart, 'recipe'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_image_variants'),
+        ('users', '0003_user_recipes_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='carts_count',
+            field=recipes.fields.CounterField(default=0, editable=False, verbose_name='Добавления в список покупок'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=recipes.fields.CounterField(default=0, editable=False, verbose_name='Добавления в избранное'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
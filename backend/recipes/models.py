@@ -1,9 +1,23 @@
 """Модуль, содержащий модели Django-приложения recipes."""
+from collections import defaultdict
+from itertools import chain
+
 from colorfield.fields import ColorField
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, RegexValidator
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import (
+    BooleanField, Exists, F, OuterRef, Subquery, Sum, Value, Window,
+)
+from django.db.models.functions import JSONObject, RowNumber
+from django.utils import timezone
+
+from users.models import Subscription
+
+from .aggregates import JSONArraySubquery
+from .fields import CounterField, CounterFieldsMixin
 
 
 User = get_user_model()
@@ -54,6 +68,11 @@ class Ingredient(models.Model):
     class Meta:
         """Метакласс модели ингредиент."""
 
+        constraints = [
+            models.UniqueConstraint(
+                fields=["name", "measurement_unit"], name="unique_ingredient"
+            ),
+        ]
         verbose_name = "Ингредиент"
         verbose_name_plural = "Ингредиенты"
 
@@ -62,7 +81,106 @@ class Ingredient(models.Model):
         return self.name
 
 
-class Recipe(models.Model):
+class RecipeQuerySet(models.QuerySet):
+    """Набор запросов для рецептов."""
+
+    def with_user_flags(self, user):
+        """Аннотирует рецепты признаками избранного и списка покупок."""
+        if not user.is_authenticated:
+            return self.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField()),
+            )
+        return self.annotate(
+            is_favorited=Exists(
+                FavoriteRecipe.objects.filter(user=user, recipe=OuterRef("pk"))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef("pk"))
+            ),
+        )
+
+    def with_related_json(self):
+        """Аннотирует рецепты тегами и ингредиентами в виде JSON.
+
+        Теги и ингредиенты собираются коррелированными подзапросами в том
+        же запросе, что и рецепты, в порядке их id.
+        """
+        return self.annotate(
+            tags_json=JSONArraySubquery(
+                Tag.objects.filter(recipes=OuterRef("pk"))
+                .order_by("id")
+                .values(
+                    item=JSONObject(
+                        id="id", name="name", color="color", slug="slug"
+                    )
+                )
+            ),
+            ingredients_json=JSONArraySubquery(
+                RecipeIngredient.objects.filter(recipe=OuterRef("pk"))
+                .order_by("id")
+                .values(
+                    item=JSONObject(
+                        id="ingredient_id",
+                        name="ingredient__name",
+                        measurement_unit="ingredient__measurement_unit",
+                        amount="amount",
+                    )
+                )
+            ),
+        )
+
+    def attach_related_json(self, recipes):
+        """Загружает одним запросом JSON тегов и ингредиентов рецептов."""
+        related = {
+            pk: (tags, ingredients)
+            for pk, tags, ingredients in self.filter(
+                pk__in=[recipe.pk for recipe in recipes]
+            )
+            .with_related_json()
+            .values_list("pk", "tags_json", "ingredients_json")
+        }
+        for recipe in recipes:
+            recipe.tags_json, recipe.ingredients_json = related[recipe.pk]
+
+    def latest_for_authors(self, author_ids, limit):
+        """Возвращает не более limit последних рецептов каждого автора.
+
+        Выборка выполняется одним запросом: через ROW_NUMBER() с разбиением
+        по автору, а если СУБД не поддерживает оконные функции — через
+        коррелированный подзапрос с LIMIT.
+        """
+        if not author_ids or limit < 1:
+            return self.none()
+        recipes = self.filter(author_id__in=author_ids)
+        if not connections[self.db].features.supports_over_clause:
+            return recipes.filter(
+                pk__in=Subquery(
+                    self.filter(author=OuterRef("author"))
+                    .order_by("-pub_date", "-pk")
+                    .values("pk")[:limit]
+                )
+            ).order_by("author_id", "-pub_date", "-pk")
+        ranked = recipes.annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=[F("author_id")],
+                order_by=[F("pub_date").desc(), F("pk").desc()],
+            )
+        ).order_by()
+        sql, params = ranked.query.sql_with_params()
+        return self.raw(
+            f"SELECT * FROM ({sql}) ranked WHERE ranked.row_number <= %s "
+            "ORDER BY ranked.author_id, ranked.row_number",
+            [*params, limit],
+        )
+
+    def touch(self):
+        """Обновляет дату изменения рецептов."""
+        return self.update(updated_at=timezone.now())
+
+
+class Recipe(CounterFieldsMixin, models.Model):
     """Модель для хранения информации о рецептах."""
 
     author = models.ForeignKey(
@@ -73,6 +191,12 @@ class Recipe(models.Model):
     )
     name = models.CharField(max_length=200, verbose_name="Название")
     image = models.ImageField(upload_to="recipes/", verbose_name="Изображение")
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Уменьшенные копии изображения",
+    )
     text = models.TextField(verbose_name="Описание")
     ingredients = models.ManyToManyField(
         Ingredient,
@@ -91,11 +215,28 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name="Дата публикации",
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата изменения",
+    )
+    favorites_count = CounterField(verbose_name="Добавления в избранное")
+    carts_count = CounterField(verbose_name="Добавления в список покупок")
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         """Метакласс модели рецепт."""
 
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(
+                fields=["-pub_date", "-id"], name="recipe_pub_date_id_idx"
+            ),
+            models.Index(
+                fields=["author", "-pub_date"],
+                name="recipe_author_pub_date_idx",
+            ),
+        ]
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
 
@@ -103,6 +244,14 @@ class Recipe(models.Model):
         """Возвращает строковое представление объекта."""
         return self.name
 
+    def get_ingredient_amounts(self):
+        """Возвращает суммарное количество каждого ингредиента рецепта."""
+        return dict(
+            self.amount.values("ingredient_id")
+            .annotate(total=Sum("amount"))
+            .values_list("ingredient_id", "total")
+        )
+
 
 class RecipeIngredient(models.Model):
     """Модель для хранения информации о ингредиентах в рецептах."""
@@ -188,3 +337,392 @@ class ShoppingCart(models.Model):
     def __str__(self):
         """Возвращает строковое представление объекта."""
         return f"{self.user.username} - {self.recipe.name}"
+
+
+class ShoppingListItemManager(models.Manager):
+    """Менеджер суммарных количеств ингредиентов в списках покупок.
+
+    Суммы поддерживаются приращениями при изменении списка покупок и
+    состава рецептов, поэтому чтение списка не требует агрегации.
+    """
+
+    def apply_deltas(self, deltas):
+        """Применяет приращения вида {(user_id, ingredient_id): delta}."""
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        user_ids = sorted({user_id for user_id, _ in deltas})
+        with transaction.atomic(using=self.db):
+            # Строки, которых ещё нет, не заблокировать, поэтому изменения
+            # списка покупок одного пользователя выполняются по очереди
+            # под блокировкой его записи. Иначе два запроса могут
+            # одновременно создать одну и ту же строку.
+            users = self.model._meta.get_field("user").related_model
+            list(
+                users.objects.using(self.db)
+                .select_for_update()
+                .filter(pk__in=user_ids)
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+            existing = {
+                (item.user_id, item.ingredient_id): item
+                for item in self.select_for_update().filter(
+                    user_id__in=user_ids,
+                    ingredient_id__in={
+                        ingredient_id for _, ingredient_id in deltas
+                    },
+                )
+            }
+            to_create, to_update, to_delete = [], [], []
+            for (user_id, ingredient_id), delta in deltas.items():
+                item = existing.get((user_id, ingredient_id))
+                if item is None:
+                    if delta > 0:
+                        to_create.append(
+                            self.model(
+                                user_id=user_id,
+                                ingredient_id=ingredient_id,
+                                amount=delta,
+                            )
+                        )
+                    continue
+                item.amount += delta
+                if item.amount > 0:
+                    to_update.append(item)
+                else:
+                    to_delete.append(item.pk)
+            if to_delete:
+                self.filter(pk__in=to_delete).delete()
+            self.bulk_update(to_update, ["amount"])
+            self.bulk_create(to_create)
+
+    def add_recipes(self, user_id, recipe_ids, sign=1):
+        """Добавляет к списку покупок ингредиенты рецептов."""
+        totals = (
+            RecipeIngredient.objects.filter(recipe_id__in=recipe_ids)
+            .values("ingredient_id")
+            .annotate(total=Sum("amount"))
+            .values_list("ingredient_id", "total")
+        )
+        self.apply_deltas(
+            {
+                (user_id, ingredient_id): sign * total
+                for ingredient_id, total in totals
+            }
+        )
+
+    def remove_recipes(self, user_id, recipe_ids):
+        """Вычитает из списка покупок ингредиенты рецептов."""
+        self.add_recipes(user_id, recipe_ids, sign=-1)
+
+    def change_recipe(self, recipe_id, old_amounts, new_amounts):
+        """Учитывает изменение состава рецепта в списках покупок."""
+        diff = {
+            ingredient_id: (
+                new_amounts.get(ingredient_id, 0)
+                - old_amounts.get(ingredient_id, 0)
+            )
+            for ingredient_id in old_amounts.keys() | new_amounts.keys()
+        }
+        if not any(diff.values()):
+            return
+        user_ids = ShoppingCart.objects.filter(
+            recipe_id=recipe_id
+        ).values_list("user_id", flat=True)
+        self.apply_deltas(
+            {
+                (user_id, ingredient_id): delta
+                for user_id in user_ids
+                for ingredient_id, delta in diff.items()
+            }
+        )
+
+    def live_totals(self, user_ids=None):
+        """Вычисляет суммы агрегацией по рецептам в списках покупок."""
+        carts = ShoppingCart.objects.all()
+        if user_ids is not None:
+            carts = carts.filter(user_id__in=user_ids)
+        totals = (
+            carts.values("user_id", "recipe__amount__ingredient_id")
+            .annotate(total=Sum("recipe__amount__amount"))
+            .filter(total__isnull=False)
+            .values_list("user_id", "recipe__amount__ingredient_id", "total")
+        )
+        return {
+            (user_id, ingredient_id): total
+            for user_id, ingredient_id, total in totals
+        }
+
+    def stored_totals(self, user_ids=None):
+        """Возвращает сохранённые суммы."""
+        items = self.all()
+        if user_ids is not None:
+            items = items.filter(user_id__in=user_ids)
+        return {
+            (user_id, ingredient_id): amount
+            for user_id, ingredient_id, amount in items.values_list(
+                "user_id", "ingredient_id", "amount"
+            )
+        }
+
+    def rebuild(self, user_ids=None):
+        """Пересчитывает суммы заново по спискам покупок."""
+        with transaction.atomic(using=self.db):
+            items = self.all()
+            if user_ids is not None:
+                items = items.filter(user_id__in=user_ids)
+            items.delete()
+            self.bulk_create(
+                (
+                    self.model(
+                        user_id=user_id,
+                        ingredient_id=ingredient_id,
+                        amount=total,
+                    )
+                    for (user_id, ingredient_id), total in self.live_totals(
+                        user_ids
+                    ).items()
+                ),
+                batch_size=1000,
+            )
+
+
+class ShoppingListItem(models.Model):
+    """Модель суммарного количества ингредиента в списке покупок."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="shopping_list",
+        verbose_name="Пользователь",
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name="in_shopping_lists",
+        verbose_name="Ингредиент",
+    )
+    amount = models.PositiveIntegerField(verbose_name="Количество")
+
+    objects = ShoppingListItemManager()
+
+    class Meta:
+        """Метакласс модели ингредиента в списке покупок."""
+
+        verbose_name = "Ингредиент в списке покупок"
+        verbose_name_plural = "Ингредиенты в списках покупок"
+        unique_together = ["user", "ingredient"]
+
+    def __str__(self):
+        """Возвращает строковое представление объекта."""
+        return f"{self.ingredient} – {self.amount}"
+
+
+class FeedEntryManager(models.Manager):
+    """Менеджер лент рецептов подписчиков.
+
+    Рецепт записывается в ленты подписчиков автора при публикации, а
+    лента каждого пользователя хранит не больше FEED_LENGTH последних
+    рецептов. Рецепты авторов, у которых больше
+    FEED_FANOUT_MAX_FOLLOWERS подписчиков, в ленты не записываются и
+    добавляются к ленте при чтении.
+    """
+
+    @staticmethod
+    def fan_out_authors():
+        """Условие на авторов, рецепты которых записываются в ленты."""
+        return models.Q(
+            author__followers_count__lte=settings.FEED_FANOUT_MAX_FOLLOWERS
+        )
+
+    def fan_out(self, recipe):
+        """Добавляет рецепт в ленты подписчиков его автора."""
+        follower_ids = list(
+            Subscription.objects.filter(
+                self.fan_out_authors(), author_id=recipe.author_id
+            ).values_list("follower_id", flat=True)
+        )
+        if not follower_ids:
+            return
+        self.bulk_create(
+            (
+                self.model(
+                    user_id=follower_id,
+                    recipe=recipe,
+                    pub_date=recipe.pub_date,
+                )
+                for follower_id in follower_ids
+            ),
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        self.trim(follower_ids)
+
+    def backfill(self, user_id, author_id):
+        """Добавляет в ленту пользователя последние рецепты автора."""
+        recipes = (
+            Recipe.objects.filter(self.fan_out_authors(), author_id=author_id)
+            .order_by("-pub_date", "-pk")
+            .values_list("pk", "pub_date")[: settings.FEED_LENGTH]
+        )
+        created = self.bulk_create(
+            (
+                self.model(
+                    user_id=user_id, recipe_id=recipe_id, pub_date=pub_date
+                )
+                for recipe_id, pub_date in recipes
+            ),
+            ignore_conflicts=True,
+        )
+        if created:
+            self.trim([user_id])
+
+    def resume_fan_out(self, author_id):
+        """Возобновляет запись рецептов автора в ленты подписчиков.
+
+        Вызывается после отписки: если число подписчиков автора снова
+        равно FEED_FANOUT_MAX_FOLLOWERS, в ленты всех подписчиков
+        добавляются его последние рецепты, в том числе опубликованные,
+        пока подписчиков было больше.
+        """
+        if not User.objects.filter(
+            pk=author_id, followers_count=settings.FEED_FANOUT_MAX_FOLLOWERS
+        ).exists():
+            return
+        follower_ids = list(
+            Subscription.objects.filter(author_id=author_id).values_list(
+                "follower_id", flat=True
+            )
+        )
+        recipes = list(
+            Recipe.objects.filter(author_id=author_id)
+            .order_by("-pub_date", "-pk")
+            .values_list("pk", "pub_date")[: settings.FEED_LENGTH]
+        )
+        if not follower_ids or not recipes:
+            return
+        self.bulk_create(
+            (
+                self.model(
+                    user_id=follower_id, recipe_id=recipe_id, pub_date=pub_date
+                )
+                for follower_id in follower_ids
+                for recipe_id, pub_date in recipes
+            ),
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        self.trim(follower_ids)
+
+    def prune(self, user_id, author_id):
+        """Удаляет из ленты пользователя рецепты автора."""
+        self.filter(user_id=user_id, recipe__author_id=author_id).delete()
+
+    def trim(self, user_ids=None):
+        """Оставляет в лентах не больше FEED_LENGTH последних рецептов.
+
+        Записи с той же датой, что и первая лишняя, сохраняются.
+        """
+        cutoff = Subquery(
+            self.filter(user=OuterRef("user"))
+            .order_by("-pub_date")
+            .values("pub_date")[
+                settings.FEED_LENGTH:settings.FEED_LENGTH + 1
+            ]
+        )
+        entries = self.filter(pub_date__lt=cutoff)
+        if user_ids is not None:
+            entries = entries.filter(user_id__in=user_ids)
+        entries.delete()
+
+    def rebuild(self, user_ids=None):
+        """Заполняет ленты заново по подпискам."""
+        subscriptions = Subscription.objects.filter(self.fan_out_authors())
+        if user_ids is not None:
+            subscriptions = subscriptions.filter(follower_id__in=user_ids)
+        followers = defaultdict(list)
+        for follower_id, author_id in subscriptions.values_list(
+            "follower_id", "author_id"
+        ):
+            followers[author_id].append(follower_id)
+        with transaction.atomic(using=self.db):
+            entries = self.all()
+            if user_ids is not None:
+                entries = entries.filter(user_id__in=user_ids)
+            entries.delete()
+            self.bulk_create(
+                (
+                    self.model(
+                        user_id=follower_id,
+                        recipe_id=recipe.pk,
+                        pub_date=recipe.pub_date,
+                    )
+                    for recipe in Recipe.objects.latest_for_authors(
+                        list(followers), settings.FEED_LENGTH
+                    )
+                    for follower_id in followers[recipe.author_id]
+                ),
+                batch_size=1000,
+            )
+            self.trim(user_ids)
+
+    def recipe_ids(self, user):
+        """Id рецептов ленты пользователя от новых к старым.
+
+        Сохранённая лента объединяется с последними рецептами авторов,
+        рецепты которых в ленты не записываются.
+        """
+        stored = (
+            self.filter(user=user)
+            .order_by("-pub_date", "-recipe_id")
+            .values_list("pub_date", "recipe_id")[: settings.FEED_LENGTH]
+        )
+        pulled = (
+            Recipe.objects.filter(author__followers__follower=user)
+            .exclude(self.fan_out_authors())
+            .order_by("-pub_date", "-pk")
+            .values_list("pub_date", "pk")[: settings.FEED_LENGTH]
+        )
+        feed = sorted(set(chain(stored, pulled)), reverse=True)
+        return [recipe_id for _, recipe_id in feed[: settings.FEED_LENGTH]]
+
+
+class FeedEntry(models.Model):
+    """Модель рецепта в ленте подписчика."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="feed",
+        verbose_name="Подписчик",
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+        verbose_name="Рецепт",
+    )
+    pub_date = models.DateTimeField(verbose_name="Дата публикации")
+
+    objects = FeedEntryManager()
+
+    class Meta:
+        """Метакласс модели рецепта в ленте."""
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "recipe"], name="unique_feed_entry"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-pub_date"], name="feed_user_pub_date_idx"
+            ),
+        ]
+        verbose_name = "Рецепт в ленте"
+        verbose_name_plural = "Ленты рецептов"
+
+    def __str__(self):
+        """Возвращает строковое представление объекта."""
+        return f"{self.user} – {self.recipe}"
@@ -0,0 +1,115 @@
+"""Модуль обработчиков сигналов приложения recipes."""
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete,
+)
+from django.dispatch import Signal, receiver
+
+from users.models import Subscription
+
+from .counters import COUNTERS, change_counter
+from .images import delete_variants, schedule_variants
+from .models import (
+    FavoriteRecipe, FeedEntry, Recipe, ShoppingCart, ShoppingListItem,
+)
+
+
+# Отправляется после массовой загрузки ингредиентов, при которой
+# post_save для отдельных объектов не вызывается.
+ingredients_imported = Signal()
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=FavoriteRecipe)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Subscription)
+def increment_counter(sender, instance, created, **kwargs):
+    """Увеличивает счётчик рецептов автора или добавлений рецепта."""
+    if created:
+        counter = COUNTERS[sender]
+        change_counter(counter, getattr(instance, f"{counter.relation}_id"), 1)
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=FavoriteRecipe)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Subscription)
+def decrement_counter(sender, instance, **kwargs):
+    """Уменьшает счётчик рецептов автора или добавлений рецепта."""
+    counter = COUNTERS[sender]
+    change_counter(counter, getattr(instance, f"{counter.relation}_id"), -1)
+
+
+@receiver(post_save, sender=Subscription)
+def backfill_feed(sender, instance, created, **kwargs):
+    """Добавляет в ленту подписчика последние рецепты автора."""
+    if created:
+        FeedEntry.objects.backfill(instance.follower_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def prune_feed(sender, instance, **kwargs):
+    """Удаляет из ленты бывшего подписчика рецепты автора.
+
+    Счётчик подписчиков к этому моменту уже уменьшен. Запись рецептов
+    автора в ленты проверяется после фиксации транзакции, чтобы не
+    добавлять в ленты рецепты автора, удаляемого вместе с подписками.
+    """
+    FeedEntry.objects.prune(instance.follower_id, instance.author_id)
+    transaction.on_commit(
+        lambda: FeedEntry.objects.resume_fan_out(instance.author_id)
+    )
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    """Добавляет ингредиенты рецепта в список покупок."""
+    if created:
+        ShoppingListItem.objects.add_recipes(
+            instance.user_id, [instance.recipe_id]
+        )
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    """Вычитает ингредиенты рецепта из списка покупок.
+
+    Обработчик вызывается до удаления, поэтому при каскадном удалении
+    рецепта его ингредиенты ещё доступны.
+    """
+    ShoppingListItem.objects.remove_recipes(
+        instance.user_id, [instance.recipe_id]
+    )
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def touch_recipes_on_tags_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """Обновляет дату изменения рецептов при смене их тегов.
+
+    При очистке тегов со стороны тега затронутые рецепты известны только
+    до удаления связей, поэтому для неё используется pre_clear.
+    """
+    if action == "pre_clear":
+        recipes = instance.recipes.all() if reverse else [instance.pk]
+    elif action in ("post_add", "post_remove") and pk_set:
+        recipes = pk_set if reverse else [instance.pk]
+    else:
+        return
+    Recipe.objects.filter(pk__in=recipes).touch()
+
+
+@receiver(post_save, sender=Recipe)
+def update_image_variants(sender, instance, **kwargs):
+    """Запускает создание копий при смене изображения рецепта."""
+    if instance.image and (
+        instance.image_variants.get("source") != instance.image.name
+    ):
+        schedule_variants(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def delete_image_variants(sender, instance, **kwargs):
+    """Удаляет копии изображения удалённого рецепта."""
+    transaction.on_commit(lambda: delete_variants(instance.image_variants))
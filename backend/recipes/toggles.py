@@ -0,0 +1,188 @@
+"""Модуль добавления рецептов в избранное и список покупок и их удаления.
+
+Запись добавляется одним INSERT ... ON CONFLICT DO NOTHING и удаляется
+одним DELETE без предварительной выборки. Счётчики и суммы списка покупок
+изменяются, только если запрос действительно добавил или удалил строку,
+поэтому одновременные повторные запросы не создают дубликатов и не
+изменяют счётчики дважды. Пакетные операции так же выполняют одну вставку
+или одно удаление для всех рецептов.
+"""
+from typing import NamedTuple
+
+from django.db import connections, router, transaction
+from django.db.models import sql
+
+from .counters import COUNTERS, change_counters
+from .models import Recipe, ShoppingCart, ShoppingListItem
+
+
+class BatchResult(NamedTuple):
+    """Итог пакетной операции: существующие и затронутые рецепты."""
+
+    found: set
+    changed: set
+
+
+# Вставка и удаление ниже используют внутренние API Django 3.2:
+# bulk_create(ignore_conflicts=True) не сообщает, какие строки вставлены,
+# а QuerySet.delete() вызывает сигналы удаления, которые второй раз
+# изменили бы счётчики и список покупок, в том числе для строк, уже
+# удалённых одновременным запросом. Другого кода с внутренними API в
+# модуле нет; их поведение и версию Django проверяет тест
+# tests/test_toggles.py::test_private_apis.
+
+
+def insert_query(model, objs):
+    """Запрос вставки объектов, пропускающий уже существующие строки."""
+    query = sql.InsertQuery(model, ignore_conflicts=True)
+    fields = [
+        field for field in model._meta.concrete_fields if not field.primary_key
+    ]
+    query.insert_values(fields, objs)
+    return query
+
+
+def insert_ignore(*objs):
+    """Вставляет объекты, которых ещё нет, и возвращает число строк."""
+    model = type(objs[0])
+    using = router.db_for_write(model)
+    query = insert_query(model, objs)
+    with connections[using].cursor() as cursor:
+        added = 0
+        for statement, params in query.get_compiler(using).as_sql():
+            cursor.execute(statement, params)
+            added += cursor.rowcount
+        return added
+
+
+def insert_returning(objs, field_name):
+    """Вставляет объекты, которых ещё нет, и возвращает значения поля.
+
+    Возвращаются значения только вставленных строк; требует поддержки
+    RETURNING в пакетной вставке.
+    """
+    model = type(objs[0])
+    rows = (
+        insert_query(model, objs)
+        .get_compiler(router.db_for_write(model))
+        .execute_sql([model._meta.get_field(field_name)])
+    )
+    return {row[0] for row in rows if row}
+
+
+def delete_rows(queryset):
+    """Удаляет строки запроса без сигналов и возвращает их число."""
+    return queryset._raw_delete(router.db_for_write(queryset.model))
+
+
+def apply_changes(model, user_id, recipe_ids, delta):
+    """Изменяет счётчики рецептов и суммы списка покупок пользователя."""
+    if not recipe_ids:
+        return
+    change_counters(COUNTERS[model], recipe_ids, delta)
+    if model is ShoppingCart:
+        ShoppingListItem.objects.add_recipes(user_id, recipe_ids, sign=delta)
+
+
+def add_recipe(model, user_id, recipe_id):
+    """Добавляет рецепт в избранное или список покупок пользователя.
+
+    Возвращает False, если рецепт уже был добавлен.
+    """
+    with transaction.atomic(using=router.db_for_write(model)):
+        added = insert_ignore(model(user_id=user_id, recipe_id=recipe_id))
+        if added:
+            apply_changes(model, user_id, [recipe_id], 1)
+    return bool(added)
+
+
+def remove_recipe(model, user_id, recipe_id):
+    """Удаляет рецепт из избранного или списка покупок пользователя.
+
+    Возвращает False, если рецепта там не было.
+    """
+    using = router.db_for_write(model)
+    with transaction.atomic(using=using):
+        removed = delete_rows(
+            model.objects.filter(user_id=user_id, recipe_id=recipe_id)
+        )
+        if removed:
+            apply_changes(model, user_id, [recipe_id], -1)
+    return bool(removed)
+
+
+def add_recipes(model, user_id, recipe_ids):
+    """Добавляет несколько рецептов в избранное или список покупок.
+
+    PostgreSQL возвращает добавленные строки из самой вставки (RETURNING),
+    в остальных БД уже добавленные рецепты выбираются перед вставкой.
+    """
+    using = router.db_for_write(model)
+    with transaction.atomic(using=using):
+        found = set(
+            Recipe.objects.filter(pk__in=recipe_ids).values_list(
+                "pk", flat=True
+            )
+        )
+        objs = [
+            model(user_id=user_id, recipe_id=recipe_id)
+            for recipe_id in sorted(found)
+        ]
+        if not objs:
+            return BatchResult(found, set())
+        if connections[using].features.can_return_rows_from_bulk_insert:
+            added = insert_returning(objs, "recipe")
+        else:
+            added = found - set(
+                model.objects.filter(
+                    user_id=user_id, recipe_id__in=found
+                ).values_list("recipe_id", flat=True)
+            )
+            if added:
+                insert_ignore(
+                    *(obj for obj in objs if obj.recipe_id in added)
+                )
+        apply_changes(model, user_id, added, 1)
+    return BatchResult(found, added)
+
+
+def remove_recipes(model, user_id, recipe_ids):
+    """Удаляет несколько рецептов из избранного или списка покупок.
+
+    Удаляемые строки блокируются до удаления, поэтому одновременный запрос
+    не удалит их повторно и не уменьшит счётчики дважды.
+    """
+    using = router.db_for_write(model)
+    with transaction.atomic(using=using):
+        removed = delete_locked(
+            model.objects.filter(user_id=user_id, recipe_id__in=recipe_ids)
+        )
+        found = removed | set(
+            Recipe.objects.filter(
+                pk__in=set(recipe_ids) - removed
+            ).values_list("pk", flat=True)
+        )
+        apply_changes(model, user_id, removed, -1)
+    return BatchResult(found, removed)
+
+
+def clear_recipes(model, user_id):
+    """Удаляет все рецепты из избранного или списка покупок пользователя.
+
+    Возвращает id удалённых рецептов.
+    """
+    using = router.db_for_write(model)
+    with transaction.atomic(using=using):
+        removed = delete_locked(model.objects.filter(user_id=user_id))
+        apply_changes(model, user_id, removed, -1)
+    return removed
+
+
+def delete_locked(queryset):
+    """Блокирует и удаляет строки запроса, возвращает id их рецептов."""
+    recipe_ids = set(
+        queryset.select_for_update().values_list("recipe_id", flat=True)
+    )
+    if recipe_ids:
+        delete_rows(queryset.filter(recipe_id__in=recipe_ids))
+    return recipe_ids
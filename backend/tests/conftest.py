@@ -0,0 +1,74 @@
+"""Общие фикстуры тестов."""
+from io import StringIO
+
+import pytest
+from rest_framework.authtoken.models import Token
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, override_settings
+
+from recipes.images import wait_for_variants
+from recipes.models import ShoppingCart
+
+
+REPLICA = "replica_1"
+
+
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(tmp_path_factory):
+    """Хранит тестовые БД SQLite в файлах и добавляет БД реплики.
+
+    БД SQLite в памяти блокирует таблицы между потоками без ожидания,
+    а тесты одновременных запросов выполняют их из нескольких потоков.
+    Реплика — отдельная БД с той же схемой, но без данных: в ней есть
+    только то, что тест записал в неё явно, как в отстающей реплике.
+    """
+    database = settings.DATABASES["default"]
+    replica = {**database, "TEST": {**database.get("TEST", {})}}
+    if database["ENGINE"].endswith("sqlite3"):
+        directory = tmp_path_factory.mktemp("db")
+        database.setdefault("TEST", {})["NAME"] = str(
+            directory / "test.sqlite3"
+        )
+        replica["TEST"]["NAME"] = str(directory / "replica.sqlite3")
+    else:
+        replica["TEST"]["NAME"] = f"test_{database['NAME']}_replica"
+    settings.DATABASES[REPLICA] = replica
+
+
+@pytest.fixture(scope="session", autouse=True)
+def media_root(tmp_path_factory):
+    """Сохраняет изображения рецептов во временный каталог."""
+    with override_settings(MEDIA_ROOT=tmp_path_factory.mktemp("media")):
+        yield
+        wait_for_variants()
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(media_root, django_db_setup, django_db_blocker):
+    """Наполняет тестовую БД небольшим набором данных один раз."""
+    with django_db_blocker.unblock():
+        call_command("seed_data", users=10, recipes=60, stdout=StringIO())
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Очищает кеш процесса, чтобы тесты не зависели друг от друга."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def user(db):
+    """Пользователь из набора данных со списком покупок и избранным."""
+    return ShoppingCart.objects.select_related("user").first().user
+
+
+@pytest.fixture
+def user_client(user):
+    """Клиент, аутентифицированный токеном пользователя."""
+    token = Token.objects.get_or_create(user=user)[0]
+    return Client(HTTP_AUTHORIZATION=f"Token {token.key}")
@@ -0,0 +1,118 @@
+"""Тесты ASGI-приложения."""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from asgiref.sync import async_to_sync
+from rest_framework.authtoken.models import Token
+
+from django.db import connections
+from django.test import Client
+
+from api.shopping_list import TextShoppingListRenderer
+from recipes.models import ShoppingCart
+
+
+pytestmark = pytest.mark.django_db
+
+
+def in_thread(func, *args):
+    """Выполняет func в отдельном потоке с его собственным соединением.
+
+    Представления под ASGI выполняются в других потоках и не видят данных
+    транзакции теста, поэтому все обращения теста к БД тоже идут из
+    отдельных потоков и фиксируются сразу.
+    """
+
+    def run():
+        try:
+            return func(*args)
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(run).result()
+
+
+@pytest.fixture
+def application(db):
+    """ASGI-приложение проекта.
+
+    При импорте модуль строит индекс ингредиентов в отдельном потоке.
+    """
+    from foodgram.asgi import application
+
+    return application
+
+
+def create_token():
+    """Токен пользователя со списком покупок."""
+    user = ShoppingCart.objects.select_related("user").first().user
+    return Token.objects.get_or_create(user=user)[0]
+
+
+@pytest.fixture
+def committed_token(db):
+    """Токен, видимый потокам приложения; удаляется после теста."""
+    token = in_thread(create_token)
+    yield token.key
+    in_thread(token.delete)
+
+
+def asgi_get(application, path, query_string, headers, messages):
+    """Выполняет GET-запрос к ASGI-приложению, сохраняя его сообщения."""
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": query_string,
+        "headers": headers,
+    }
+    # Синхронный код запроса выполняется в потоке, вызвавшем
+    # async_to_sync, поэтому это не должен быть поток транзакции теста.
+    in_thread(async_to_sync(application), scope, receive, send)
+
+
+def download(client):
+    """Содержимое списка покупок, полученное через WSGI-клиент."""
+    response = client.get("/api/recipes/download_shopping_cart/?format=txt")
+    return b"".join(response.streaming_content)
+
+
+def test_shopping_list_streamed_under_asgi(
+    application, committed_token, monkeypatch
+):
+    """Список покупок читается из БД после начала ответа, а не заранее."""
+    messages = []
+    sent_before_parts = []
+    stream = TextShoppingListRenderer.stream
+
+    def tracked_stream(renderer, ingredients):
+        for part in stream(renderer, ingredients):
+            sent_before_parts.append(len(messages))
+            yield part
+
+    monkeypatch.setattr(TextShoppingListRenderer, "stream", tracked_stream)
+    authorization = f"Token {committed_token}".encode()
+    asgi_get(
+        application,
+        "/api/recipes/download_shopping_cart/",
+        b"format=txt",
+        [(b"host", b"testserver"), (b"authorization", authorization)],
+        messages,
+    )
+    start, *body = messages
+    assert start["type"] == "http.response.start"
+    assert start["status"] == 200
+    assert len(sent_before_parts) > 1
+    assert min(sent_before_parts) == 1
+    expected = in_thread(
+        download, Client(HTTP_AUTHORIZATION=authorization.decode())
+    )
+    assert b"".join(message.get("body", b"") for message in body) == expected
@@ -0,0 +1,37 @@
+"""Тесты проверок настроек проекта."""
+from foodgram.checks import check_shared_cache
+
+
+LOCMEM = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+SHARED = {
+    "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+    "LOCATION": "cache",
+}
+
+
+def error_ids(settings, cache, **options):
+    """Id ошибок проверки кеша при заданных настройках."""
+    settings.CACHES = {"default": cache}
+    for name, value in options.items():
+        setattr(settings, name, value)
+    return [error.id for error in check_shared_cache(None)]
+
+
+def test_process_cache_with_several_workers(settings):
+    """Несколько воркеров требуют общий кеш."""
+    assert error_ids(settings, LOCMEM, WEB_CONCURRENCY=1) == []
+    assert error_ids(settings, LOCMEM, WEB_CONCURRENCY=4) == [
+        "foodgram.E001"
+    ]
+    assert error_ids(settings, SHARED, WEB_CONCURRENCY=4) == []
+
+
+def test_process_cache_with_replicas(settings):
+    """Реплики с несколькими воркерами требуют общий кеш."""
+    replicas = {"DATABASE_REPLICAS": ["replica_1"]}
+    assert error_ids(settings, LOCMEM, WEB_CONCURRENCY=1, **replicas) == []
+    assert error_ids(settings, LOCMEM, WEB_CONCURRENCY=4, **replicas) == [
+        "foodgram.E001",
+        "foodgram.E002",
+    ]
+    assert error_ids(settings, SHARED, WEB_CONCURRENCY=4, **replicas) == []
@@ -0,0 +1,32 @@
+"""Тесты лент подписок."""
+from recipes.models import FeedEntry, Recipe
+from users.models import Subscription, User
+
+
+def test_feed_backfilled_when_author_drops_to_threshold(
+    db, settings, django_capture_on_commit_callbacks
+):
+    """После отписки до порога рецепты автора снова записываются в ленты."""
+    settings.FEED_FANOUT_MAX_FOLLOWERS = 1
+    author, first, second = (
+        User.objects.create_user(email=f"{name}@example.com", username=name)
+        for name in ("feed-author", "feed-first", "feed-second")
+    )
+    for follower in (first, second):
+        Subscription.objects.create(follower=follower, author=author)
+    recipe = Recipe.objects.create(
+        author=author,
+        name="Рецепт популярного автора",
+        image="recipes/seed.png",
+        text="Описание рецепта.",
+        cooking_time=10,
+    )
+    FeedEntry.objects.fan_out(recipe)
+    assert not FeedEntry.objects.filter(recipe=recipe).exists()
+    assert FeedEntry.objects.recipe_ids(first) == [recipe.pk]
+    with django_capture_on_commit_callbacks(execute=True):
+        Subscription.objects.filter(follower=second).delete()
+    assert list(
+        FeedEntry.objects.filter(recipe=recipe).values_list("user", flat=True)
+    ) == [first.pk]
+    assert FeedEntry.objects.recipe_ids(first) == [recipe.pk]
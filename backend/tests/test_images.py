@@ -0,0 +1,51 @@
+"""Тесты уменьшенных копий изображений рецептов."""
+import logging
+
+import pytest
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from recipes import images
+from recipes.models import Recipe
+
+
+@pytest.fixture
+def recipe(db):
+    """Рецепт из набора данных."""
+    return Recipe.objects.order_by("id").first()
+
+
+@pytest.mark.parametrize("content", [None, b"not an image"])
+def test_unreadable_image_skipped_without_traceback(recipe, caplog, content):
+    """Отсутствующее или нечитаемое изображение только отмечается."""
+    name = "recipes/unreadable.png"
+    if content is not None:
+        name = default_storage.save(name, ContentFile(content))
+    with caplog.at_level(logging.WARNING, logger=images.logger.name):
+        images.generate_variants(recipe.pk, name)
+    assert [record.levelno for record in caplog.records] == [logging.WARNING]
+    assert caplog.records[0].exc_info is None
+    recipe.refresh_from_db()
+    assert recipe.image_variants.get("source") != name
+
+
+def test_variants_disabled(
+    recipe, settings, monkeypatch, django_capture_on_commit_callbacks
+):
+    """Внутри variants_disabled() копии не создаются."""
+    settings.RECIPE_IMAGE_WORKERS = 0
+    generated = []
+    monkeypatch.setattr(
+        images,
+        "generate_variants",
+        lambda recipe_id, image_name: generated.append(recipe_id),
+    )
+    recipe.image = "recipes/other.png"
+    with django_capture_on_commit_callbacks(execute=True):
+        with images.variants_disabled():
+            recipe.save()
+    assert generated == []
+    with django_capture_on_commit_callbacks(execute=True):
+        recipe.save()
+    assert generated == [recipe.pk]
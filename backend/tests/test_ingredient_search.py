@@ -0,0 +1,50 @@
+"""Тесты поиска ингредиентов по названию."""
+import threading
+import time
+
+import pytest
+
+from django.test import Client
+
+from api.ingredient_index import IngredientIndex
+from api.views import INGREDIENTS_LIMIT_DEFAULT, INGREDIENTS_LIMIT_MAX
+
+
+pytestmark = pytest.mark.django_db
+
+
+def search(**params):
+    """Ответ поиска ингредиентов."""
+    return Client().get("/api/ingredients/", params)
+
+
+def test_search_limit_defaults_and_is_capped():
+    """Без limit выдача ограничена, а большой limit урезается."""
+    assert len(search(name="а").json()) == INGREDIENTS_LIMIT_DEFAULT
+    assert len(search(name="а", limit=1000).json()) == INGREDIENTS_LIMIT_MAX
+    assert search(name="а", limit=0).status_code == 400
+
+
+def test_blank_name_is_not_a_search():
+    """Название из пробелов не превращается в поиск по всем ингредиентам."""
+    assert search(name=" ").json() == search().json()
+
+
+def test_index_rebuilt_once_by_waiting_threads(monkeypatch):
+    """Поток, ждавший блокировку, не перестраивает индекс повторно."""
+    index = IngredientIndex()
+    builds = []
+    build = index.build
+
+    def counted_build():
+        builds.append(threading.get_ident())
+        return build()
+
+    monkeypatch.setattr(index, "build", counted_build)
+    with index._lock:
+        waiting = threading.Thread(target=index.get_entries)
+        waiting.start()
+        time.sleep(0.1)
+        build()
+    waiting.join()
+    assert builds == []
@@ -0,0 +1,40 @@
+"""Тесты замеров запросов."""
+from foodgram.metrics import registry
+
+
+DOWNLOAD_ROUTE = "api:recipe-download-shopping-cart"
+
+
+def observed(name, route, method="GET"):
+    """Число замеров и их сумма в гистограмме метрики маршрута."""
+    histogram = registry.histograms.get((name, route, method))
+    if histogram is None:
+        return 0, 0
+    return sum(histogram.counts), histogram.total
+
+
+def test_serialization_time_in_server_timing(user_client):
+    """Время сериализаторов API попадает в заголовок Server-Timing."""
+    response = user_client.get("/api/recipes/")
+    timings = dict(
+        metric.strip().split(";")[:2]
+        for metric in response["Server-Timing"].split(",")
+    )
+    assert float(timings["ser"].split("=")[1]) > 0
+
+
+def test_streaming_response_recorded_after_body(user_client):
+    """Потоковый ответ учитывается с размером и запросами передачи тела."""
+    queries_before = observed("foodgram_db_queries", DOWNLOAD_ROUTE)
+    sizes_before = observed("foodgram_response_size_bytes", DOWNLOAD_ROUTE)
+    response = user_client.get("/api/recipes/download_shopping_cart/")
+    assert observed("foodgram_db_queries", DOWNLOAD_ROUTE) == queries_before
+    content = b"".join(response.streaming_content)
+    count, queries = observed("foodgram_db_queries", DOWNLOAD_ROUTE)
+    assert count == queries_before[0] + 1
+    # Запрос ингредиентов выполняется при передаче тела.
+    assert queries > queries_before[1]
+    assert observed("foodgram_response_size_bytes", DOWNLOAD_ROUTE) == (
+        sizes_before[0] + 1,
+        sizes_before[1] + len(content),
+    )
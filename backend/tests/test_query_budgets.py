@@ -0,0 +1,102 @@
+"""Тесты бюджетов запросов к БД маршрутов API.
+
+Маршруты и их порядок берутся из команды benchmark_api. Все маршруты
+выполняются один раз после прогревочного прохода в транзакции, которая
+затем откатывается. Команды управления транзакциями в число запросов
+не входят, а действия, отложенные до фиксации (transaction.on_commit),
+не выполняются.
+"""
+import pytest
+
+from django.core.cache import cache
+from django.db import transaction
+
+from api.management.commands.benchmark_api import ROUTES, Command
+
+
+pytestmark = pytest.mark.django_db
+
+QUERY_BUDGETS = {
+    "api-root": 0,
+    "users-list": 3,
+    "users-list-limit-100": 3,
+    "users-create": 2,
+    "users-destroy": 13,
+    "users-detail": 2,
+    "users-me": 1,
+    "users-set-password": 1,
+    "users-subscriptions": 5,
+    "users-subscribe": 7,
+    "users-unsubscribe": 4,
+    "tags-list": 0,
+    "tags-detail": 0,
+    "ingredient-list": 0,
+    "ingredient-detail": 0,
+    "recipes-list": 3,
+    "recipes-list-limit-100": 3,
+    "recipes-list-anonymous": 2,
+    "recipes-list-favorited": 3,
+    "recipes-list-in-cart": 3,
+    "recipes-list-tags": 4,
+    "recipes-list-not-modified": 3,
+    "recipes-detail": 2,
+    "recipes-detail-not-modified": 2,
+    "recipes-feed": 4,
+    "recipes-create": 12,
+    "recipes-partial-update": 14,
+    "recipes-partial-update-amount": 14,
+    "recipes-destroy": 13,
+    "recipes-favorite": 3,
+    "recipes-favorite-delete": 2,
+    "recipes-shopping-cart": 8,
+    "recipes-shopping-cart-delete": 7,
+    "recipes-favorite-batch-add": 4,
+    "recipes-favorite-batch-remove": 3,
+    "recipes-shopping-cart-batch-add": 8,
+    "recipes-shopping-cart-clear": 7,
+    "recipes-download-shopping-cart": 1,
+    "auth-token-login": 4,
+    "auth-token-logout": 3,
+}
+
+# Пары маршрутов, которые должны выполнять одинаковое число запросов
+# независимо от размера страницы.
+INVARIANTS = [
+    ("users-list", "users-list-limit-100"),
+    ("recipes-list", "recipes-list-limit-100"),
+]
+
+
+@pytest.fixture(scope="module")
+def routes(django_db_setup, django_db_blocker):
+    """Результаты маршрутов benchmark_api: запросы и статусы."""
+    cache.clear()
+    with django_db_blocker.unblock(), transaction.atomic():
+        report = Command().run_routes(repeat=1)
+        transaction.set_rollback(True)
+    cache.clear()
+    return report["routes"]
+
+
+def test_budgets_cover_routes():
+    """Бюджет задан для каждого маршрута."""
+    assert set(QUERY_BUDGETS) == {route.name for route in ROUTES}
+
+
+@pytest.mark.parametrize("name", [route.name for route in ROUTES])
+def test_route_status(routes, name):
+    """Маршрут отвечает ожидаемым статусом."""
+    result = routes[name]
+    assert result["statuses"] == [result["expected_status"]]
+
+
+@pytest.mark.parametrize("name, budget", QUERY_BUDGETS.items())
+def test_route_query_budget(routes, name, budget):
+    """Маршрут укладывается в бюджет запросов."""
+    assert routes[name]["queries"] <= budget
+
+
+@pytest.mark.parametrize("first, second", INVARIANTS)
+def test_queries_do_not_depend_on_page_size(routes, first, second):
+    """Число запросов списка не зависит от размера страницы."""
+    assert routes[first]["queries"] == routes[second]["queries"]
@@ -0,0 +1,83 @@
+"""Тесты создания рецепта."""
+import base64
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Ingredient, Tag
+
+
+@pytest.fixture
+def recipe_payload(db):
+    """Данные рецепта с заданными id ингредиентов."""
+    image = BytesIO()
+    Image.new("RGB", (8, 8), "white").save(image, "PNG")
+    encoded = base64.b64encode(image.getvalue()).decode()
+
+    def payload(ingredient_ids):
+        return {
+            "tags": list(Tag.objects.values_list("id", flat=True)[:2]),
+            "ingredients": [
+                {"id": ingredient_id, "amount": 10}
+                for ingredient_id in ingredient_ids
+            ],
+            "name": "Рецепт для теста",
+            "image": f"data:image/png;base64,{encoded}",
+            "text": "Описание рецепта.",
+            "cooking_time": 15,
+        }
+
+    return payload
+
+
+def test_recipe_create_queries_do_not_depend_on_ingredients(
+    user_client, recipe_payload, django_assert_num_queries
+):
+    """Число запросов создания не растёт с числом ингредиентов."""
+    ingredient_ids = list(
+        Ingredient.objects.order_by("id").values_list("id", flat=True)[:30]
+    )
+    user_client.post(
+        "/api/recipes/",
+        recipe_payload(ingredient_ids[:5]),
+        content_type="application/json",
+    )
+    with CaptureQueriesContext(connection) as few_ingredients:
+        response = user_client.post(
+            "/api/recipes/",
+            recipe_payload(ingredient_ids[:5]),
+            content_type="application/json",
+        )
+    assert response.status_code == 201
+    with django_assert_num_queries(len(few_ingredients)):
+        response = user_client.post(
+            "/api/recipes/",
+            recipe_payload(ingredient_ids),
+            content_type="application/json",
+        )
+    assert response.status_code == 201
+    assert len(response.json()["ingredients"]) == 30
+
+
+def test_recipe_create_reports_missing_and_duplicate_ids(
+    user_client, recipe_payload
+):
+    """Отсутствующие и повторяющиеся ингредиенты — в одной ошибке."""
+    first, second = Ingredient.objects.order_by("id").values_list(
+        "id", flat=True
+    )[:2]
+    missing = Ingredient.objects.order_by("-id").first().id + 1
+    response = user_client.post(
+        "/api/recipes/",
+        recipe_payload([first, second, first, missing]),
+        content_type="application/json",
+    )
+    assert response.status_code == 400
+    assert response.json()["ingredients"] == [
+        f"Не найдены ингредиенты с id: {missing}.",
+        f"Ингредиенты повторяются: {first}.",
+    ]
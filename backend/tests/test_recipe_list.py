@@ -0,0 +1,38 @@
+"""Тесты списка рецептов."""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Recipe
+
+
+def test_recipe_list_queries_do_not_depend_on_limit(
+    user_client, django_assert_num_queries
+):
+    """Число запросов списка не растёт с размером страницы."""
+    user_client.get("/api/recipes/?limit=3")
+    with CaptureQueriesContext(connection) as small_page:
+        response = user_client.get("/api/recipes/?limit=3")
+    assert response.status_code == 200
+    assert len(response.json()["results"]) == 3
+    with django_assert_num_queries(len(small_page)):
+        response = user_client.get("/api/recipes/?limit=8")
+    assert response.status_code == 200
+    assert len(response.json()["results"]) == 8
+
+
+def test_recipe_list_etag_depends_on_count(user_client):
+    """Удаление рецепта с другой страницы меняет ETag страницы."""
+    response = user_client.get("/api/recipes/?limit=3")
+    etag = response["ETag"]
+    assert (
+        user_client.get(
+            "/api/recipes/?limit=3", HTTP_IF_NONE_MATCH=etag
+        ).status_code
+        == 304
+    )
+    Recipe.objects.order_by("pub_date").first().delete()
+    response = user_client.get(
+        "/api/recipes/?limit=3", HTTP_IF_NONE_MATCH=etag
+    )
+    assert response.status_code == 200
+    assert response["ETag"] != etag
@@ -0,0 +1,40 @@
+"""Тесты кеша справочных данных."""
+import time
+
+from django.test import Client
+
+from recipes.models import Ingredient, Tag
+
+
+def test_reference_data_expires_without_invalidation(db, settings):
+    """Изменение, о котором кеш не узнал, видно после истечения записей."""
+    settings.REFERENCE_DATA_CACHE_TIMEOUT = 1
+    client = Client()
+    tag = Tag.objects.order_by("id").first()
+    response = client.get(f"/api/tags/{tag.pk}/")
+    etag = response["ETag"]
+    # update() не вызывает сигналов, как изменение в другом процессе,
+    # кеш которого не виден этому.
+    Tag.objects.filter(pk=tag.pk).update(name="Переименованный тег")
+    response = client.get(f"/api/tags/{tag.pk}/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    time.sleep(1.1)
+    response = client.get(f"/api/tags/{tag.pk}/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.json()["name"] == "Переименованный тег"
+
+
+def test_ingredient_search_uses_versioned_etag(db):
+    """Поиск ингредиентов отвечает 304 до изменения справочника."""
+    client = Client()
+    path = "/api/ingredients/?name=соль"
+    response = client.get(path)
+    etag = response["ETag"]
+    assert response.json()
+    assert client.get(path, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    ingredient = Ingredient.objects.order_by("id").first()
+    ingredient.name = "Соль поваренная"
+    ingredient.save()
+    response = client.get(path, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert "Соль поваренная" in [item["name"] for item in response.json()]
@@ -0,0 +1,130 @@
+"""Тесты маршрутизации запросов между основной БД и репликой."""
+from contextlib import ExitStack
+
+import pytest
+from rest_framework.authtoken.models import Token
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from foodgram.middleware import get_primary_key
+from recipes.models import Recipe
+from users.models import User
+
+from .conftest import REPLICA
+
+
+pytestmark = pytest.mark.django_db(databases=[DEFAULT_DB_ALIAS, REPLICA])
+
+
+@pytest.fixture(autouse=True)
+def replicas(settings):
+    """Включает чтение из реплики."""
+    settings.DATABASE_REPLICAS = [REPLICA]
+
+
+def make_client(name):
+    """Клиент нового пользователя, который уже есть и в реплике."""
+    user = User.objects.create_user(
+        email=f"{name}@example.com", username=name
+    )
+    token = Token.objects.create(user=user)
+    User.objects.using(REPLICA).bulk_create([user])
+    Token.objects.using(REPLICA).bulk_create([token])
+    return Client(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+
+def request_databases(client, method, path, **kwargs):
+    """Выполняет запрос и возвращает ответ и БД, в которые ушли запросы."""
+    aliases = [DEFAULT_DB_ALIAS, REPLICA]
+    with ExitStack() as stack:
+        queries = {
+            alias: stack.enter_context(
+                CaptureQueriesContext(connections[alias])
+            )
+            for alias in aliases
+        }
+        response = getattr(client, method)(path, **kwargs)
+    return response, {alias for alias in aliases if len(queries[alias])}
+
+
+def test_safe_reads_go_to_replica():
+    """Чтение клиента с токеном и анонимное чтение идут в реплику."""
+    requests = [
+        (make_client("replica-reader"), "/api/recipes/"),
+        (Client(), "/api/users/"),
+    ]
+    for client, path in requests:
+        response, databases = request_databases(client, "get", path)
+        assert response.status_code == 200
+        assert databases == {REPLICA}
+    # В реплике есть только пользователь, записанный в неё тестом.
+    assert response.json()["count"] == 1
+
+
+def test_write_pins_client_to_primary():
+    """После записи клиент читает из основной БД до истечения окна."""
+    writer = make_client("replica-writer")
+    reader = make_client("replica-other")
+    recipe = Recipe.objects.first()
+    response, databases = request_databases(
+        writer, "post", f"/api/recipes/{recipe.pk}/favorite/"
+    )
+    assert response.status_code == 201
+    assert databases == {DEFAULT_DB_ALIAS}
+    response, databases = request_databases(writer, "get", "/api/recipes/")
+    assert response.status_code == 200
+    assert databases == {DEFAULT_DB_ALIAS}
+    _, databases = request_databases(reader, "get", "/api/recipes/")
+    assert databases == {REPLICA}
+    request = RequestFactory().get("/", **writer.defaults)
+    cache.delete(get_primary_key(request))
+    _, databases = request_databases(writer, "get", "/api/recipes/")
+    assert databases == {REPLICA}
+
+
+def test_login_pins_created_token():
+    """После входа запросы с новым токеном читают из основной БД."""
+    User.objects.create_user(
+        email="replica-login@example.com",
+        username="replica-login",
+        password="Password-123",
+    )
+    response = Client().post(
+        "/api/auth/token/login/",
+        {"email": "replica-login@example.com", "password": "Password-123"},
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    token = response.json()["auth_token"]
+    client = Client(HTTP_AUTHORIZATION=f"Token {token}")
+    response, databases = request_databases(client, "get", "/api/users/me/")
+    assert response.status_code == 200
+    assert response.json()["username"] == "replica-login"
+    assert databases == {DEFAULT_DB_ALIAS}
+
+
+def test_anonymous_write_pins_client():
+    """После регистрации анонимный клиент читает из основной БД."""
+    client = Client()
+    response = client.post(
+        "/api/users/",
+        {
+            "email": "replica-new@example.com",
+            "username": "replica-new",
+            "first_name": "Имя",
+            "last_name": "Фамилия",
+            "password": "Password-123",
+        },
+        content_type="application/json",
+    )
+    assert response.status_code == 201
+    response, databases = request_databases(
+        client, "get", f"/api/users/{response.json()['id']}/"
+    )
+    assert response.status_code == 200
+    assert databases == {DEFAULT_DB_ALIAS}
+    _, databases = request_databases(Client(), "get", "/api/users/")
+    assert databases == {REPLICA}
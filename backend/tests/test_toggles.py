@@ -0,0 +1,204 @@
+"""Тесты одновременных изменений избранного и списка покупок."""
+import logging
+import threading
+from collections import Counter
+
+import pytest
+from rest_framework.authtoken.models import Token
+
+import django
+from django.db import connection, connections
+from django.db.models.signals import post_delete, post_save
+from django.test import Client
+
+from recipes.counters import COUNTERS, find_drift
+from recipes.models import (
+    FavoriteRecipe, Ingredient, Recipe, RecipeIngredient, ShoppingCart,
+    ShoppingListItem,
+)
+from recipes.toggles import delete_rows, insert_ignore, insert_returning
+from users.models import User
+
+
+ROUNDS = 20
+THREADS = 8
+
+
+def run_concurrently(requests):
+    """Выполняет запросы одновременно, каждый в своём потоке.
+
+    requests — список троек (клиент, метод, путь). Возвращает счётчик
+    статусов ответов.
+    """
+    barrier = threading.Barrier(len(requests))
+    statuses = []
+
+    def worker(client, method, path):
+        try:
+            barrier.wait()
+            statuses.append(getattr(client, method)(path).status_code)
+        finally:
+            connections.close_all()
+
+    threads = [
+        threading.Thread(target=worker, args=request) for request in requests
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return Counter(statuses)
+
+
+@pytest.fixture
+def author(transactional_db):
+    """Автор рецептов."""
+    return User.objects.create_user(
+        email="author@example.com", username="author"
+    )
+
+
+@pytest.fixture
+def shopper(transactional_db):
+    """Пользователь и фабрика клиентов с его токеном."""
+    user = User.objects.create_user(
+        email="shopper@example.com", username="shopper"
+    )
+    token = Token.objects.create(user=user)
+
+    def make_client():
+        return Client(
+            raise_request_exception=False,
+            HTTP_AUTHORIZATION=f"Token {token.key}",
+        )
+
+    return user, make_client
+
+
+@pytest.fixture
+def quiet_request_log():
+    """Выводит в журнал запросов только ошибки сервера.
+
+    Ответы 400 на повторные нажатия ожидаемы.
+    """
+    logger = logging.getLogger("django.request")
+    level = logger.level
+    logger.setLevel(logging.ERROR)
+    yield
+    logger.setLevel(level)
+
+
+def create_recipe(author, ingredient, amount):
+    """Рецепт с одним ингредиентом."""
+    recipe = Recipe.objects.create(
+        author=author,
+        name=f"Рецепт {amount}",
+        image="recipes/seed.png",
+        text="Описание рецепта.",
+        cooking_time=10,
+    )
+    RecipeIngredient.objects.create(
+        recipe=recipe, ingredient=ingredient, amount=amount
+    )
+    return recipe
+
+
+@pytest.mark.parametrize("action", ["favorite", "shopping_cart"])
+@pytest.mark.parametrize(
+    "method, reset, success",
+    [("post", "delete", 201), ("delete", "post", 204)],
+)
+def test_repeated_toggle(
+    author, shopper, quiet_request_log, action, method, reset, success
+):
+    """Из одновременных одинаковых запросов данные меняет ровно один."""
+    user, make_client = shopper
+    ingredient = Ingredient.objects.create(name="Соль", measurement_unit="г")
+    recipe = create_recipe(author, ingredient, 3)
+    path = f"/api/recipes/{recipe.pk}/{action}/"
+    client = make_client()
+    for _ in range(ROUNDS):
+        getattr(client, reset)(path)
+        statuses = run_concurrently(
+            [(make_client(), method, path) for _ in range(THREADS)]
+        )
+        assert statuses == {success: 1, 400: THREADS - 1}
+    for model in (FavoriteRecipe, ShoppingCart):
+        assert not find_drift(COUNTERS[model]).exists()
+    assert ShoppingListItem.objects.stored_totals(
+        [user.pk]
+    ) == ShoppingListItem.objects.live_totals([user.pk])
+
+
+def test_cart_adds_with_shared_ingredient(author, shopper):
+    """Одновременное добавление рецептов с общим новым ингредиентом."""
+    user, make_client = shopper
+    client = make_client()
+    ingredient = Ingredient.objects.create(
+        name="Общий ингредиент", measurement_unit="г"
+    )
+    recipes = [create_recipe(author, ingredient, amount) for amount in (3, 5)]
+    for _ in range(ROUNDS):
+        statuses = run_concurrently(
+            [
+                (
+                    make_client(),
+                    "post",
+                    f"/api/recipes/{recipe.pk}/shopping_cart/",
+                )
+                for recipe in recipes
+            ]
+        )
+        assert statuses == {201: 2}
+        assert ShoppingListItem.objects.stored_totals([user.pk]) == {
+            (user.pk, ingredient.pk): 8
+        }
+        for recipe in recipes:
+            assert (
+                client.delete(
+                    f"/api/recipes/{recipe.pk}/shopping_cart/"
+                ).status_code
+                == 204
+            )
+        assert not ShoppingListItem.objects.filter(user=user).exists()
+    assert not ShoppingCart.objects.filter(user=user).exists()
+
+
+def test_private_apis(author, shopper):
+    """Вставка и удаление через внутренние API Django.
+
+    При обновлении Django проверьте insert_ignore, insert_returning и
+    delete_rows из recipes.toggles и поднимите версию в тесте.
+    """
+    assert django.VERSION[:2] == (3, 2)
+    user, _ = shopper
+    ingredient = Ingredient.objects.create(name="Соль", measurement_unit="г")
+    recipes = [create_recipe(author, ingredient, amount) for amount in (3, 5)]
+    signals = []
+
+    def receiver(sender, **kwargs):
+        signals.append(sender)
+
+    post_save.connect(receiver, sender=FavoriteRecipe)
+    post_delete.connect(receiver, sender=FavoriteRecipe)
+    try:
+        favorite = FavoriteRecipe(user=user, recipe=recipes[0])
+        assert insert_ignore(favorite) == 1
+        assert insert_ignore(favorite) == 0
+        if connection.features.can_return_rows_from_bulk_insert:
+            assert insert_returning(
+                [
+                    FavoriteRecipe(user=user, recipe=recipe)
+                    for recipe in recipes
+                ],
+                "recipe",
+            ) == {recipes[1].pk}
+        favorites = FavoriteRecipe.objects.filter(user=user)
+        count = favorites.count()
+        assert count
+        assert delete_rows(favorites) == count
+        assert delete_rows(favorites) == 0
+    finally:
+        post_save.disconnect(receiver, sender=FavoriteRecipe)
+        post_delete.disconnect(receiver, sender=FavoriteRecipe)
+    assert signals == []
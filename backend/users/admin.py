@@ -16,6 +16,8 @@ class CustomUserAdmin(UserAdmin):
         "first_name",
         "last_name",
         "is_staff",
+        "recipes_count",
+        "followers_count",
         "date_joined",
     )
     search_fields = ("username", "email", "first_name", "last_name")
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.3 on 2026-10-17 06:39
+
+from django.db import migrations, models
+import django.db.models.expressions
+
+
+def remove_invalid_subscriptions(apps, schema_editor):
+    Subscription = apps.get_model('users', 'Subscription')
+    Subscription.objects.filter(
+        follower=models.F('author')
+    ).delete()
+    duplicates = (
+        Subscription.objects.values('follower', 'author')
+        .annotate(keep_id=models.Min('id'), count=models.Count('id'))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        Subscription.objects.filter(
+            follower=duplicate['follower'], author=duplicate['author']
+        ).exclude(id=duplicate['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_invalid_subscriptions, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='subscription',
+            constraint=models.UniqueConstraint(fields=('follower', 'author'), name='unique_subscription'),
+        ),
+        migrations.AddConstraint(
+            model_name='subscription',
+            constraint=models.CheckConstraint(check=models.Q(('follower', django.db.models.expressions.F('author')), _negated=True), name='no_self_subscription'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.3 on 2026-10-17 07:01
+
+from django.db import migrations
+import recipes.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_subscription_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=recipes.fields.CounterField(default=0, editable=False, verbose_name='Число рецептов'),
+        ),
+    ]
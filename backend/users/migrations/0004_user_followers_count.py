@@ -0,0 +1,38 @@
+# Generated by Django 3.2.3 on 2026-10-17 07:05
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+import recipes.fields
+
+
+def fill_followers_count(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Subscription = apps.get_model('users', 'Subscription')
+    User.objects.update(
+        followers_count=Coalesce(
+            models.Subquery(
+                Subscription.objects.filter(author=models.OuterRef('pk'))
+                .order_by()
+                .values('author')
+                .annotate(total=models.Count('pk'))
+                .values('total')
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_recipes_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=recipes.fields.CounterField(default=0, editable=False, verbose_name='Число подписчиков'),
+        ),
+        migrations.RunPython(fill_followers_count, migrations.RunPython.noop),
+    ]
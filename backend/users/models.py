@@ -3,8 +3,10 @@ from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
 from django.db import models
 
+from recipes.fields import CounterField, CounterFieldsMixin
 
-class User(AbstractUser):
+
+class User(CounterFieldsMixin, AbstractUser):
     """Модель пользователя."""
 
     email = models.EmailField(
@@ -29,6 +31,8 @@ class User(AbstractUser):
     first_name = models.CharField(max_length=150, verbose_name="Имя")
     last_name = models.CharField(max_length=150, verbose_name="Фамилия")
     is_subscribed = models.BooleanField(default=False, verbose_name="Подписан")
+    recipes_count = CounterField(verbose_name="Число рецептов")
+    followers_count = CounterField(verbose_name="Число подписчиков")
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username"]
@@ -63,6 +67,15 @@ class Subscription(models.Model):
     class Meta:
         """Метакласс модели подписки."""
 
+        constraints = [
+            models.UniqueConstraint(
+                fields=["follower", "author"], name="unique_subscription"
+            ),
+            models.CheckConstraint(
+                check=~models.Q(follower=models.F("author")),
+                name="no_self_subscription",
+            ),
+        ]
         verbose_name = "Подписка"
         verbose_name_plural = "Подписки"
 